@@ -85,6 +85,48 @@ DATABASES = {
 }
 
 
+# Cache
+# Caché en disco compartida por todos los procesos del servidor, para que las
+# invalidaciones hechas por un worker sean visibles en los demás. Guarda unas dos
+# entradas por estudiante activo (cursos comprados y su versión) más las de cada
+# instructor y certificado consultado: MAX_ENTRIES debe acompañar a la base de
+# usuarios (el valor por defecto de Django, 300, no alcanza ni para un curso).
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache_archivos.CacheEnArchivos',
+        'LOCATION': BASE_DIR / 'cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 200000,
+            # Al llenarse descarta una décima parte, no un tercio
+            'CULL_FREQUENCY': 10,
+            # Escrituras de cada proceso entre dos revisiones del tamaño
+            'REVISAR_CADA': 1000,
+        },
+    },
+    # Fragmentos HTML renderizados (tarjetas de curso). Es local a cada proceso y
+    # acotada: al llenarse descarta primero las entradas usadas hace más tiempo.
+    'fragmentos': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'fragmentos',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+    # Códigos inexistentes consultados en la verificación pública de certificados
+    # (los existentes van a la caché compartida). Local a cada proceso y acotada
+    # como la anterior.
+    'verificaciones': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'verificaciones',
+        'TIMEOUT': 5 * 60,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        },
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -125,6 +167,24 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Comprobantes de compra generados (fuera de MEDIA_ROOT para que no se sirvan públicamente)
+COMPROBANTES_ROOT = BASE_DIR / 'comprobantes'
+
+# Subidas por trozos en curso; al completarse el archivo pasa a MEDIA_ROOT
+SUBIDAS_ROOT = BASE_DIR / 'subidas'
+
+# PDF guardados por contenido (material de cursos, plantillas y certificados), fuera de
+# MEDIA_ROOT para que el servidor web no los publique: sólo se entregan desde las
+# vistas que verifican el acceso
+MEDIA_PROTEGIDA_ROOT = BASE_DIR / 'media_protegida'
+
+# Entrega de media protegida (material de cursos): '' la sirve Django con soporte de
+# Range; 'x-accel-redirect' (nginx) o 'x-sendfile' (Apache, lighttpd) se la delegan
+# al servidor web. Con nginx, MEDIA_PROTEGIDA_PREFIJO debe ser una location
+# "internal" con alias a MEDIA_PROTEGIDA_ROOT.
+MEDIA_PROTEGIDA_ENTREGA = ''
+MEDIA_PROTEGIDA_PREFIJO = '/media-protegida/'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Usuario, Curso, Modulo, Compra, Progreso, Evaluacion, Certificado
+from .models import Usuario, Curso, Modulo, Compra, Progreso, Evaluacion, Certificado, TrabajoPDF
+from . import search
 
 
 # ======= Usuario Admin =======
@@ -49,6 +50,12 @@ class CursoAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        # Usa el índice FTS5 en lugar de LIKE '%...%' sobre cada campo
+        if not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+        return search.filtrar_queryset(queryset, search_term), False
+
 
 # ======= Modulo Admin =======
 @admin.register(Modulo)
@@ -150,3 +157,11 @@ class CertificadoAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+
+# ======= Trabajo PDF Admin =======
+@admin.register(TrabajoPDF)
+class TrabajoPDFAdmin(admin.ModelAdmin):
+    list_display = ('id', 'tipo', 'objeto_id', 'estado', 'prioridad', 'intentos', 'fecha_creacion', 'fecha_fin')
+    list_filter = ('estado', 'tipo')
+    readonly_fields = ('worker', 'resultado', 'error', 'fecha_creacion', 'fecha_inicio', 'fecha_fin')
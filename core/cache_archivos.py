@@ -0,0 +1,24 @@
+import itertools
+
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class CacheEnArchivos(FileBasedCache):
+    """
+    FileBasedCache que no lista su directorio en cada escritura.
+
+    FileBasedCache recorre todos sus archivos en cada set() para ver si superó
+    MAX_ENTRIES; con una entrada por estudiante eso cuesta más que la escritura
+    misma. Aquí la revisión se hace una vez cada OPTIONS['REVISAR_CADA']
+    escrituras de cada proceso, así que MAX_ENTRIES puede excederse en ese
+    margen hasta la siguiente revisión.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        self._revisar_cada = int(params.get('OPTIONS', {}).get('REVISAR_CADA', 1000))
+        self._escrituras = itertools.count()
+
+    def _cull(self):
+        if next(self._escrituras) % self._revisar_cada == 0:
+            super()._cull()
@@ -0,0 +1,33 @@
+import time
+
+from django.core.cache import cache
+
+
+def _version_key(namespace: str, ident) -> str:
+    return f'{namespace}:version:{ident}'
+
+
+def get_version(namespace: str, ident) -> int:
+    """Versión actual de los datos cacheados de `ident` dentro de `namespace`."""
+    key = _version_key(namespace, ident)
+    version = cache.get(key)
+    if version is None:
+        # Se parte de la hora actual para no reutilizar una versión antigua si la
+        # clave fue expulsada de la caché
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace: str, ident) -> None:
+    """Invalida todas las entradas cacheadas de `ident` pasando a una nueva versión."""
+    key = _version_key(namespace, ident)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+
+
+def versioned_key(namespace: str, ident) -> str:
+    """Clave de caché que cambia cada vez que se invalida `ident`."""
+    return f'{namespace}:{ident}:{get_version(namespace, ident)}'
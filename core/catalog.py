@@ -0,0 +1,146 @@
+from decimal import Decimal
+from typing import Optional
+from urllib.parse import urlencode
+
+from django.db.models import Case, CharField, Count, Q, QuerySet, Value, When
+from django.http import QueryDict
+
+from .models import Curso
+from .pagination import keyset_page
+
+CATALOGO_TAMANO_PAGINA = 24
+
+# Sólo las columnas que usa la tarjeta de curso en course_list.html (incluida la
+# fecha de actualización, que forma parte de la clave del fragmento cacheado)
+CAMPOS_TARJETA = (
+    'id',
+    'titulo',
+    'descripcion',
+    'precio',
+    'tipo',
+    'fecha_creacion',
+    'fecha_actualizacion',
+    'instructor',
+    'instructor__nombre_completo',
+)
+
+TIPOS = dict(Curso._meta.get_field('tipo').choices)
+
+# (clave, etiqueta, mínimo incluido, máximo excluido)
+RANGOS_PRECIO = [
+    ('0-20', 'Hasta $20', None, Decimal('20')),
+    ('20-50', '$20 a $50', Decimal('20'), Decimal('50')),
+    ('50-100', '$50 a $100', Decimal('50'), Decimal('100')),
+    ('100+', 'Más de $100', Decimal('100'), None),
+]
+
+FACETAS = ('tipo', 'rango', 'instructor')
+
+
+def cursos_visibles() -> QuerySet:
+    """Cursos que pueden mostrarse en el catálogo público."""
+    return Curso.objects.filter(estado='activo')
+
+
+def _filtro_rango(clave: str) -> Q:
+    for valor, _etiqueta, minimo, maximo in RANGOS_PRECIO:
+        if valor == clave:
+            filtro = Q()
+            if minimo is not None:
+                filtro &= Q(precio__gte=minimo)
+            if maximo is not None:
+                filtro &= Q(precio__lt=maximo)
+            return filtro
+    return Q()
+
+
+def leer_filtros(params: QueryDict) -> dict:
+    """Extrae de la URL los filtros válidos del catálogo."""
+    filtros = {}
+    if params.get('tipo') in TIPOS:
+        filtros['tipo'] = params['tipo']
+    if params.get('rango') in {clave for clave, *_ in RANGOS_PRECIO}:
+        filtros['rango'] = params['rango']
+    if params.get('instructor', '').isdigit():
+        filtros['instructor'] = int(params['instructor'])
+    return filtros
+
+
+def aplicar_filtros(queryset: QuerySet, filtros: dict) -> QuerySet:
+    if 'tipo' in filtros:
+        queryset = queryset.filter(tipo=filtros['tipo'])
+    if 'rango' in filtros:
+        queryset = queryset.filter(_filtro_rango(filtros['rango']))
+    if 'instructor' in filtros:
+        queryset = queryset.filter(instructor_id=filtros['instructor'])
+    return queryset
+
+
+def pagina_catalogo(cursor: Optional[str], filtros: Optional[dict] = None,
+                    tamano: int = CATALOGO_TAMANO_PAGINA) -> tuple[list, Optional[str]]:
+    """Devuelve una página del catálogo y el cursor de la siguiente."""
+    queryset = aplicar_filtros(cursos_visibles(), filtros or {})
+    queryset = queryset.select_related('instructor').only(*CAMPOS_TARJETA)
+    return keyset_page(queryset, 'fecha_creacion', cursor, tamano)
+
+
+def contar_facetas(filtros: dict) -> dict:
+    """
+    Cuenta los cursos de cada opción de filtro con una sola consulta agrupada.
+
+    Se agrupa por (tipo, rango de precio, instructor) y las sumas se hacen en
+    Python. El conteo de cada faceta aplica los demás filtros activos pero no el
+    propio, para que al elegir una opción las alternativas sigan mostrando cuántos
+    cursos tendrían.
+    """
+    rango = Case(
+        *[When(_filtro_rango(clave), then=Value(clave)) for clave, *_ in RANGOS_PRECIO],
+        output_field=CharField()
+    )
+    filas = (
+        cursos_visibles()
+        .annotate(rango=rango)
+        .values('tipo', 'rango', 'instructor', 'instructor__nombre_completo')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+
+    conteos = {faceta: {} for faceta in FACETAS}
+    instructores = {}
+    for fila in filas:
+        instructores[fila['instructor']] = fila['instructor__nombre_completo']
+        for faceta in FACETAS:
+            coincide = all(
+                fila[otra] == filtros[otra]
+                for otra in FACETAS if otra != faceta and otra in filtros
+            )
+            if coincide:
+                conteos[faceta][fila[faceta]] = conteos[faceta].get(fila[faceta], 0) + fila['total']
+
+    etiquetas = {
+        'tipo': TIPOS,
+        'rango': {clave: etiqueta for clave, etiqueta, *_ in RANGOS_PRECIO},
+        'instructor': dict(sorted(instructores.items(), key=lambda item: item[1])),
+    }
+    return {
+        faceta: [
+            {
+                'valor': valor,
+                'etiqueta': etiqueta,
+                'total': conteos[faceta].get(valor, 0),
+                'activo': filtros.get(faceta) == valor,
+                # Elegir una opción activa la quita; si no, reemplaza la anterior
+                'query': query_filtros({
+                    **filtros,
+                    faceta: None if filtros.get(faceta) == valor else valor
+                }),
+            }
+            for valor, etiqueta in etiquetas[faceta].items()
+        ]
+        for faceta in FACETAS
+    }
+
+
+def query_filtros(filtros: dict) -> str:
+    """Query string con los filtros indicados (se omiten los vacíos)."""
+    return urlencode({faceta: valor for faceta, valor in filtros.items() if valor is not None})
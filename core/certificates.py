@@ -1,9 +1,18 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from .models import Certificado, PlantillaCertificado
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, JsonResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.text import slugify
+from django.views.decorators.http import require_GET
+from .models import Certificado, Curso, PlantillaCertificado
+from . import delivery, issuance, jobs, storage, uploads, verification
 from django.db.models import Count
-import os
+
+# Tiempo que navegadores y proxies pueden reutilizar una verificación (segundos).
+# Allí no se puede invalidar: un certificado revocado sigue válido hasta que vence.
+MAX_AGE_VERIFICACION = 15 * 60
+MAX_AGE_INEXISTENTE = 5 * 60
 
 @login_required
 def create_certificate_template(request):
@@ -17,12 +26,27 @@ def create_certificate_template(request):
             nombre = request.POST.get('nombre')
             descripcion = request.POST.get('descripcion', '')  # Optional field
             archivo = request.FILES.get('archivo')
+            subida_id = request.POST.get('subida')
             
             # Validate required fields
             if not nombre:
                 messages.error(request, 'El nombre de la plantilla es requerido.')
                 return render(request, 'core/admin/create_certificate_template.html')
             
+            if subida_id:
+                # Subida por trozos: el archivo ya está validado y guardado en MEDIA_ROOT
+                try:
+                    subida = uploads.completa(subida_id, request.user, 'plantilla')
+                except uploads.SubidaInvalida as e:
+                    messages.error(request, str(e))
+                    return render(request, 'core/admin/create_certificate_template.html')
+                plantilla = PlantillaCertificado(nombre=nombre, descripcion=descripcion)
+                storage.asignar(plantilla.archivo, subida.archivo)
+                plantilla.save()
+                uploads.consumir(subida)
+                messages.success(request, f'Plantilla "{plantilla.nombre}" creada exitosamente.')
+                return redirect('admin_certificates')
+            
             if not archivo:
                 messages.error(request, 'Debe seleccionar un archivo PDF.')
                 return render(request, 'core/admin/create_certificate_template.html')
@@ -32,9 +56,11 @@ def create_certificate_template(request):
                 messages.error(request, 'El archivo debe ser un PDF válido.')
                 return render(request, 'core/admin/create_certificate_template.html')
             
-            # Check file size (max 5MB)
-            if archivo.size > 5 * 1024 * 1024:
-                messages.error(request, 'El archivo es demasiado grande. El tamaño máximo permitido es 5MB.')
+            # Check file size (max 5MB) and PDF signature
+            try:
+                uploads.validar_archivo(archivo, 'plantilla')
+            except uploads.SubidaInvalida as e:
+                messages.error(request, str(e))
                 return render(request, 'core/admin/create_certificate_template.html')
             
             # Create new template
@@ -68,13 +94,8 @@ def delete_certificate_template(request, pk):
             # Guardar el nombre para el mensaje
             nombre_plantilla = plantilla.nombre
             
-            # Eliminar el archivo físico si existe
-            if plantilla.archivo:
-                archivo_path = plantilla.archivo.path
-                if os.path.exists(archivo_path):
-                    os.remove(archivo_path)
-            
-            # Eliminar el registro de la base de datos
+            # Eliminar el registro; la señal post_delete suelta la referencia al archivo
+            # (otra plantilla puede compartir el mismo PDF)
             plantilla.delete()
             
             messages.success(request, f'La plantilla "{nombre_plantilla}" ha sido eliminada exitosamente.')
@@ -83,3 +104,95 @@ def delete_certificate_template(request, pk):
             messages.error(request, f'Error al eliminar la plantilla: {str(e)}')
     
     return redirect('admin_certificates')
+
+
+@login_required
+def ver_plantilla(request: HttpRequest, pk: int) -> HttpResponse:
+    """PDF de una plantilla; está en MEDIA_PROTEGIDA_ROOT y no tiene URL pública."""
+    if not request.user.is_superuser:
+        messages.error(request, 'No tienes permisos para ver plantillas de certificados.')
+        return redirect('home')
+    plantilla = get_object_or_404(PlantillaCertificado.objects.only('nombre', 'archivo'), pk=pk)
+    return delivery.entregar(request, plantilla.archivo, f'{slugify(plantilla.nombre) or "plantilla"}.pdf')
+
+
+@login_required
+def emitir_con_plantilla(request: HttpRequest, pk: int) -> HttpResponse:
+    """Encola la emisión de los certificados pendientes de un curso con esta plantilla."""
+    if not request.user.is_superuser:
+        messages.error(request, 'No tienes permisos para emitir certificados.')
+        return redirect('admin_certificates')
+    if request.method != 'POST':
+        return redirect('admin_certificates')
+
+    plantilla = get_object_or_404(PlantillaCertificado, pk=pk)
+    curso = get_object_or_404(Curso, pk=request.POST.get('curso') or 0)
+    if not issuance.disponible():
+        messages.error(request, 'Para emitir certificados hace falta instalar pypdf.')
+        return redirect('admin_certificates')
+
+    trabajo = jobs.encolar('emision', curso.id, {'plantilla': plantilla.pk},
+                           prioridad=jobs.PRIORIDAD_MASIVA, usuario=request.user)
+    return redirect('ver_trabajo', pk=trabajo.pk)
+
+
+def _cachear_verificacion(request: HttpRequest, response: HttpResponse, encontrado: bool) -> HttpResponse:
+    max_age = MAX_AGE_VERIFICACION if encontrado else MAX_AGE_INEXISTENTE
+    if request.user.is_authenticated:
+        # La página muestra la barra del usuario: no puede compartirse
+        patch_cache_control(response, private=True, max_age=max_age)
+    else:
+        patch_cache_control(response, public=True, max_age=max_age)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+@require_GET
+def verificar_certificado(request: HttpRequest, codigo: str = '') -> HttpResponse:
+    """Página pública para verificar un certificado por su código."""
+    codigo = codigo or request.GET.get('codigo', '')
+    if not codigo.strip():
+        return render(request, 'core/verificar_certificado.html')
+    if codigo != verification.normalizar(codigo):
+        return redirect('verificar_certificado_codigo', codigo=verification.normalizar(codigo))
+
+    certificado = verification.verificar(codigo)
+    if certificado is not None and certificado['codigo'] != codigo:
+        # Una sola URL por certificado, para que la caché HTTP no se fragmente
+        return redirect('verificar_certificado_codigo', codigo=certificado['codigo'])
+    response = render(request, 'core/verificar_certificado.html', {
+        'codigo': codigo,
+        'certificado': certificado,
+    }, status=200 if certificado else 404)
+    return _cachear_verificacion(request, response, certificado is not None)
+
+
+@require_GET
+def verificar_certificado_json(request: HttpRequest, codigo: str) -> JsonResponse:
+    """Verificación de un certificado en JSON, para integraciones de empleadores."""
+    certificado = verification.verificar(codigo)
+    if certificado is None:
+        response = JsonResponse({'valido': False, 'codigo': verification.normalizar(codigo)}, status=404)
+    else:
+        response = JsonResponse({'valido': True, **certificado})
+    # La respuesta no depende del usuario
+    patch_cache_control(response, public=True,
+                        max_age=MAX_AGE_VERIFICACION if certificado else MAX_AGE_INEXISTENTE)
+    return response
+
+
+@require_GET
+def descargar_certificado_verificado(request: HttpRequest, codigo: str) -> FileResponse:
+    """Descarga el PDF de un certificado a partir de su código de verificación."""
+    datos = verification.verificar(codigo)
+    certificado = datos and Certificado.objects.filter(
+        codigo_unico_pdf=datos['codigo']
+    ).only('codigo_unico_pdf', 'archivo').first()
+    if certificado is None or not certificado.archivo:
+        raise Http404('Certificado no encontrado')
+    return FileResponse(
+        certificado.archivo.open('rb'),
+        as_attachment=True,
+        filename=f'certificado_{certificado.codigo_unico_pdf}.pdf',
+        content_type='application/pdf'
+    )
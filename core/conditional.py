@@ -0,0 +1,54 @@
+import hashlib
+from functools import wraps
+from typing import Callable, Optional
+
+from django.http import HttpRequest
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .cache_versions import get_version
+from .entitlements import NAMESPACE as ENTITLEMENTS_NAMESPACE
+
+
+def firma_usuario(request: HttpRequest) -> str:
+    """
+    Parte del validador que depende de quién hace la petición.
+
+    Las páginas muestran el nombre del usuario y, para estudiantes, los cursos
+    comprados; por eso el ETag cambia con el usuario y con la versión de sus
+    accesos.
+    """
+    if not request.user.is_authenticated:
+        return 'anonimo'
+    return f'{request.user.pk}:{get_version(ENTITLEMENTS_NAMESPACE, request.user.pk)}'
+
+
+def etag(*partes) -> str:
+    """ETag compacto a partir de las partes del validador."""
+    return hashlib.md5('|'.join(str(parte) for parte in partes).encode()).hexdigest()
+
+
+def revalidar(etag_func: Callable, last_modified_func: Optional[Callable] = None):
+    """
+    Decorador para páginas públicas que responden 304 si no cambiaron.
+
+    Los validadores se calculan antes de la vista, así que un 304 no renderiza la
+    plantilla. La respuesta se marca para que navegador y proxy la guarden pero la
+    revaliden siempre: pública para visitantes anónimos y privada para usuarios
+    autenticados.
+    """
+    def decorator(view):
+        vista_condicional = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+
+        @wraps(view)
+        def inner(request: HttpRequest, *args, **kwargs):
+            response = vista_condicional(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+                if request.user.is_authenticated:
+                    patch_cache_control(response, private=True, no_cache=True)
+                else:
+                    patch_cache_control(response, public=True, no_cache=True)
+                patch_vary_headers(response, ('Cookie',))
+            return response
+        return inner
+    return decorator
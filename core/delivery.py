@@ -0,0 +1,164 @@
+import os
+import re
+from typing import Optional
+from urllib.parse import quote
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe, quote_etag
+from django.utils.text import slugify
+
+from .entitlements import tiene_acceso
+from .models import Curso
+
+RANGO_BYTES = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangoNoSatisfacible(Exception):
+    pass
+
+
+class _Tramo:
+    """
+    Archivo abierto limitado a `longitud` bytes desde `inicio`.
+
+    Expone fileno() para que el servidor WSGI pueda enviarlo con sendfile: éste
+    parte de la posición actual del descriptor y se detiene en el Content-Length.
+    """
+
+    def __init__(self, archivo, inicio: int, longitud: int):
+        archivo.seek(inicio)
+        self.archivo = archivo
+        self.name = archivo.name
+        self.restante = longitud
+
+    def read(self, cantidad: int = -1) -> bytes:
+        if self.restante <= 0:
+            return b''
+        cantidad = self.restante if cantidad < 0 else min(cantidad, self.restante)
+        datos = self.archivo.read(cantidad)
+        self.restante -= len(datos)
+        return datos
+
+    def fileno(self) -> int:
+        return self.archivo.fileno()
+
+    def close(self) -> None:
+        self.archivo.close()
+
+
+def rango(cabecera: str, tamano: int) -> Optional[tuple[int, int]]:
+    """
+    (inicio, fin) inclusivos pedidos en el encabezado Range, o None si hay que
+    enviar el archivo completo.
+
+    Sólo se atiende un rango por petición; con varios (o con una sintaxis que no
+    se entiende) se responde el archivo entero, como permite el RFC 9110.
+    """
+    coincidencia = RANGO_BYTES.match(cabecera.replace(' ', ''))
+    if coincidencia is None:
+        return None
+    inicio, fin = coincidencia.groups()
+    if not inicio and not fin:
+        return None
+    if not inicio:
+        # "bytes=-N": los últimos N bytes
+        sufijo = int(fin)
+        if sufijo == 0:
+            raise RangoNoSatisfacible
+        return max(tamano - sufijo, 0), tamano - 1
+    inicio = int(inicio)
+    fin = min(int(fin), tamano - 1) if fin else tamano - 1
+    if inicio >= tamano or fin < inicio:
+        raise RangoNoSatisfacible
+    return inicio, fin
+
+
+def _rango_vigente(request: HttpRequest, etag: str, modificado: int) -> bool:
+    # Con If-Range el rango sólo vale si el archivo es el mismo que el cliente ya tiene
+    condicion = request.headers.get('If-Range')
+    if not condicion:
+        return True
+    if condicion.startswith(('"', 'W/')):
+        return condicion == etag
+    return parse_http_date_safe(condicion) == modificado
+
+
+def entregar(request: HttpRequest, archivo, descarga: str,
+             content_type: str = 'application/pdf') -> HttpResponse:
+    """
+    Respuesta con el archivo de un FileField, ya autorizado por quien llama.
+
+    Con MEDIA_PROTEGIDA_ENTREGA el envío lo hace el servidor web (que también
+    atiende Range); si no, se usa FileResponse con soporte de Range e If-Range
+    para que los visores de PDF pidan sólo las páginas que muestran.
+    """
+    # La ruta la da el almacenamiento del campo: los PDF por contenido están en
+    # MEDIA_PROTEGIDA_ROOT y los anteriores, en MEDIA_ROOT
+    ruta = archivo.path
+    if not os.path.isfile(ruta):
+        raise Http404
+    entrega = settings.MEDIA_PROTEGIDA_ENTREGA
+    raiz = os.path.abspath(settings.MEDIA_PROTEGIDA_ROOT)
+    # La location interna de nginx sólo cubre MEDIA_PROTEGIDA_ROOT
+    if entrega == 'x-sendfile' or (entrega and ruta.startswith(raiz + os.sep)):
+        response = HttpResponse(content_type=content_type)
+        if entrega == 'x-accel-redirect':
+            relativo = os.path.relpath(ruta, raiz).replace(os.sep, '/')
+            response['X-Accel-Redirect'] = settings.MEDIA_PROTEGIDA_PREFIJO + quote(relativo)
+        else:
+            response['X-Sendfile'] = ruta
+        response['Content-Disposition'] = content_disposition_header(False, descarga)
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    estado = os.stat(ruta)
+    tamano = estado.st_size
+    modificado = int(estado.st_mtime)
+    etag = quote_etag(f'{estado.st_mtime_ns:x}-{tamano:x}')
+    no_modificado = get_conditional_response(request, etag=etag, last_modified=modificado)
+    if no_modificado is not None:
+        return no_modificado
+
+    pedido = None
+    cabecera = request.headers.get('Range')
+    if cabecera and request.method == 'GET' and _rango_vigente(request, etag, modificado):
+        try:
+            pedido = rango(cabecera, tamano)
+        except RangoNoSatisfacible:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{tamano}'
+            return response
+
+    archivo = open(ruta, 'rb')
+    if pedido is None:
+        response = FileResponse(archivo, filename=descarga, content_type=content_type)
+    else:
+        inicio, fin = pedido
+        response = FileResponse(_Tramo(archivo, inicio, fin - inicio + 1), status=206,
+                                filename=descarga, content_type=content_type)
+        response['Content-Range'] = f'bytes {inicio}-{fin}/{tamano}'
+        response['Content-Length'] = str(fin - inicio + 1)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modificado)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required
+def material_curso(request: HttpRequest, pk: int) -> HttpResponse:
+    """PDF del curso, sólo para quien lo compró, su instructor y los administradores."""
+    curso = get_object_or_404(Curso.objects.only('id', 'titulo', 'instructor_id', 'archivo_pdf'), pk=pk)
+    usuario = request.user
+    if not (usuario.is_superuser or curso.instructor_id == usuario.pk or tiene_acceso(usuario.pk, curso.pk)):
+        messages.error(request, 'No tienes acceso a este curso. Por favor, realiza la compra primero.')
+        return redirect('course_list')
+    if not curso.archivo_pdf:
+        raise Http404
+    # El nombre en disco es el hash del contenido: se descarga con el título del curso
+    return entregar(request, curso.archivo_pdf, f'{slugify(curso.titulo) or "material"}.pdf')
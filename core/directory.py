@@ -0,0 +1,85 @@
+from typing import Optional
+
+from django.db.models import Count, Q, QuerySet
+from django.db.models.functions import Lower
+
+from .models import Usuario, normalizar_busqueda
+from .pagination import keyset_page
+
+DIRECTORIO_TAMANO_PAGINA = 50
+
+# Pestañas del directorio: (clave, etiqueta, filtro)
+ROLES_DIRECTORIO = [
+    ('todos', 'Todos', Q()),
+    ('estudiantes', 'Estudiantes', Q(es_estudiante=True)),
+    ('instructores', 'Instructores', Q(es_instructor=True)),
+    ('administradores', 'Administradores', Q(is_superuser=True)),
+]
+
+# Columnas que muestra la tabla del directorio
+CAMPOS_DIRECTORIO = (
+    'id',
+    'username',
+    'email',
+    'nombre_completo',
+    'titulo_especialidad',
+    'es_estudiante',
+    'es_instructor',
+    'is_superuser',
+    'date_joined',
+)
+
+# Columnas comparadas en la búsqueda y cómo se normaliza el texto para cada una.
+# El nombre usa la columna nombre_busqueda (sin acentos); username y email, LOWER().
+CAMPOS_BUSQUEDA = {
+    'username_lower': str.lower,
+    'email_lower': str.lower,
+    'nombre_busqueda': normalizar_busqueda,
+}
+
+
+def contar_roles() -> dict:
+    """Total de usuarios de cada pestaña con una sola consulta."""
+    return Usuario.objects.aggregate(**{
+        clave: Count('id', filter=filtro) if filtro else Count('id')
+        for clave, _etiqueta, filtro in ROLES_DIRECTORIO
+    })
+
+
+def filtro_prefijo(texto: str, campos: dict = CAMPOS_BUSQUEDA) -> Q:
+    """
+    Filas en las que alguna de las columnas de `campos` empieza por `texto`,
+    normalizado como indica cada una (sin distinguir mayúsculas y, en el nombre,
+    tampoco acentos).
+
+    Se compara como rango (>= prefijo y < prefijo siguiente); a diferencia de
+    LIKE, un rango sí aprovecha los índices de esas columnas en SQLite y en
+    PostgreSQL.
+    """
+    filtro = Q()
+    for columna, normalizar in campos.items():
+        prefijo = normalizar(texto)
+        if not prefijo:
+            continue
+        siguiente = prefijo[:-1] + chr(ord(prefijo[-1]) + 1)
+        filtro |= Q(**{f'{columna}__gte': prefijo, f'{columna}__lt': siguiente})
+    return filtro
+
+
+def usuarios_filtrados(rol: str, texto: str) -> QuerySet:
+    """Usuarios de la pestaña `rol` que coinciden con la búsqueda por prefijo."""
+    filtros = {clave: filtro for clave, _etiqueta, filtro in ROLES_DIRECTORIO}
+    queryset = Usuario.objects.filter(filtros.get(rol, Q()))
+    texto = texto.strip()
+    if texto:
+        queryset = queryset.annotate(
+            username_lower=Lower('username'), email_lower=Lower('email'),
+        ).filter(filtro_prefijo(texto))
+    return queryset
+
+
+def pagina_usuarios(rol: str, texto: str, cursor: Optional[str],
+                    tamano: int = DIRECTORIO_TAMANO_PAGINA) -> tuple[list, Optional[str]]:
+    """Una página de la pestaña `rol`, de los más recientes a los más antiguos."""
+    queryset = usuarios_filtrados(rol, texto).only(*CAMPOS_DIRECTORIO)
+    return keyset_page(queryset, 'date_joined', cursor, tamano)
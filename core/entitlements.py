@@ -0,0 +1,37 @@
+from django.core.cache import cache
+
+from .cache_versions import bump_version, versioned_key
+from .models import Compra
+
+NAMESPACE = 'entitlements'
+TTL = 60 * 60
+
+
+def cursos_del_usuario(usuario_id: int) -> frozenset[int]:
+    """
+    IDs de los cursos con compra validada del usuario.
+
+    El conjunto se guarda en caché por usuario y se invalida por versión cada vez
+    que una de sus compras se crea, cambia o se elimina.
+    """
+    key = versioned_key(NAMESPACE, usuario_id)
+    cursos = cache.get(key)
+    if cursos is None:
+        cursos = frozenset(
+            Compra.objects.filter(
+                estudiante_id=usuario_id,
+                estado_pago='validado'
+            ).values_list('curso_id', flat=True)
+        )
+        cache.set(key, cursos, TTL)
+    return cursos
+
+
+def tiene_acceso(usuario_id: int, curso_id: int) -> bool:
+    """Indica si el usuario compró el curso y el pago fue validado."""
+    return curso_id in cursos_del_usuario(usuario_id)
+
+
+def invalidar(usuario_id: int) -> None:
+    """Descarta el conjunto cacheado del usuario."""
+    bump_version(NAMESPACE, usuario_id)
@@ -0,0 +1,140 @@
+import csv
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.db.models import QuerySet
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.utils import timezone
+
+from . import ledger, roster
+from .directory import ROLES_DIRECTORIO, usuarios_filtrados
+from .models import Certificado, Compra, Curso
+
+# Filas que el cursor de la base de datos trae por cada viaje
+FILAS_POR_LOTE = 2000
+
+# Caracteres con los que una celda se interpreta como fórmula en Excel
+INICIO_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+class _Eco:
+    """Buffer mínimo para csv.writer: devuelve la línea en lugar de guardarla."""
+
+    def write(self, valor: str) -> str:
+        return valor
+
+
+def _celda(valor) -> object:
+    if valor is None:
+        return ''
+    if isinstance(valor, datetime):
+        return timezone.localtime(valor).strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(valor, str) and valor.startswith(INICIO_FORMULA):
+        return f"'{valor}"
+    return valor
+
+
+def _filas_csv(encabezados: list[str], filas: Iterable[tuple]) -> Iterator[str]:
+    escritor = csv.writer(_Eco())
+    # BOM para que Excel detecte UTF-8 (nombres con tildes)
+    yield '\ufeff' + escritor.writerow(encabezados)
+    for fila in filas:
+        yield escritor.writerow([_celda(valor) for valor in fila])
+
+
+def respuesta_csv(nombre: str, encabezados: list[str], queryset: QuerySet) -> StreamingHttpResponse:
+    """
+    Exporta un queryset de values_list() como CSV sin cargarlo en memoria.
+
+    Las filas se leen de a FILAS_POR_LOTE con iterator() y cada una se envía
+    apenas se escribe, así que el primer byte llega enseguida y el consumo de
+    memoria no depende del tamaño de la exportación.
+    """
+    filas = queryset.iterator(chunk_size=FILAS_POR_LOTE)
+    response = StreamingHttpResponse(_filas_csv(encabezados, filas), content_type='text/csv; charset=utf-8')
+    fecha = timezone.localdate().isoformat()
+    response['Content-Disposition'] = f'attachment; filename="{nombre}_{fecha}.csv"'
+    return response
+
+
+@login_required
+def export_purchases(request: HttpRequest) -> HttpResponse:
+    """Exporta las compras (con los filtros del libro de compras) como CSV."""
+    if not request.user.is_superuser:
+        messages.error(request, 'No tienes permisos para exportar compras.')
+        return redirect('home')
+
+    compras = ledger.aplicar_filtros(
+        Compra.objects.order_by('-fecha_compra', '-id'),
+        ledger.leer_filtros(request.GET)
+    ).values_list(
+        'id', 'fecha_compra', 'estado_pago', 'monto_pagado',
+        'estudiante_id', 'estudiante__nombre_completo', 'estudiante__email',
+        'curso_id', 'curso__titulo',
+    )
+    encabezados = [
+        'id', 'fecha_compra', 'estado_pago', 'monto_pagado',
+        'estudiante_id', 'estudiante', 'email',
+        'curso_id', 'curso',
+    ]
+    return respuesta_csv('compras', encabezados, compras)
+
+
+@login_required
+def export_users(request: HttpRequest) -> HttpResponse:
+    """Exporta los usuarios (de la pestaña y búsqueda del directorio) como CSV."""
+    if not request.user.is_superuser:
+        messages.error(request, 'No tienes permisos para exportar usuarios.')
+        return redirect('home')
+
+    claves = [clave for clave, *_ in ROLES_DIRECTORIO]
+    rol = request.GET.get('rol') if request.GET.get('rol') in claves else 'todos'
+    usuarios = usuarios_filtrados(rol, request.GET.get('q', '')).order_by('-date_joined', '-id').values_list(
+        'id', 'username', 'email', 'nombre_completo', 'es_estudiante', 'es_instructor',
+        'is_superuser', 'titulo_especialidad', 'is_active', 'date_joined', 'last_login',
+    )
+    encabezados = [
+        'id', 'username', 'email', 'nombre_completo', 'es_estudiante', 'es_instructor',
+        'es_administrador', 'titulo_especialidad', 'activo', 'fecha_registro', 'ultimo_acceso',
+    ]
+    return respuesta_csv('usuarios', encabezados, usuarios)
+
+
+@login_required
+def export_certificates(request: HttpRequest) -> HttpResponse:
+    """Exporta los certificados emitidos como CSV."""
+    if not request.user.is_superuser:
+        messages.error(request, 'No tienes permisos para exportar certificados.')
+        return redirect('home')
+
+    certificados = Certificado.objects.order_by('-fecha_emision', '-id').values_list(
+        'id', 'codigo_unico_pdf', 'fecha_emision',
+        'estudiante_id', 'estudiante__nombre_completo', 'estudiante__email',
+        'curso_id', 'curso__titulo',
+    )
+    encabezados = [
+        'id', 'codigo', 'fecha_emision',
+        'estudiante_id', 'estudiante', 'email',
+        'curso_id', 'curso',
+    ]
+    return respuesta_csv('certificados', encabezados, certificados)
+
+
+@login_required
+def export_roster(request: HttpRequest, pk: int) -> HttpResponse:
+    """Exporta los estudiantes inscritos en un curso del instructor como CSV."""
+    if not request.user.es_instructor:
+        messages.error(request, 'No tienes permisos para exportar estudiantes.')
+        return redirect('home')
+
+    curso = get_object_or_404(Curso, pk=pk, instructor=request.user)
+    inscritos = roster.inscripciones(curso.pk, request.GET.get('q', '')).order_by(
+        '-fecha_compra', '-id'
+    ).values_list(
+        'estudiante_id', 'estudiante__nombre_completo', 'estudiante__email', 'fecha_compra', 'monto_pagado',
+    )
+    encabezados = ['estudiante_id', 'estudiante', 'email', 'fecha_inscripcion', 'monto_pagado']
+    return respuesta_csv(f'estudiantes_curso_{curso.pk}', encabezados, inscritos)
@@ -3,6 +3,8 @@ from django.contrib.auth.forms import UserCreationForm
 from django.utils.translation import gettext_lazy as _
 from .models import Usuario, Curso
 from .translations import FORM_LABELS, ERROR_MESSAGES
+from .provisioning import DOMINIO_INSTITUCIONAL, asignar_usernames, username_base
+from . import storage, uploads
 
 class AdminUserCreationForm(UserCreationForm):
     TIPOS_USUARIO = [
@@ -80,22 +82,11 @@ class InstructorCreationForm(UserCreationForm):
 
     def save(self, commit=True):
         user = super().save(commit=False)
-        # Generar username institucional basado en el nombre
-        nombres = self.cleaned_data['nombre_completo'].split()
-        if len(nombres) > 1:
-            username = f"{nombres[0].lower()}.{nombres[-1].lower()}"
-        else:
-            username = nombres[0].lower()
-        
-        # Asegurarse de que el username sea único
-        base_username = username
-        counter = 1
-        while Usuario.objects.filter(username=username).exists():
-            username = f"{base_username}{counter}"
-            counter += 1
+        # Generar username institucional único basado en el nombre
+        username = asignar_usernames([username_base(self.cleaned_data['nombre_completo'])])[0]
         
         user.username = username
-        user.email = f"{username}@conectasaber.edu"
+        user.email = f"{username}@{DOMINIO_INSTITUCIONAL}"
         user.es_instructor = True
         user.titulo_especialidad = self.cleaned_data['titulo_especialidad']
         
@@ -104,6 +95,8 @@ class InstructorCreationForm(UserCreationForm):
         return user
 
 class CourseForm(forms.ModelForm):
+    # Id de la subida por trozos del PDF; reemplaza a archivo_pdf cuando viene
+    subida_pdf = forms.UUIDField(required=False, widget=forms.HiddenInput)
     
     class Meta:
         model = Curso
@@ -132,14 +125,45 @@ class CourseForm(forms.ModelForm):
             'archivo_pdf': 'Puedes subir un archivo PDF con material complementario (opcional)'
         }
     
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, usuario=None, **kwargs):
         super().__init__(*args, **kwargs)
+        self.usuario = usuario
+        self.subida = None
         # Configurar el queryset y el formato de visualización del instructor
         self.fields['instructor'].queryset = Usuario.objects.filter(es_instructor=True)
         self.fields['instructor'].empty_label = "Selecciona un instructor"
         # Personalizar el widget para mostrar mejor información
         self.fields['instructor'].widget.attrs.update({'class': 'form-control'})
 
+    def clean_archivo_pdf(self):
+        archivo = self.cleaned_data.get('archivo_pdf')
+        if archivo:
+            try:
+                uploads.validar_archivo(archivo, 'curso')
+            except uploads.SubidaInvalida as e:
+                raise forms.ValidationError(str(e))
+        return archivo
+
+    def clean(self):
+        cleaned_data = super().clean()
+        subida_id = cleaned_data.get('subida_pdf')
+        if subida_id:
+            try:
+                self.subida = uploads.completa(subida_id, self.usuario, 'curso')
+            except uploads.SubidaInvalida as e:
+                self.add_error('archivo_pdf', str(e))
+        return cleaned_data
+
+    def save(self, commit=True):
+        if self.subida is not None:
+            # El archivo ya está en MEDIA_ROOT: sólo se asocia. La subida se consume
+            # aunque commit sea False, para que la limpieza de vencidas no lo borre;
+            # asignar() suma la referencia del curso antes de que se suelte la suya
+            storage.asignar(self.instance.archivo_pdf, self.subida.archivo)
+            uploads.consumir(self.subida)
+            self.subida = None
+        return super().save(commit=commit)
+
 class EstudianteRegistrationForm(UserCreationForm):
     email = forms.EmailField(
         label=FORM_LABELS['email'],
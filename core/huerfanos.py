@@ -0,0 +1,181 @@
+import os
+import time
+from datetime import timedelta
+from itertools import chain, islice
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .models import ArchivoAlmacenado, Certificado, Curso, PlantillaCertificado, SubidaArchivo
+from .storage import DIRECTORIO, almacenamiento_pdf
+
+# Campos que guardan nombres de archivos de MEDIA_ROOT y MEDIA_PROTEGIDA_ROOT. Los
+# nombres de DIRECTORIO se resuelven con el índice de ArchivoAlmacenado.nombre: cada
+# registro que usa uno de ellos le suma una referencia
+CAMPOS = (
+    (Curso, 'archivo_pdf'),
+    (PlantillaCertificado, 'archivo'),
+    (Certificado, 'archivo'),
+    (SubidaArchivo, 'archivo'),
+)
+
+# Nombres consultados por vez (SQLite admite hasta 999 parámetros por consulta)
+TAMANO_LOTE = 500
+
+# Un archivo más nuevo puede ser de una transacción que todavía no se confirmó
+ANTIGUEDAD_MINIMA = timedelta(hours=1)
+
+
+def recorrer(raiz, excluir: Iterable[str] = ()) -> Iterator[tuple[str, os.DirEntry]]:
+    """
+    Archivos bajo `raiz` como (nombre relativo con '/', entrada), sin seguir enlaces.
+
+    Sólo se guardan los directorios pendientes de leer, nunca la lista de
+    archivos: cada uno se entrega a medida que os.scandir lo encuentra.
+    """
+    excluir = {os.path.abspath(ruta) for ruta in excluir}
+    pendientes = ['']
+    while pendientes:
+        relativo = pendientes.pop()
+        try:
+            with os.scandir(os.path.join(raiz, relativo)) as entradas:
+                for entrada in entradas:
+                    nombre = f'{relativo}/{entrada.name}' if relativo else entrada.name
+                    if entrada.is_dir(follow_symlinks=False):
+                        if os.path.abspath(entrada.path) not in excluir:
+                            pendientes.append(nombre)
+                    elif entrada.is_file(follow_symlinks=False):
+                        yield nombre, entrada
+        except FileNotFoundError:
+            # El directorio se borró durante el recorrido
+            continue
+
+
+def _almacenado(nombre: str) -> bool:
+    return nombre.startswith(f'{DIRECTORIO}/')
+
+
+def legados() -> set[str]:
+    """
+    Nombres fuera de DIRECTORIO que usa algún registro: los guardados antes de
+    AlmacenamientoDeduplicado.
+
+    Ninguna de estas columnas tiene índice, así que se leen una sola vez. El
+    conjunto no crece: los archivos nuevos siempre se guardan en DIRECTORIO.
+    """
+    usados = set()
+    for modelo, campo in CAMPOS:
+        filas = modelo.objects.exclude(**{f'{campo}__startswith': f'{DIRECTORIO}/'}).values_list(campo, flat=True)
+        usados.update(nombre for nombre in filas.iterator() if nombre)
+    return usados
+
+
+def referenciados(nombres: list[str], usados_legados: Optional[set[str]] = None) -> set[str]:
+    """
+    Los nombres de la lista que usa algún registro de la base de datos.
+
+    Los de DIRECTORIO se buscan en ArchivoAlmacenado; los demás, en
+    `usados_legados` (el resultado de legados()) o, si no se pasa, en cada campo.
+    """
+    almacenados = [nombre for nombre in nombres if _almacenado(nombre)]
+    otros = [nombre for nombre in nombres if not _almacenado(nombre)]
+    usados = set()
+    if almacenados:
+        usados.update(ArchivoAlmacenado.objects.filter(nombre__in=almacenados).values_list('nombre', flat=True))
+    if usados_legados is not None:
+        usados.update(nombre for nombre in otros if nombre in usados_legados)
+    elif otros:
+        for modelo, campo in CAMPOS:
+            usados.update(modelo.objects.filter(**{f'{campo}__in': otros}).values_list(campo, flat=True))
+    return usados
+
+
+def _archivos() -> Iterator[tuple[str, os.DirEntry]]:
+    """
+    Archivos de MEDIA_PROTEGIDA_ROOT/DIRECTORIO y de MEDIA_ROOT, con el nombre
+    que les da almacenamiento_pdf() (que decide la raíz según el nombre).
+    """
+    # Por si se configuraron dentro de otra raíz: no tienen registros pero no son huérfanos
+    excluir = (settings.COMPROBANTES_ROOT, settings.SUBIDAS_ROOT, settings.MEDIA_PROTEGIDA_ROOT,
+               # Los nombres de DIRECTORIO apuntan a MEDIA_PROTEGIDA_ROOT, no a esta copia
+               os.path.join(settings.MEDIA_ROOT, DIRECTORIO))
+    protegidos = (
+        (f'{DIRECTORIO}/{nombre}', entrada)
+        for nombre, entrada in recorrer(os.path.join(settings.MEDIA_PROTEGIDA_ROOT, DIRECTORIO), excluir)
+    )
+    return chain(protegidos, recorrer(settings.MEDIA_ROOT, excluir))
+
+
+def buscar(raiz=None, antiguedad: timedelta = ANTIGUEDAD_MINIMA, lote: int = TAMANO_LOTE,
+           usados_legados: Optional[set[str]] = None) -> Iterator[tuple[str, int]]:
+    """
+    Archivos de las raíces de media (o de `raiz`) que ningún registro usa, como
+    (nombre, tamaño).
+
+    Los nombres se leen del disco de a `lote` y los de DIRECTORIO se consultan
+    juntos en ArchivoAlmacenado; los demás se comparan con legados(), que se lee
+    una vez. La memoria depende de cuántos nombres legados haya en uso, no de
+    cuántos archivos ni cuántas filas.
+    """
+    if usados_legados is None:
+        usados_legados = legados()
+    archivos = recorrer(raiz) if raiz else _archivos()
+    limite = time.time() - antiguedad.total_seconds()
+    while True:
+        leidos = list(islice(archivos, lote))
+        if not leidos:
+            return
+        candidatos = {}
+        for nombre, entrada in leidos:
+            try:
+                estado = entrada.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            if estado.st_mtime < limite:
+                candidatos[nombre] = estado.st_size
+        usados = referenciados(list(candidatos), usados_legados) if candidatos else set()
+        for nombre, tamano in candidatos.items():
+            if nombre not in usados:
+                yield nombre, tamano
+
+
+def borrar(nombre: str, raiz=None, usados_legados: Optional[set[str]] = None) -> bool:
+    """
+    Borra un archivo huérfano si sigue sin usarse y devuelve si lo borró.
+
+    La consulta se repite dentro de una transacción que primero escribe en
+    ArchivoAlmacenado: así espera a un AlmacenamientoDeduplicado._save en curso
+    que podría estar reutilizando este mismo archivo. Para los nombres fuera de
+    DIRECTORIO alcanza con `usados_legados` aunque sea de antes, porque ningún
+    registro nuevo puede pasar a usarlos.
+    """
+    ruta = os.path.join(raiz, nombre) if raiz else almacenamiento_pdf().path(nombre)
+    with transaction.atomic():
+        ArchivoAlmacenado.objects.filter(nombre=nombre).update(referencias=F('referencias'))
+        if referenciados([nombre], usados_legados):
+            return False
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            return False
+    return True
+
+
+def reclamar(por_segundo: float, limite: Optional[int] = None, **opciones) -> Iterator[tuple[str, int, bool]]:
+    """
+    Borra los huérfanos que encuentra buscar(), a lo sumo `por_segundo` por
+    segundo para no saturar el disco, y entrega (nombre, tamaño, borrado).
+    """
+    intervalo = 1 / por_segundo
+    siguiente = time.monotonic()
+    usados_legados = legados()
+    for indice, (nombre, tamano) in enumerate(buscar(usados_legados=usados_legados, **opciones)):
+        if limite is not None and indice >= limite:
+            return
+        espera = siguiente - time.monotonic()
+        if espera > 0:
+            time.sleep(espera)
+        siguiente = max(siguiente, time.monotonic()) + intervalo
+        yield nombre, tamano, borrar(nombre, opciones.get('raiz'), usados_legados)
@@ -0,0 +1,55 @@
+from decimal import Decimal
+from typing import Iterable
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .cache_versions import bump_version, versioned_key
+from .models import Compra, Curso, VentaDiaria
+
+NAMESPACE = 'instructor_stats'
+TTL = 60 * 60
+
+
+def resumen(instructor_id: int) -> dict:
+    """
+    Totales del panel del instructor: cantidad de cursos, estudiantes distintos,
+    ingresos e inscripciones validadas por curso ({curso_id: inscritos}).
+
+    Se guarda en caché por instructor y se invalida por versión cuando cambia uno
+    de sus cursos o una compra de ellos.
+    """
+    key = versioned_key(NAMESPACE, instructor_id)
+    datos = cache.get(key)
+    if datos is None:
+        inscripciones = dict(
+            Curso.objects.filter(instructor_id=instructor_id).annotate(
+                inscritos=Count('compras', filter=Q(compras__estado_pago='validado'))
+            ).values_list('id', 'inscritos')
+        )
+        datos = {
+            'cursos': len(inscripciones),
+            'estudiantes': Compra.objects.filter(
+                curso__instructor_id=instructor_id,
+                estado_pago='validado'
+            ).values('estudiante').distinct().count(),
+            'ingresos': VentaDiaria.objects.filter(
+                curso__instructor_id=instructor_id
+            ).aggregate(total=Sum('ingresos'))['total'] or Decimal('0'),
+            'inscripciones': inscripciones,
+        }
+        cache.set(key, datos, TTL)
+    return datos
+
+
+def invalidar(instructor_ids: Iterable[int]) -> None:
+    """Descarta tras el commit los resúmenes cacheados de los instructores."""
+    # Tras el commit, para que otra petición no vuelva a cachear el estado anterior
+    for instructor_id in set(instructor_ids) - {None}:
+        transaction.on_commit(lambda instructor_id=instructor_id: bump_version(NAMESPACE, instructor_id))
+
+
+def invalidar_por_cursos(curso_ids: Iterable[int]) -> None:
+    """Invalida los resúmenes de los instructores de esos cursos."""
+    invalidar(Curso.objects.filter(pk__in=set(curso_ids)).values_list('instructor_id', flat=True))
@@ -0,0 +1,170 @@
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from functools import lru_cache
+from io import BytesIO
+from itertools import islice
+from typing import Iterator, Optional
+
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+try:
+    from pypdf import PdfReader, PdfWriter
+except ImportError:  # pypdf es opcional: sin él no se pueden emitir certificados
+    PdfReader = PdfWriter = None
+
+from .models import Certificado, Compra, Curso, PlantillaCertificado
+from .storage import liberar
+
+DIRECTORIO_EMITIDOS = 'certificados/emitidos'
+
+
+def disponible() -> bool:
+    """Indica si está instalado pypdf, necesario para superponer datos a la plantilla."""
+    return PdfReader is not None
+
+
+def nuevo_codigo() -> str:
+    """Código de verificación impreso en el certificado, p. ej. CS-3F9A-0C2D-71BE-44A0."""
+    hexa = secrets.token_hex(8).upper()
+    return 'CS-' + '-'.join(hexa[i:i + 4] for i in range(0, 16, 4))
+
+
+# ======= Generación del PDF (se ejecuta en los procesos del pool) =======
+@lru_cache(maxsize=8)
+def _pagina_plantilla(ruta: str, version: float):
+    """
+    Primera página de la plantilla, leída una sola vez por proceso.
+
+    `version` (la fecha de modificación del archivo) forma parte de la clave para
+    no reutilizar una plantilla que se reemplazó en disco.
+    """
+    return PdfReader(ruta).pages[0]
+
+
+def _texto_centrado(lienzo, texto: str, y: float, ancho: float, fuente: str, tamano: float) -> None:
+    # Se achica la letra hasta que el texto entra con márgenes de 10% por lado
+    while tamano > 8 and stringWidth(texto, fuente, tamano) > ancho * 0.8:
+        tamano -= 1
+    lienzo.setFont(fuente, tamano)
+    lienzo.drawCentredString(ancho / 2, y, texto)
+
+
+def _superposicion(ancho: float, alto: float, datos: dict) -> bytes:
+    buffer = BytesIO()
+    lienzo = canvas.Canvas(buffer, pagesize=(ancho, alto))
+    _texto_centrado(lienzo, datos['estudiante'], alto * 0.52, ancho, 'Helvetica-Bold', 30)
+    _texto_centrado(lienzo, datos['curso'], alto * 0.42, ancho, 'Helvetica', 18)
+    _texto_centrado(lienzo, f"Fecha de emisión: {datos['fecha']}", alto * 0.34, ancho, 'Helvetica', 12)
+    _texto_centrado(lienzo, f"Código de verificación: {datos['codigo']}", alto * 0.08, ancho, 'Helvetica', 9)
+    lienzo.save()
+    return buffer.getvalue()
+
+
+def renderizar_certificado(ruta_plantilla: str, version: float, datos: dict) -> bytes:
+    """PDF del certificado: la plantilla con nombre, curso, fecha y código encima."""
+    plantilla = _pagina_plantilla(ruta_plantilla, version)
+    ancho, alto = float(plantilla.mediabox.width), float(plantilla.mediabox.height)
+    capa = PdfReader(BytesIO(_superposicion(ancho, alto, datos))).pages[0]
+
+    escritor = PdfWriter()
+    # add_page copia la página, así que la plantilla cacheada no se modifica
+    pagina = escritor.add_page(plantilla)
+    pagina.merge_page(capa)
+    salida = BytesIO()
+    escritor.write(salida)
+    return salida.getvalue()
+
+
+def generar_y_guardar(tarea: tuple) -> str:
+    """Genera un certificado y lo guarda en el almacenamiento; devuelve el nombre del archivo."""
+    ruta_plantilla, version, datos = tarea
+    pdf = renderizar_certificado(ruta_plantilla, version, datos)
+    almacenamiento = Certificado._meta.get_field('archivo').storage
+    return almacenamiento.save(f"{DIRECTORIO_EMITIDOS}/{datos['codigo']}.pdf", ContentFile(pdf))
+
+
+# ======= Emisión =======
+def pendientes(curso: Curso):
+    """Estudiantes con compra validada del curso que todavía no tienen certificado."""
+    return Compra.objects.filter(curso=curso, estado_pago='validado').exclude(
+        Exists(Certificado.objects.filter(curso=curso, estudiante=OuterRef('estudiante')))
+    ).order_by('id').values_list('estudiante_id', 'estudiante__nombre_completo')
+
+
+def emitir_curso(curso: Curso, plantilla: PlantillaCertificado, pool: Optional[ProcessPoolExecutor] = None,
+                 lote: int = 500, fecha: Optional[date] = None) -> Iterator[dict]:
+    """
+    Emite los certificados pendientes de un curso por lotes.
+
+    Los PDF se generan y guardan en el pool (cada proceso lee la plantilla una
+    sola vez) y los registros de cada lote se crean con un solo bulk_create.
+    Después de cada lote entrega {emitidos, por_segundo}.
+    """
+    if not disponible():
+        raise RuntimeError('Para emitir certificados hace falta instalar pypdf.')
+    ruta = plantilla.archivo.path
+    version = plantilla.archivo.storage.get_modified_time(plantilla.archivo.name).timestamp()
+    fecha = fecha or timezone.localdate()
+    # La lista se toma antes de empezar: los certificados creados en cada lote no
+    # deben cambiar lo que falta leer
+    iterador = iter(list(pendientes(curso)))
+    emitidos = 0
+    inicio = time.monotonic()
+
+    while True:
+        bloque = list(islice(iterador, lote))
+        if not bloque:
+            break
+        tareas = [
+            (ruta, version, {
+                'estudiante': nombre,
+                'curso': curso.titulo,
+                'fecha': fecha.strftime('%d/%m/%Y'),
+                'codigo': nuevo_codigo(),
+            })
+            for _estudiante_id, nombre in bloque
+        ]
+        if pool is None or len(tareas) < 2:
+            archivos = list(map(generar_y_guardar, tareas))
+        else:
+            archivos = list(pool.map(generar_y_guardar, tareas, chunksize=16))
+
+        almacenamiento = Certificado._meta.get_field('archivo').storage
+        try:
+            with transaction.atomic():
+                # Otra emisión pudo certificar a alguno de estos estudiantes desde
+                # que se tomó la lista: se saltean en lugar de romper el lote
+                ya_emitidos = set(Certificado.objects.filter(
+                    curso=curso, estudiante_id__in=[estudiante_id for estudiante_id, _nombre in bloque]
+                ).values_list('estudiante_id', flat=True))
+                nuevos = []
+                for (estudiante_id, _nombre), (_ruta, _version, datos), archivo in zip(bloque, tareas, archivos):
+                    if estudiante_id in ya_emitidos:
+                        liberar(archivo)
+                        continue
+                    nuevos.append(Certificado(
+                        estudiante_id=estudiante_id,
+                        curso=curso,
+                        codigo_unico_pdf=datos['codigo'],
+                        archivo=archivo,
+                    ))
+                Certificado.objects.bulk_create(nuevos)
+        except Exception:
+            # Sin registros que los usen, los archivos del lote no deben conservar su referencia
+            for archivo in archivos:
+                almacenamiento.delete(archivo)
+            raise
+        emitidos += len(nuevos)
+
+        transcurrido = time.monotonic() - inicio
+        yield {
+            'emitidos': emitidos,
+            'por_segundo': emitidos / transcurrido if transcurrido else 0,
+        }
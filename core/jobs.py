@@ -0,0 +1,326 @@
+import csv
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import close_old_connections
+from django.db.models import F
+from django.http import QueryDict
+from django.urls import reverse
+from django.utils import timezone
+
+from . import issuance, ledger, provisioning, receipts
+from .models import Compra, Curso, PlantillaCertificado, TrabajoPDF
+from .workers import crear_pool
+
+logger = logging.getLogger(__name__)
+
+# Lo que pide un usuario que está esperando pasa antes que las tareas masivas
+PRIORIDAD_INTERACTIVA = 10
+PRIORIDAD_MASIVA = 0
+
+ACTIVOS = ('pendiente', 'en_proceso')
+
+# Espera antes del primer reintento (segundos); se duplica en cada intento
+ESPERA_REINTENTO = 10
+
+# Un trabajo en proceso sin latidos durante este tiempo se da por abandonado (el
+# worker murió); los trabajos largos renuevan fecha_inicio con latido()
+TIEMPO_MAXIMO = timedelta(minutes=30)
+
+# Errores de una carga de usuarios que se guardan para mostrar
+MAX_ERRORES_CARGA = 50
+
+# Los ZIP de comprobantes se borran al generar otro, pasado este tiempo
+DURACION_ZIP = timedelta(days=1)
+
+# Cada worker busca trabajos abandonados con esta frecuencia, haya o no cola
+INTERVALO_RECUPERACION = timedelta(minutes=1)
+
+# Candidatos leídos por cada intento de reserva
+CANDIDATOS_POR_CONSULTA = 10
+
+
+def encolar(tipo: str, objeto_id: int, parametros: Optional[dict] = None,
+            prioridad: int = PRIORIDAD_INTERACTIVA, usuario=None) -> TrabajoPDF:
+    """
+    Encola un trabajo, o devuelve el que ya está pendiente o en proceso para el
+    mismo objeto (subiéndole la prioridad si hace falta).
+    """
+    activo = TrabajoPDF.objects.filter(tipo=tipo, objeto_id=objeto_id, estado__in=ACTIVOS).order_by('id').first()
+    if activo is not None:
+        if activo.prioridad < prioridad:
+            TrabajoPDF.objects.filter(pk=activo.pk).update(prioridad=prioridad)
+            activo.prioridad = prioridad
+        return activo
+    return TrabajoPDF.objects.create(
+        tipo=tipo,
+        objeto_id=objeto_id,
+        parametros=parametros or {},
+        prioridad=prioridad,
+        solicitado_por=usuario,
+    )
+
+
+def encolar_carga_usuarios(archivo, rol: str, usuario) -> TrabajoPDF:
+    """
+    Guarda el CSV subido y encola su carga. Cada carga es un trabajo aparte y no
+    se reintenta: volver a leer el archivo duplicaría las filas sin email.
+    """
+    ruta = Path(settings.SUBIDAS_ROOT) / f'usuarios-{uuid.uuid4().hex}.csv'
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    with open(ruta, 'wb') as destino:
+        for trozo in archivo.chunks():
+            destino.write(trozo)
+    return TrabajoPDF.objects.create(
+        tipo='usuarios',
+        objeto_id=usuario.pk,
+        parametros={'archivo': str(ruta), 'rol': rol},
+        prioridad=PRIORIDAD_INTERACTIVA,
+        max_intentos=1,
+        solicitado_por=usuario,
+    )
+
+
+def encolar_zip_comprobantes(filtros: dict, usuario) -> TrabajoPDF:
+    """Encola el ZIP con los comprobantes de las compras que cumplen los filtros del libro."""
+    return TrabajoPDF.objects.create(
+        tipo='comprobantes_zip',
+        objeto_id=usuario.pk,
+        parametros={'filtros': ledger.query_filtros(filtros)},
+        prioridad=PRIORIDAD_INTERACTIVA,
+        solicitado_por=usuario,
+    )
+
+
+def ruta_zip(trabajo: TrabajoPDF) -> Path:
+    return receipts.directorio() / 'zip' / f'comprobantes-{trabajo.pk}.zip'
+
+
+def tomar(worker: str) -> Optional[TrabajoPDF]:
+    """
+    Reserva el siguiente trabajo disponible para `worker`, o None si no hay.
+
+    La reserva es un UPDATE condicionado a que el trabajo siga pendiente: si otro
+    proceso lo tomó entre la lectura y la escritura no se actualiza ninguna fila y
+    se prueba con el siguiente. SQLite serializa las escrituras, así que no hace
+    falta SELECT ... FOR UPDATE (que además no tiene).
+    """
+    while True:
+        ahora = timezone.now()
+        candidatos = list(
+            TrabajoPDF.objects.filter(estado='pendiente', disponible_desde__lte=ahora)
+            .order_by('-prioridad', 'id')
+            .values_list('id', flat=True)[:CANDIDATOS_POR_CONSULTA]
+        )
+        if not candidatos:
+            return None
+        for trabajo_id in candidatos:
+            reservado = TrabajoPDF.objects.filter(pk=trabajo_id, estado='pendiente').update(
+                estado='en_proceso',
+                worker=worker,
+                fecha_inicio=ahora,
+                intentos=F('intentos') + 1,
+            )
+            if reservado:
+                return TrabajoPDF.objects.get(pk=trabajo_id)
+
+
+def latido(trabajo: TrabajoPDF) -> None:
+    """Renueva la reserva de un trabajo largo para que no se dé por abandonado."""
+    TrabajoPDF.objects.filter(pk=trabajo.pk, estado='en_proceso', worker=trabajo.worker).update(
+        fecha_inicio=timezone.now()
+    )
+
+
+def recuperar_abandonados() -> int:
+    """Devuelve a la cola los trabajos en proceso de workers que murieron."""
+    limite = timezone.now() - TIEMPO_MAXIMO
+    abandonados = TrabajoPDF.objects.filter(estado='en_proceso', fecha_inicio__lt=limite)
+    fallidos = 0
+    # Los que ya agotaron sus intentos fallan de a uno: sólo se descartan los
+    # archivos de los que siguen abandonados al marcarlos (no recibieron un latido)
+    for trabajo in abandonados.filter(intentos__gte=F('max_intentos')).only('tipo', 'parametros'):
+        if abandonados.filter(pk=trabajo.pk).update(
+            estado='fallido', error='El worker no terminó el trabajo.', fecha_fin=timezone.now()
+        ):
+            _descartar_archivos(trabajo)
+            fallidos += 1
+    return fallidos + abandonados.filter(intentos__lt=F('max_intentos')).update(estado='pendiente', worker='')
+
+
+def _descartar_archivos(trabajo: TrabajoPDF) -> None:
+    """Borra lo que el trabajo guardó para procesarse cuando ya no se va a procesar."""
+    if trabajo.tipo == 'usuarios':
+        Path(trabajo.parametros['archivo']).unlink(missing_ok=True)
+
+
+# ======= Tipos de trabajo =======
+# Cada manejador recibe el trabajo y cuántos procesos puede usar para repartirlo
+# (None: uno por CPU; ver workers.crear_pool)
+def _comprobante(trabajo: TrabajoPDF, procesos: Optional[int]) -> str:
+    compra = Compra.objects.select_related('estudiante', 'curso').get(pk=trabajo.objeto_id)
+    ruta, _ = receipts.obtener(compra)
+    return str(ruta)
+
+
+def _emision(trabajo: TrabajoPDF, procesos: Optional[int]) -> str:
+    if not issuance.disponible():
+        raise RuntimeError('Para emitir certificados hace falta instalar pypdf.')
+    curso = Curso.objects.get(pk=trabajo.objeto_id)
+    plantilla = PlantillaCertificado.objects.get(pk=trabajo.parametros['plantilla'])
+    # Los PDF de cada lote se generan en el pool; el worker sólo crea los registros
+    emitidos = 0
+    pool = crear_pool(procesos)
+    try:
+        for resumen in issuance.emitir_curso(curso, plantilla, pool):
+            emitidos = resumen['emitidos']
+            latido(trabajo)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return f'{emitidos} certificados emitidos para "{curso.titulo}"'
+
+
+def _usuarios(trabajo: TrabajoPDF, procesos: Optional[int]) -> str:
+    ruta = Path(trabajo.parametros['archivo'])
+    parametros = dict(trabajo.parametros)
+    errores = []
+    try:
+        with open(ruta, encoding='utf-8-sig', newline='') as f:
+            # El hash de las contraseñas se reparte en su propio pool de procesos
+            for resumen in provisioning.provisionar(csv.DictReader(f), parametros['rol'], procesos=procesos):
+                errores.extend(resumen['errores'][:MAX_ERRORES_CARGA - len(errores)])
+                parametros['resumen'] = {clave: resumen[clave] for clave in ('leidos', 'creados', 'omitidos')}
+                parametros['errores'] = errores
+                # El avance queda en resultado para la página de espera; también sirve de latido
+                TrabajoPDF.objects.filter(pk=trabajo.pk).update(
+                    parametros=parametros,
+                    resultado=f"{resumen['leidos']} filas leídas, {resumen['creados']} usuarios creados",
+                    fecha_inicio=timezone.now(),
+                )
+    except (UnicodeDecodeError, csv.Error):
+        raise ValueError('El archivo no es un CSV válido en UTF-8.')
+    finally:
+        ruta.unlink(missing_ok=True)
+    if 'resumen' not in parametros:
+        return 'El archivo no tiene filas.'
+    return f"{parametros['resumen']['creados']} usuarios creados de {parametros['resumen']['leidos']} filas"
+
+
+def _comprobantes_zip(trabajo: TrabajoPDF, procesos: Optional[int]) -> str:
+    destino = ruta_zip(trabajo)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    vencido = time.time() - DURACION_ZIP.total_seconds()
+    for anterior in destino.parent.glob('comprobantes-*.zip'):
+        if anterior.stat().st_mtime < vencido:
+            anterior.unlink(missing_ok=True)
+
+    filtros = ledger.leer_filtros(QueryDict(trabajo.parametros['filtros']))
+    compras = ledger.aplicar_filtros(Compra.objects.order_by('fecha_compra', 'id'), filtros)
+    total = compras.count()
+
+    def informar(avance):
+        # El avance queda en resultado para la página de espera; también sirve de latido
+        TrabajoPDF.objects.filter(pk=trabajo.pk).update(
+            resultado=f"{avance['procesados']} de {total} comprobantes", fecha_inicio=timezone.now()
+        )
+
+    temporal = destino.with_name(f'{destino.name}.tmp')
+    pool = crear_pool(procesos)
+    try:
+        with open(temporal, 'wb') as f:
+            for trozo in receipts.comprobantes_zip(compras, pool, progreso=informar):
+                f.write(trozo)
+        os.replace(temporal, destino)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        temporal.unlink(missing_ok=True)
+    return f'{total} comprobantes'
+
+
+MANEJADORES: dict[str, Callable[[TrabajoPDF, Optional[int]], str]] = {
+    'comprobante': _comprobante,
+    'emision': _emision,
+    'usuarios': _usuarios,
+    'comprobantes_zip': _comprobantes_zip,
+}
+
+
+def destino(trabajo: TrabajoPDF) -> str:
+    """URL a la que se envía al usuario cuando el trabajo termina."""
+    if trabajo.tipo == 'comprobante':
+        return reverse('download_receipt', args=[trabajo.objeto_id])
+    if trabajo.tipo == 'usuarios':
+        return f"{reverse('import_users')}?trabajo={trabajo.pk}"
+    if trabajo.tipo == 'comprobantes_zip':
+        return reverse('descargar_zip_comprobantes', args=[trabajo.pk])
+    return reverse('admin_certificates')
+
+
+def _fallar(trabajo: TrabajoPDF, error: str, reintentar: bool) -> None:
+    ahora = timezone.now()
+    if reintentar and trabajo.intentos < trabajo.max_intentos:
+        espera = ESPERA_REINTENTO * 2 ** (trabajo.intentos - 1)
+        TrabajoPDF.objects.filter(pk=trabajo.pk).update(
+            estado='pendiente', worker='', error=error,
+            disponible_desde=ahora + timedelta(seconds=espera),
+        )
+    else:
+        TrabajoPDF.objects.filter(pk=trabajo.pk).update(estado='fallido', error=error, fecha_fin=ahora)
+        _descartar_archivos(trabajo)
+
+
+def procesar(trabajo: TrabajoPDF, procesos: Optional[int] = None) -> None:
+    """Ejecuta un trabajo reservado y registra el resultado, o lo reprograma si falló."""
+    try:
+        resultado = MANEJADORES[trabajo.tipo](trabajo, procesos)
+    except (ObjectDoesNotExist, KeyError) as e:
+        # La compra, el curso o la plantilla ya no existen: reintentar no sirve
+        _fallar(trabajo, f'{type(e).__name__}: {e}', reintentar=False)
+    except Exception as e:
+        logger.exception('Falló el trabajo PDF %s (intento %s)', trabajo.pk, trabajo.intentos)
+        _fallar(trabajo, f'{type(e).__name__}: {e}', reintentar=True)
+    else:
+        TrabajoPDF.objects.filter(pk=trabajo.pk).update(
+            estado='terminado', resultado=resultado[:255], error='', fecha_fin=timezone.now()
+        )
+
+
+def atender(worker: str, espera: float = 1.0, hasta_vaciar: bool = False,
+            detener: Optional[threading.Event] = None, procesos: Optional[int] = None) -> int:
+    """
+    Procesa trabajos hasta que se pida detener (o hasta vaciar la cola) y
+    devuelve cuántos procesó.
+
+    `detener` se revisa entre trabajos: el trabajo en curso siempre termina.
+    `procesos` es el tamaño del pool que puede abrir cada trabajo.
+    """
+    detener = detener or threading.Event()
+    procesados = 0
+    proxima_recuperacion = time.monotonic()
+    while not detener.is_set():
+        close_old_connections()
+        # Con la cola siempre ocupada también hay que devolver los abandonados
+        if time.monotonic() >= proxima_recuperacion:
+            recuperar_abandonados()
+            proxima_recuperacion = time.monotonic() + INTERVALO_RECUPERACION.total_seconds()
+        trabajo = tomar(worker)
+        if trabajo is None:
+            if hasta_vaciar:
+                break
+            detener.wait(espera)
+            continue
+        inicio = time.monotonic()
+        procesar(trabajo, procesos)
+        procesados += 1
+        logger.info('Trabajo PDF %s (%s) procesado en %.2f s', trabajo.pk, trabajo.tipo, time.monotonic() - inicio)
+    return procesados
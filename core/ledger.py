@@ -0,0 +1,88 @@
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+from urllib.parse import urlencode
+
+from django.db.models import QuerySet
+from django.http import QueryDict
+from django.utils import timezone
+
+from .models import Compra
+from .pagination import keyset_page
+
+LIBRO_TAMANO_PAGINA = 50
+
+# Rango máximo de fechas de un ZIP de comprobantes, y hasta cuántas compras se
+# genera mientras se descarga (más que eso va a la cola de trabajos)
+MAXIMO_DIAS_ZIP = 366
+MAXIMO_ZIP_DIRECTO = 200
+
+ESTADOS_PAGO = dict(Compra.ESTADO_CHOICES)
+
+# Sólo las columnas que muestra la tabla de core/admin/purchases.html
+CAMPOS_LIBRO = (
+    'id',
+    'fecha_compra',
+    'monto_pagado',
+    'estado_pago',
+    'estudiante__nombre_completo',
+    'estudiante__email',
+    'curso__titulo',
+)
+
+
+def _leer_fecha(valor: Optional[str]) -> Optional[date]:
+    try:
+        return date.fromisoformat(valor) if valor else None
+    except ValueError:
+        return None
+
+
+def _inicio_del_dia(dia: date) -> datetime:
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def leer_filtros(params: QueryDict) -> dict:
+    """Extrae de la URL los filtros válidos del libro de compras."""
+    filtros = {}
+    for clave in ('desde', 'hasta'):
+        dia = _leer_fecha(params.get(clave))
+        if dia is not None:
+            filtros[clave] = dia
+    if params.get('curso', '').isdigit():
+        filtros['curso'] = int(params['curso'])
+    if params.get('estado') in ESTADOS_PAGO:
+        filtros['estado'] = params['estado']
+    return filtros
+
+
+def aplicar_filtros(queryset: QuerySet, filtros: dict) -> QuerySet:
+    # Los días se interpretan en la zona horaria del sitio; "hasta" es inclusivo
+    if 'desde' in filtros:
+        queryset = queryset.filter(fecha_compra__gte=_inicio_del_dia(filtros['desde']))
+    if 'hasta' in filtros:
+        queryset = queryset.filter(fecha_compra__lt=_inicio_del_dia(filtros['hasta'] + timedelta(days=1)))
+    if 'curso' in filtros:
+        queryset = queryset.filter(curso_id=filtros['curso'])
+    if 'estado' in filtros:
+        queryset = queryset.filter(estado_pago=filtros['estado'])
+    return queryset
+
+
+def compras_filtradas(filtros: dict) -> QuerySet:
+    """Compras que cumplen los filtros, con estudiante y curso en el mismo JOIN."""
+    queryset = aplicar_filtros(Compra.objects.all(), filtros)
+    return queryset.select_related('estudiante', 'curso').only(*CAMPOS_LIBRO)
+
+
+def pagina_compras(filtros: dict, cursor: Optional[str],
+                   tamano: int = LIBRO_TAMANO_PAGINA) -> tuple[list, Optional[str]]:
+    """Una página del libro de compras, de la más reciente a la más antigua."""
+    return keyset_page(compras_filtradas(filtros), 'fecha_compra', cursor, tamano)
+
+
+def query_filtros(filtros: dict) -> str:
+    """Query string con los filtros indicados."""
+    return urlencode({
+        clave: valor.isoformat() if isinstance(valor, date) else valor
+        for clave, valor in filtros.items()
+    })
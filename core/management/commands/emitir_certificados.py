@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import issuance
+from core.models import Curso, PlantillaCertificado
+from core.workers import crear_pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Emite los certificados de un curso para todos los estudiantes con compra "
+        "validada que aún no lo tienen, superponiendo nombre, curso, fecha y código "
+        "a una plantilla PDF. Los PDF se generan en paralelo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('curso', type=int, help='ID del curso')
+        parser.add_argument('--plantilla', type=int, required=True, help='ID de la plantilla de certificado')
+        parser.add_argument('--lote', type=int, default=500, help='Certificados por lote (500)')
+        parser.add_argument('--procesos', type=int, default=None,
+                            help='Procesos para generar los PDF (por defecto, uno por CPU)')
+
+    def handle(self, *args, **options):
+        if not issuance.disponible():
+            raise CommandError('Para emitir certificados hace falta instalar pypdf (pip install pypdf).')
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+        try:
+            curso = Curso.objects.get(pk=options['curso'])
+            plantilla = PlantillaCertificado.objects.get(pk=options['plantilla'])
+        except (Curso.DoesNotExist, PlantillaCertificado.DoesNotExist) as e:
+            raise CommandError(str(e))
+
+        resumen = None
+        pool = crear_pool(options['procesos'])
+        try:
+            for resumen in issuance.emitir_curso(curso, plantilla, pool, options['lote']):
+                self.stdout.write(
+                    f"{resumen['emitidos']} certificados emitidos ({resumen['por_segundo']:.1f} certificados/s)"
+                )
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        if resumen is None:
+            self.stdout.write(f'Todos los estudiantes de "{curso.titulo}" ya tienen su certificado.')
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Emisión terminada: {resumen["emitidos"]} certificados para "{curso.titulo}"'
+        ))
@@ -0,0 +1,67 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import ledger, receipts
+from core.models import Compra
+from core.workers import crear_pool
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera un ZIP con los comprobantes de las compras de un rango de fechas "
+        "(por defecto, sólo las validadas). Los comprobantes que faltan se generan en "
+        "paralelo y quedan guardados para las descargas individuales."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help='Fecha inicial, AAAA-MM-DD (incluida)')
+        parser.add_argument('--hasta', help='Fecha final, AAAA-MM-DD (incluida)')
+        parser.add_argument('--curso', type=int, help='Sólo las compras de este curso')
+        parser.add_argument('--estado', choices=list(ledger.ESTADOS_PAGO), default='validado',
+                            help='Estado de pago (validado)')
+        parser.add_argument('--salida', help='Archivo ZIP a crear (por defecto comprobantes_<desde>_<hasta>.zip)')
+        parser.add_argument('--lote', type=int, default=50, help='Comprobantes por lote (50)')
+        parser.add_argument('--procesos', type=int, default=None,
+                            help='Procesos para generar los PDF (por defecto, uno por CPU)')
+
+    def handle(self, *args, **options):
+        parametros = {clave: options[clave] for clave in ('desde', 'hasta', 'estado') if options[clave]}
+        if options['curso']:
+            parametros['curso'] = str(options['curso'])
+        filtros = ledger.leer_filtros(parametros)
+        for clave in ('desde', 'hasta'):
+            if clave in parametros and clave not in filtros:
+                raise CommandError(f'--{clave} debe tener el formato AAAA-MM-DD')
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+
+        compras = ledger.aplicar_filtros(Compra.objects.order_by('fecha_compra', 'id'), filtros)
+        total = compras.count()
+        if not total:
+            self.stdout.write('No hay compras con esos filtros.')
+            return
+        salida = options['salida'] or 'comprobantes_{}_{}.zip'.format(
+            options['desde'] or 'inicio', options['hasta'] or 'hoy'
+        )
+
+        def informar(avance):
+            self.stdout.write(
+                f"{avance['procesados']}/{total} comprobantes, {avance['generados']} generados "
+                f"({avance['por_segundo']:.1f} comprobantes/s)"
+            )
+
+        pool = crear_pool(options['procesos'])
+        temporal = f'{salida}.tmp'
+        try:
+            with open(temporal, 'wb') as f:
+                for trozo in receipts.comprobantes_zip(compras, pool, options['lote'], informar):
+                    f.write(trozo)
+            os.replace(temporal, salida)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+        self.stdout.write(self.style.SUCCESS(f'{total} comprobantes guardados en {salida}'))
@@ -0,0 +1,235 @@
+import csv
+import json
+import os
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Iterator
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from core import instructor_stats, search, stats
+from core.models import Curso, ImportacionCursos, Modulo, Usuario
+from core.slugs import asignar_slugs
+
+TIPOS = dict(Curso._meta.get_field('tipo').choices)
+ESTADOS = dict(Curso._meta.get_field('estado').choices)
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa cursos y sus módulos desde un archivo JSONL o CSV, por lotes. "
+        "Cada registro tiene titulo, descripcion, precio, tipo, instructor (usuario o "
+        "email) y opcionalmente estado, link_material y modulos (lista de objetos con "
+        "titulo, contenido_url y orden; en CSV, como JSON dentro de la columna)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .jsonl o .csv')
+        parser.add_argument('--formato', choices=['jsonl', 'csv'], help='Por defecto se deduce de la extensión')
+        parser.add_argument('--lote', type=int, default=500, help='Registros por transacción (500)')
+        parser.add_argument(
+            '--progreso',
+            help='Clave con la que se guarda el último lote confirmado (por defecto la ruta absoluta del archivo)'
+        )
+        parser.add_argument(
+            '--reanudar',
+            action='store_true',
+            help='Continúa desde el último lote confirmado con esa clave'
+        )
+
+    def handle(self, *args, **options):
+        archivo = options['archivo']
+        if not os.path.isfile(archivo):
+            raise CommandError(f'No existe el archivo {archivo}')
+        formato = options['formato'] or ('csv' if archivo.lower().endswith('.csv') else 'jsonl')
+        lote = options['lote']
+        if lote < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+        self.clave = options['progreso'] or os.path.abspath(archivo)
+
+        procesados = 0
+        if options['reanudar']:
+            procesados = ImportacionCursos.objects.filter(clave=self.clave).values_list(
+                'registros', flat=True
+            ).first() or 0
+            self.stdout.write(f'Reanudando después de {procesados} registros ya confirmados.')
+
+        self.instructores = {}
+        creados = modulos_creados = errores = 0
+        inicio = time.monotonic()
+
+        with open(archivo, encoding='utf-8', newline='') as f:
+            registros = islice(self._leer(f, formato), procesados, None)
+            while True:
+                bloque = list(islice(registros, lote))
+                if not bloque:
+                    break
+
+                cursos, modulos, fallidos = self._preparar(bloque, procesados)
+                procesados += len(bloque)
+                self._guardar(cursos, modulos, procesados)
+
+                creados += len(cursos)
+                modulos_creados += sum(len(lista) for lista in modulos)
+                errores += fallidos
+                transcurrido = time.monotonic() - inicio
+                self.stdout.write(
+                    f'{procesados} registros leídos, {creados} cursos y {modulos_creados} módulos '
+                    f'creados ({creados / transcurrido if transcurrido else 0:.0f} cursos/s)'
+                )
+
+        mensaje = f'Importación terminada: {creados} cursos, {modulos_creados} módulos'
+        if errores:
+            mensaje += f', {errores} registros omitidos por errores'
+        self.stdout.write(self.style.SUCCESS(mensaje))
+
+    def _leer(self, f, formato: str) -> Iterator:
+        """Registros del archivo: diccionarios en CSV, líneas sin interpretar en JSONL."""
+        if formato == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for linea in f:
+                if linea.strip():
+                    yield linea
+
+    def _registro(self, crudo) -> dict:
+        # Las líneas JSONL se interpretan aquí para que una mal formada sólo omita su registro
+        registro = json.loads(crudo) if isinstance(crudo, str) else crudo
+        if not isinstance(registro, dict):
+            raise ValueError('el registro no es un objeto')
+        return registro
+
+    def _resolver_instructores(self, bloque: list[dict]) -> None:
+        """Busca en una sola consulta los instructores del lote que aún no se conocen."""
+        faltantes = {
+            str(registro.get('instructor', '')).strip()
+            for registro in bloque
+        } - set(self.instructores) - {''}
+        if not faltantes:
+            return
+        encontrados = Usuario.objects.filter(es_instructor=True).filter(
+            Q(username__in=faltantes) | Q(email__in=faltantes)
+        ).values_list('id', 'username', 'email')
+        for pk, username, email in encontrados:
+            self.instructores[username] = pk
+            if email:
+                self.instructores[email] = pk
+
+    def _preparar(self, bloque: list, desplazamiento: int):
+        registros, fallidos = [], 0
+        for numero, crudo in enumerate(bloque, start=desplazamiento + 1):
+            try:
+                registros.append((numero, self._registro(crudo)))
+            except ValueError as e:
+                fallidos += 1
+                self.stderr.write(f'Registro {numero} omitido: {e}')
+
+        self._resolver_instructores([registro for _numero, registro in registros])
+        cursos, modulos = [], []
+        for numero, registro in registros:
+            try:
+                curso = self._curso(registro)
+                lista = self._modulos(registro.get('modulos') or [])
+            except (KeyError, TypeError, ValueError, InvalidOperation) as e:
+                fallidos += 1
+                self.stderr.write(f'Registro {numero} omitido: {e}')
+                continue
+            except ValidationError as e:
+                fallidos += 1
+                self.stderr.write(f'Registro {numero} omitido: {"; ".join(e.messages)}')
+                continue
+            cursos.append(curso)
+            modulos.append(lista)
+        return cursos, modulos, fallidos
+
+    def _curso(self, registro: dict) -> Curso:
+        instructor = str(registro.get('instructor', '')).strip()
+        if instructor not in self.instructores:
+            raise ValueError(f'instructor desconocido "{instructor}"')
+        tipo = registro['tipo']
+        if tipo not in TIPOS:
+            raise ValueError(f'tipo inválido "{tipo}"')
+        estado = registro.get('estado') or 'activo'
+        if estado not in ESTADOS:
+            raise ValueError(f'estado inválido "{estado}"')
+        titulo = registro.get('titulo')
+        if not isinstance(titulo, str) or not titulo.strip():
+            raise ValueError('el título está vacío')
+        precio = registro.get('precio')
+        if precio in (None, ''):
+            raise ValueError('falta el precio')
+        curso = Curso(
+            instructor_id=self.instructores[instructor],
+            titulo=titulo.strip()[:100],
+            descripcion=registro.get('descripcion') or '',
+            precio=Decimal(str(precio)),
+            tipo=tipo,
+            estado=estado,
+            link_material=registro.get('link_material') or None,
+        )
+        # Lo que la base de datos rechazaría (tipos, dígitos del precio, URL) se
+        # detecta aquí, sin consultas, para no perder el lote entero
+        curso.clean_fields(exclude=['instructor', 'slug', 'descripcion', 'archivo_pdf'])
+        return curso
+
+    def _modulos(self, datos) -> list[Modulo]:
+        """Módulos de un curso con `orden` único (los repetidos o vacíos van al final)."""
+        if isinstance(datos, str):
+            datos = json.loads(datos)
+        if not isinstance(datos, list):
+            raise ValueError('modulos no es una lista')
+        modulos, usados, sin_orden = [], set(), []
+        for dato in datos:
+            modulo = Modulo(titulo=dato['titulo'][:100], contenido_url=dato['contenido_url'])
+            modulo.clean_fields(exclude=['curso', 'orden'])
+            orden = int(dato['orden']) if dato.get('orden') not in (None, '') else None
+            if orden is not None and orden > 0 and orden not in usados:
+                modulo.orden = orden
+                usados.add(orden)
+            else:
+                sin_orden.append(modulo)
+            modulos.append(modulo)
+        siguiente = max(usados, default=0) + 1
+        for modulo in sin_orden:
+            modulo.orden = siguiente
+            siguiente += 1
+        return modulos
+
+    def _guardar(self, cursos: list[Curso], modulos: list[list[Modulo]], procesados: int, intentos: int = 3) -> None:
+        """
+        Inserta el lote en una transacción; si otro proceso tomó un slug, lo reasigna.
+
+        El progreso se guarda en la misma transacción: si el proceso se corta, el
+        lote y su registro en ImportacionCursos se confirman juntos o no se confirma
+        ninguno, y --reanudar no repite ni salta cursos.
+        """
+        for intento in range(intentos):
+            asignar_slugs(Curso, cursos)
+            try:
+                with transaction.atomic():
+                    Curso.objects.bulk_create(cursos)
+                    for curso, lista in zip(cursos, modulos):
+                        for modulo in lista:
+                            modulo.curso = curso
+                    Modulo.objects.bulk_create(
+                        [modulo for lista in modulos for modulo in lista],
+                        batch_size=1000
+                    )
+                    # bulk_create no emite señales: se indexan y cuentan aquí
+                    search.indexar_cursos(curso.pk for curso in cursos)
+                    stats.aplicar(total_cursos=len(cursos))
+                    instructor_stats.invalidar(curso.instructor_id for curso in cursos)
+                    ImportacionCursos.objects.update_or_create(
+                        clave=self.clave, defaults={'registros': procesados}
+                    )
+                return
+            except IntegrityError:
+                if intento == intentos - 1:
+                    raise
+                for curso in cursos:
+                    curso.pk = None
+                    curso.slug = ''
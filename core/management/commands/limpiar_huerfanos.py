@@ -0,0 +1,67 @@
+from datetime import timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import huerfanos, uploads
+
+
+class Command(BaseCommand):
+    help = (
+        "Busca en MEDIA_ROOT y MEDIA_PROTEGIDA_ROOT los archivos que ningún curso, "
+        "plantilla, certificado o subida usa, y las subidas por trozos abandonadas. Por "
+        "defecto sólo los lista; con --borrar los elimina (los archivos, a un ritmo "
+        "limitado)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--borrar', action='store_true', help='Elimina los archivos huérfanos')
+        parser.add_argument('--por-segundo', type=float, default=20,
+                            help='Máximo de archivos borrados por segundo (20)')
+        parser.add_argument('--limite', type=int, default=None, help='Máximo de archivos a procesar')
+        parser.add_argument('--antiguedad', type=float, default=1,
+                            help='Horas sin modificarse para considerar un archivo (1)')
+        parser.add_argument('--lote', type=int, default=huerfanos.TAMANO_LOTE,
+                            help=f'Nombres consultados por vez ({huerfanos.TAMANO_LOTE})')
+
+    def handle(self, *args, **options):
+        if options['lote'] < 1 or options['lote'] > 900:
+            raise CommandError('--lote debe estar entre 1 y 900')
+        if options['por_segundo'] <= 0:
+            raise CommandError('--por-segundo debe ser mayor que cero')
+        if options['limite'] is not None and options['limite'] < 1:
+            raise CommandError('--limite debe ser mayor que cero')
+        if options['antiguedad'] < 0:
+            raise CommandError('--antiguedad no puede ser negativa')
+
+        opciones = {'antiguedad': timedelta(hours=options['antiguedad']), 'lote': options['lote']}
+        cantidad = total = 0
+        if options['borrar']:
+            # descartar() borra el archivo parcial y suelta la referencia del ensamblado
+            descartadas = uploads.limpiar()
+            self.stdout.write(f'{descartadas} subidas por trozos vencidas descartadas.')
+            for nombre, tamano, borrado in huerfanos.reclamar(options['por_segundo'], options['limite'], **opciones):
+                if not borrado:
+                    continue
+                cantidad += 1
+                total += tamano
+                if options['verbosity'] >= 2:
+                    self.stdout.write(f'Borrado {nombre}')
+            self.stdout.write(self.style.SUCCESS(
+                f'{cantidad} archivos huérfanos borrados ({total / 1024 / 1024:.1f} MB liberados).'
+            ))
+            return
+
+        vencidas = uploads.vencidas().count()
+        if vencidas:
+            self.stdout.write(f'{vencidas} subidas por trozos vencidas.')
+        for nombre, tamano in islice(huerfanos.buscar(**opciones), options['limite']):
+            cantidad += 1
+            total += tamano
+            self.stdout.write(f'{nombre} ({tamano} bytes)')
+        if not cantidad:
+            self.stdout.write(self.style.SUCCESS('No hay archivos huérfanos.'))
+            return
+        self.stdout.write(self.style.WARNING(
+            f'{cantidad} archivos huérfanos ({total / 1024 / 1024:.1f} MB). Use --borrar para eliminarlos.'
+        ))
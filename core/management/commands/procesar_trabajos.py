@@ -0,0 +1,54 @@
+import os
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.workers import iniciar_workers_cola
+
+
+class Command(BaseCommand):
+    help = (
+        "Procesa la cola de trabajos PDF (comprobantes y emisión de certificados) "
+        "con varios procesos. Queda esperando trabajos nuevos hasta que se detiene "
+        "con Ctrl+C o SIGTERM; cada worker termina antes el trabajo en curso."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--procesos', type=int, default=None,
+                            help='Workers en paralelo (por defecto, uno por CPU)')
+        parser.add_argument('--procesos-por-trabajo', type=int, default=None,
+                            help='Procesos con que cada worker reparte un trabajo grande, como '
+                                 'una carga de usuarios (por defecto, uno por CPU)')
+        parser.add_argument('--espera', type=float, default=1.0,
+                            help='Segundos entre consultas cuando la cola está vacía (1)')
+        parser.add_argument('--hasta-vaciar', action='store_true',
+                            help='Termina cuando no quedan trabajos disponibles')
+
+    def handle(self, *args, **options):
+        procesos = options['procesos'] or os.cpu_count() or 1
+        if procesos < 1:
+            raise CommandError('--procesos debe ser mayor que cero')
+        if options['procesos_por_trabajo'] is not None and options['procesos_por_trabajo'] < 1:
+            raise CommandError('--procesos-por-trabajo debe ser mayor que cero')
+        if options['espera'] <= 0:
+            raise CommandError('--espera debe ser mayor que cero')
+
+        def detener(*_):
+            raise KeyboardInterrupt
+
+        # SIGTERM (p. ej. al detener el servicio) se trata igual que Ctrl+C
+        signal.signal(signal.SIGTERM, detener)
+        workers = iniciar_workers_cola(procesos, options['espera'], options['hasta_vaciar'],
+                                       options['procesos_por_trabajo'])
+        self.stdout.write(f'{len(workers)} workers atendiendo la cola de trabajos PDF')
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            self.stdout.write('Deteniendo workers (terminan el trabajo en curso)...')
+            signal.signal(signal.SIGTERM, signal.SIG_IGN)
+            for worker in workers:
+                worker.terminate()
+            for worker in workers:
+                worker.join()
+        self.stdout.write(self.style.SUCCESS('Workers detenidos'))
@@ -0,0 +1,47 @@
+import csv
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.provisioning import ROLES, provisionar
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea estudiantes o instructores en lote desde un CSV con las columnas "
+        "nombre_completo, email, rol, titulo_especialidad y password (sólo el nombre "
+        "es obligatorio). Los usernames institucionales se asignan automáticamente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo CSV')
+        parser.add_argument('--rol', choices=ROLES, default='estudiante',
+                            help='Rol de las filas sin columna "rol" (estudiante)')
+        parser.add_argument('--lote', type=int, default=1000, help='Usuarios por lote (1000)')
+        parser.add_argument('--procesos', type=int, default=None,
+                            help='Procesos para hashear contraseñas (por defecto, uno por CPU)')
+
+    def handle(self, *args, **options):
+        archivo = options['archivo']
+        if not os.path.isfile(archivo):
+            raise CommandError(f'No existe el archivo {archivo}')
+        if options['lote'] < 1:
+            raise CommandError('--lote debe ser mayor que cero')
+
+        resumen = None
+        with open(archivo, encoding='utf-8-sig', newline='') as f:
+            for resumen in provisionar(csv.DictReader(f), options['rol'], options['lote'], options['procesos']):
+                for error in resumen['errores']:
+                    self.stderr.write(error)
+                self.stdout.write(
+                    f"{resumen['leidos']} filas leídas, {resumen['creados']} usuarios creados "
+                    f"({resumen['por_segundo']:.0f} usuarios/s)"
+                )
+
+        if resumen is None:
+            self.stdout.write('El archivo no tiene filas.')
+            return
+        mensaje = f"Carga terminada: {resumen['creados']} usuarios creados"
+        if resumen['omitidos']:
+            mensaje += f", {resumen['omitidos']} filas omitidas"
+        self.stdout.write(self.style.SUCCESS(mensaje))
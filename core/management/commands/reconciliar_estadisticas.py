@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from core import stats
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula desde cero las estadísticas del panel de administración y corrige "
+        "las diferencias con los totales mantenidos por señales (por ejemplo, tras "
+        "cambios hechos con update() o SQL directo)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--solo-reportar',
+            action='store_true',
+            help='Muestra las diferencias sin corregirlas'
+        )
+
+    def handle(self, *args, **options):
+        corregir = not options['solo_reportar']
+        deriva = stats.reconciliar(corregir=corregir)
+        if not deriva:
+            self.stdout.write(self.style.SUCCESS('Las estadísticas están al día.'))
+            return
+        for campo, (guardado, real) in deriva.items():
+            self.stdout.write(f'{campo}: guardado {guardado}, real {real}')
+        if corregir:
+            self.stdout.write(self.style.SUCCESS(f'{len(deriva)} totales corregidos.'))
+        else:
+            self.stdout.write(self.style.WARNING(f'{len(deriva)} totales con diferencias (sin corregir).'))
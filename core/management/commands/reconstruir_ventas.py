@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from core import ventas
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye las ventas diarias por curso a partir de las compras validadas. "
+        "Sirve para la carga inicial y para corregir diferencias tras cambios hechos "
+        "sin señales (update(), SQL directo)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--curso',
+            type=int,
+            action='append',
+            dest='cursos',
+            help='Reconstruye sólo este curso (se puede repetir)'
+        )
+
+    def handle(self, *args, **options):
+        filas = ventas.reconstruir(options['cursos'])
+        self.stdout.write(self.style.SUCCESS(f'Ventas diarias reconstruidas: {filas} filas.'))
@@ -0,0 +1,33 @@
+from django.db import migrations
+
+
+def crear_indice(apps, schema_editor):
+    # FTS5 sólo existe en SQLite; en otros motores la búsqueda usa LIKE
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS core_curso_fts USING fts5("
+        "titulo, descripcion, instructor, tokenize='unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        "INSERT INTO core_curso_fts(rowid, titulo, descripcion, instructor) "
+        "SELECT c.id, c.titulo, c.descripcion, u.nombre_completo "
+        "FROM core_curso c JOIN core_usuario u ON u.id = c.instructor_id"
+    )
+
+
+def eliminar_indice(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS core_curso_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_curso_archivo_pdf_curso_estado_curso_link_material_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_curso_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='curso',
+            index=models.Index(fields=['estado', 'tipo', 'precio'], name='curso_estado_tipo_precio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='curso',
+            index=models.Index(fields=['estado', 'fecha_creacion'], name='curso_estado_fecha_idx'),
+        ),
+    ]
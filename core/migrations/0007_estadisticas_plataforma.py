@@ -0,0 +1,55 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:10
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def calcular_estadisticas(apps, schema_editor):
+    Usuario = apps.get_model('core', 'Usuario')
+    Curso = apps.get_model('core', 'Curso')
+    Compra = apps.get_model('core', 'Compra')
+    EstadisticasPlataforma = apps.get_model('core', 'EstadisticasPlataforma')
+    usuarios = Usuario.objects.aggregate(
+        total_usuarios=Count('id'),
+        total_estudiantes=Count('id', filter=Q(es_estudiante=True)),
+        total_instructores=Count('id', filter=Q(es_instructor=True)),
+    )
+    compras = Compra.objects.filter(estado_pago='validado').aggregate(
+        total_compras=Count('id'),
+        total_ingresos=Sum('monto_pagado'),
+    )
+    EstadisticasPlataforma.objects.create(
+        pk=1,
+        total_cursos=Curso.objects.count(),
+        total_compras=compras['total_compras'],
+        total_ingresos=compras['total_ingresos'] or 0,
+        **usuarios
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_curso_indices_catalogo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticasPlataforma',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_usuarios', models.IntegerField(default=0)),
+                ('total_estudiantes', models.IntegerField(default=0)),
+                ('total_instructores', models.IntegerField(default=0)),
+                ('total_cursos', models.IntegerField(default=0)),
+                ('total_compras', models.IntegerField(default=0, help_text='Compras validadas')),
+                ('total_ingresos', models.DecimalField(decimal_places=2, default=0, help_text='Suma de las compras validadas', max_digits=14)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estadísticas de la plataforma',
+                'verbose_name_plural': 'Estadísticas de la plataforma',
+            },
+        ),
+        migrations.RunPython(calcular_estadisticas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def calcular_ventas(apps, schema_editor):
+    Compra = apps.get_model('core', 'Compra')
+    VentaDiaria = apps.get_model('core', 'VentaDiaria')
+    filas = (
+        Compra.objects.filter(estado_pago='validado')
+        .annotate(fecha=TruncDate('fecha_compra'))
+        .values('curso_id', 'fecha')
+        .annotate(total=Count('id'), suma=Sum('monto_pagado'))
+        .order_by()
+    )
+    VentaDiaria.objects.bulk_create(
+        [
+            VentaDiaria(curso_id=fila['curso_id'], fecha=fila['fecha'], compras=fila['total'], ingresos=fila['suma'])
+            for fila in filas
+        ],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_estadisticas_plataforma'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('compras', models.IntegerField(default=0)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_diarias', to='core.curso')),
+            ],
+            options={
+                'verbose_name': 'Venta diaria',
+                'verbose_name_plural': 'Ventas diarias',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['fecha'], name='ventadiaria_fecha_idx')],
+                'unique_together': {('curso', 'fecha')},
+            },
+        ),
+        migrations.RunPython(calcular_ventas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:13
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0008_ventas_diarias'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(django.db.models.functions.text.Lower('username'), name='usuario_username_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='usuario_email_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(django.db.models.functions.text.Lower('nombre_completo'), name='usuario_nombre_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['date_joined', 'id'], name='usuario_alta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['es_estudiante', 'date_joined', 'id'], name='usuario_estudiante_alta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['es_instructor', 'date_joined', 'id'], name='usuario_instructor_alta_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['is_superuser', 'date_joined', 'id'], name='usuario_admin_alta_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_usuario_indices_directorio'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='compra',
+            index=models.Index(fields=['fecha_compra', 'id'], name='compra_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='compra',
+            index=models.Index(fields=['estado_pago', 'fecha_compra', 'id'], name='compra_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='compra',
+            index=models.Index(fields=['curso', 'fecha_compra', 'id'], name='compra_curso_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_compra_indices_libro'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrabajoPDF',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('comprobante', 'Comprobante de compra'), ('emision', 'Emisión de certificados')], max_length=20)),
+                ('objeto_id', models.PositiveIntegerField(help_text='Compra o curso sobre el que se trabaja')),
+                ('parametros', models.JSONField(blank=True, default=dict)),
+                ('prioridad', models.SmallIntegerField(default=0, help_text='Los de mayor prioridad se procesan primero')),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_proceso', 'En proceso'), ('terminado', 'Terminado'), ('fallido', 'Fallido')], default='pendiente', max_length=20)),
+                ('intentos', models.PositiveSmallIntegerField(default=0)),
+                ('max_intentos', models.PositiveSmallIntegerField(default=3)),
+                ('disponible_desde', models.DateTimeField(default=django.utils.timezone.now, help_text='Los reintentos esperan hasta esta fecha')),
+                ('worker', models.CharField(blank=True, max_length=100)),
+                ('resultado', models.CharField(blank=True, max_length=255)),
+                ('error', models.TextField(blank=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_inicio', models.DateTimeField(blank=True, null=True)),
+                ('fecha_fin', models.DateTimeField(blank=True, null=True)),
+                ('solicitado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='trabajos_pdf', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Trabajo PDF',
+                'verbose_name_plural': 'Trabajos PDF',
+                'ordering': ['-fecha_creacion'],
+                'indexes': [models.Index(fields=['estado', 'prioridad', 'disponible_desde'], name='trabajopdf_cola_idx'), models.Index(fields=['tipo', 'objeto_id', 'estado'], name='trabajopdf_objeto_idx')],
+            },
+        ),
+    ]
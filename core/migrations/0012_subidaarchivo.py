@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:32
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_trabajopdf'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubidaArchivo',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('destino', models.CharField(choices=[('curso', 'Material de curso'), ('plantilla', 'Plantilla de certificado')], max_length=20)),
+                ('nombre', models.CharField(help_text='Nombre original del archivo', max_length=255)),
+                ('tamano', models.PositiveBigIntegerField(help_text='Tamaño total declarado al iniciar la subida')),
+                ('recibido', models.PositiveBigIntegerField(default=0)),
+                ('archivo', models.CharField(blank=True, help_text='Nombre en el almacenamiento una vez completa', max_length=255)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='subidas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Subida de archivo',
+                'verbose_name_plural': 'Subidas de archivos',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:38
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_subidaarchivo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivoAlmacenado',
+            fields=[
+                ('huella', models.CharField(help_text='SHA-256 del contenido', max_length=64, primary_key=True, serialize=False)),
+                ('nombre', models.CharField(max_length=255, unique=True)),
+                ('tamano', models.PositiveBigIntegerField()),
+                ('referencias', models.PositiveIntegerField(default=0)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archivo almacenado',
+                'verbose_name_plural': 'Archivos almacenados',
+            },
+        ),
+        migrations.AlterField(
+            model_name='certificado',
+            name='archivo',
+            field=models.FileField(storage=core.storage.almacenamiento_pdf, upload_to='certificados/emitidos/'),
+        ),
+        migrations.AlterField(
+            model_name='curso',
+            name='archivo_pdf',
+            field=models.FileField(blank=True, help_text='Archivo PDF opcional para el curso', null=True, storage=core.storage.almacenamiento_pdf, upload_to='cursos/pdfs/'),
+        ),
+        migrations.AlterField(
+            model_name='plantillacertificado',
+            name='archivo',
+            field=models.FileField(storage=core.storage.almacenamiento_pdf, upload_to='certificados/plantillas/'),
+        ),
+    ]
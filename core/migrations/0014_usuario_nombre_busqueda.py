@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:50
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def completar_nombre_busqueda(apps, schema_editor):
+    # Copia de core.models.normalizar_busqueda: el modelo histórico no tiene save()
+    Usuario = apps.get_model('core', 'Usuario')
+    lote = []
+    for usuario in Usuario.objects.only('id', 'nombre_completo').iterator(chunk_size=1000):
+        descompuesto = unicodedata.normalize('NFKD', usuario.nombre_completo.casefold())
+        usuario.nombre_busqueda = ''.join(c for c in descompuesto if not unicodedata.combining(c))[:100]
+        lote.append(usuario)
+        if len(lote) == 1000:
+            Usuario.objects.bulk_update(lote, ['nombre_busqueda'])
+            lote = []
+    Usuario.objects.bulk_update(lote, ['nombre_busqueda'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0013_archivoalmacenado'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='usuario',
+            name='usuario_nombre_lower_idx',
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='nombre_busqueda',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(completar_nombre_busqueda, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='usuario',
+            index=models.Index(fields=['nombre_busqueda'], name='usuario_nombre_busqueda_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_usuario_nombre_busqueda'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trabajopdf',
+            name='objeto_id',
+            field=models.PositiveIntegerField(help_text='Compra o curso sobre el que se trabaja (en las cargas de usuarios, quien la pidió)'),
+        ),
+        migrations.AlterField(
+            model_name='trabajopdf',
+            name='tipo',
+            field=models.CharField(choices=[('comprobante', 'Comprobante de compra'), ('emision', 'Emisión de certificados'), ('usuarios', 'Carga de usuarios')], max_length=20),
+        ),
+    ]
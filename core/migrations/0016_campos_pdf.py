@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:05
+
+import core.storage
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_trabajopdf_carga_usuarios'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='certificado',
+            name='archivo',
+            field=core.storage.CampoPDF(storage=core.storage.almacenamiento_pdf, upload_to='certificados/emitidos/'),
+        ),
+        migrations.AlterField(
+            model_name='curso',
+            name='archivo_pdf',
+            field=core.storage.CampoPDF(blank=True, help_text='Archivo PDF opcional para el curso', null=True, storage=core.storage.almacenamiento_pdf, upload_to='cursos/pdfs/'),
+        ),
+        migrations.AlterField(
+            model_name='plantillacertificado',
+            name='archivo',
+            field=core.storage.CampoPDF(storage=core.storage.almacenamiento_pdf, upload_to='certificados/plantillas/'),
+        ),
+    ]
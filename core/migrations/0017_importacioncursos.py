@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_campos_pdf'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportacionCursos',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('clave', models.CharField(help_text='Ruta absoluta del archivo o la indicada con --progreso', max_length=255, unique=True)),
+                ('registros', models.PositiveBigIntegerField(default=0)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Importación de cursos',
+                'verbose_name_plural': 'Importaciones de cursos',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_importacioncursos'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trabajopdf',
+            name='objeto_id',
+            field=models.PositiveIntegerField(help_text='Compra o curso sobre el que se trabaja (en las cargas de usuarios y los ZIP, quien los pidió)'),
+        ),
+        migrations.AlterField(
+            model_name='trabajopdf',
+            name='tipo',
+            field=models.CharField(choices=[('comprobante', 'Comprobante de compra'), ('emision', 'Emisión de certificados'), ('usuarios', 'Carga de usuarios'), ('comprobantes_zip', 'ZIP de comprobantes')], max_length=20),
+        ),
+    ]
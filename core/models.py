@@ -1,10 +1,21 @@
+import unicodedata
+
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Lower
 
 
 # ======= 1. Usuario =======
+def normalizar_busqueda(texto: str) -> str:
+    """Texto en minúsculas y sin acentos, para buscar por prefijo (LOWER() de SQLite sólo pliega ASCII)."""
+    descompuesto = unicodedata.normalize('NFKD', texto.casefold())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c))
+
+
 class Usuario(AbstractUser):
     nombre_completo = models.CharField(max_length=100)
+    # nombre_completo normalizado; lo completa save() (y quien use bulk_create)
+    nombre_busqueda = models.CharField(max_length=100, default='', editable=False)
     es_estudiante = models.BooleanField(default=False)
     es_instructor = models.BooleanField(default=False)
     es_administrador = models.BooleanField(default=False)
@@ -15,9 +26,33 @@ class Usuario(AbstractUser):
             return f"{self.nombre_completo} - {self.titulo_especialidad}"
         return f"{self.nombre_completo}"
 
+    def save(self, *args, **kwargs):
+        self.nombre_busqueda = normalizar_busqueda(self.nombre_completo or '')[:100]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'nombre_completo' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'nombre_busqueda'}
+        super().save(*args, **kwargs)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Búsqueda por prefijo sin distinguir mayúsculas en el directorio de usuarios
+            models.Index(Lower('username'), name='usuario_username_lower_idx'),
+            models.Index(Lower('email'), name='usuario_email_lower_idx'),
+            models.Index(fields=['nombre_busqueda'], name='usuario_nombre_busqueda_idx'),
+            # Páginas de cada pestaña del directorio, de los más recientes a los más antiguos
+            models.Index(fields=['date_joined', 'id'], name='usuario_alta_idx'),
+            models.Index(fields=['es_estudiante', 'date_joined', 'id'], name='usuario_estudiante_alta_idx'),
+            models.Index(fields=['es_instructor', 'date_joined', 'id'], name='usuario_instructor_alta_idx'),
+            models.Index(fields=['is_superuser', 'date_joined', 'id'], name='usuario_admin_alta_idx'),
+        ]
+
 
 # ======= 2. Curso =======
-from django.utils.text import slugify
+from django.db import IntegrityError, transaction
+from .slugs import siguiente_slug
+from .storage import CampoPDF, almacenamiento_pdf
+
+INTENTOS_SLUG = 5
 
 class Curso(models.Model):
     instructor = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='cursos')
@@ -35,25 +70,38 @@ class Curso(models.Model):
         default='activo'
     )
     link_material = models.URLField(blank=True, null=True, help_text="Link opcional para material adicional del curso")
-    archivo_pdf = models.FileField(upload_to='cursos/pdfs/', blank=True, null=True, help_text="Archivo PDF opcional para el curso")
+    archivo_pdf = CampoPDF(upload_to='cursos/pdfs/', storage=almacenamiento_pdf, blank=True, null=True, help_text="Archivo PDF opcional para el curso")
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.titulo)
-            # Asegurar que el slug sea único
-            counter = 1
-            while Curso.objects.filter(slug=self.slug).exists():
-                self.slug = f"{slugify(self.titulo)}-{counter}"
-                counter += 1
-        super().save(*args, **kwargs)
+        if self.slug:
+            return super().save(*args, **kwargs)
+
+        # El slug libre se calcula con una sola consulta; si otro proceso lo toma
+        # antes del INSERT, se calcula de nuevo
+        for intento in range(INTENTOS_SLUG):
+            self.slug = siguiente_slug(Curso, self.titulo)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                ocupado = Curso.objects.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                if intento == INTENTOS_SLUG - 1 or not ocupado:
+                    self.slug = ''
+                    raise
 
     def __str__(self):
         return self.titulo
 
     class Meta:
         ordering = ['-fecha_creacion']
+        indexes = [
+            # Filtros del catálogo (estado, tipo y rango de precio)
+            models.Index(fields=['estado', 'tipo', 'precio'], name='curso_estado_tipo_precio_idx'),
+            # Paginación del catálogo por fecha de creación
+            models.Index(fields=['estado', 'fecha_creacion'], name='curso_estado_fecha_idx'),
+        ]
 
 
 # ======= 3. Modulo =======
@@ -92,6 +140,12 @@ class Compra(models.Model):
     class Meta:
         ordering = ['-fecha_compra']
         unique_together = ('estudiante', 'curso')
+        indexes = [
+            # Libro de compras: paginación por (fecha_compra, id), sola o por estado o curso
+            models.Index(fields=['fecha_compra', 'id'], name='compra_fecha_idx'),
+            models.Index(fields=['estado_pago', 'fecha_compra', 'id'], name='compra_estado_fecha_idx'),
+            models.Index(fields=['curso', 'fecha_compra', 'id'], name='compra_curso_fecha_idx'),
+        ]
 
 
 # ======= 5. Progreso =======
@@ -122,22 +176,14 @@ class Evaluacion(models.Model):
 
 
 # ======= 7. Plantilla de Certificado =======
-import os
 from django.utils.text import slugify
 
 class PlantillaCertificado(models.Model):
     nombre = models.CharField(max_length=100)
     descripcion = models.TextField(blank=True)
-    archivo = models.FileField(upload_to='certificados/plantillas/')
+    archivo = CampoPDF(upload_to='certificados/plantillas/', storage=almacenamiento_pdf)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
 
-    def delete(self, *args, **kwargs):
-        # Delete the file when the model instance is deleted
-        if self.archivo:
-            if os.path.isfile(self.archivo.path):
-                os.remove(self.archivo.path)
-        super().delete(*args, **kwargs)
-
     def __str__(self):
         return self.nombre
 
@@ -150,7 +196,7 @@ class Certificado(models.Model):
     curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='certificados')
     fecha_emision = models.DateField(auto_now_add=True)
     codigo_unico_pdf = models.CharField(max_length=100, unique=True)
-    archivo = models.FileField(upload_to='certificados/emitidos/')
+    archivo = CampoPDF(upload_to='certificados/emitidos/', storage=almacenamiento_pdf)
 
     def __str__(self):
         return f"Certificado - {self.estudiante.nombre_completo} ({self.curso.titulo})"
@@ -158,3 +204,152 @@ class Certificado(models.Model):
     class Meta:
         ordering = ['-fecha_emision']
         unique_together = ('estudiante', 'curso')
+
+# ======= 9. Estadisticas de la Plataforma =======
+class EstadisticasPlataforma(models.Model):
+    """Totales del panel de administración, mantenidos por señales (una sola fila)."""
+    total_usuarios = models.IntegerField(default=0)
+    total_estudiantes = models.IntegerField(default=0)
+    total_instructores = models.IntegerField(default=0)
+    total_cursos = models.IntegerField(default=0)
+    total_compras = models.IntegerField(default=0, help_text="Compras validadas")
+    total_ingresos = models.DecimalField(max_digits=14, decimal_places=2, default=0, help_text="Suma de las compras validadas")
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Estadísticas ({self.fecha_actualizacion:%d/%m/%Y %H:%M})"
+
+    class Meta:
+        verbose_name = 'Estadísticas de la plataforma'
+        verbose_name_plural = 'Estadísticas de la plataforma'
+
+# ======= 10. Ventas Diarias =======
+class VentaDiaria(models.Model):
+    """Compras validadas e ingresos de un curso en un día, mantenidos por señales."""
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE, related_name='ventas_diarias')
+    fecha = models.DateField()
+    compras = models.IntegerField(default=0)
+    ingresos = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.curso.titulo} - {self.fecha:%d/%m/%Y}"
+
+    class Meta:
+        ordering = ['-fecha']
+        unique_together = ('curso', 'fecha')
+        indexes = [
+            # Series de toda la plataforma por rango de fechas
+            models.Index(fields=['fecha'], name='ventadiaria_fecha_idx'),
+        ]
+        verbose_name = 'Venta diaria'
+        verbose_name_plural = 'Ventas diarias'
+
+# ======= 11. Trabajos PDF =======
+from django.utils import timezone
+
+class TrabajoPDF(models.Model):
+    """Generación de PDF encolada por las vistas y procesada por `procesar_trabajos`."""
+    TIPO_CHOICES = [
+        ('comprobante', 'Comprobante de compra'),
+        ('emision', 'Emisión de certificados'),
+        ('usuarios', 'Carga de usuarios'),
+        ('comprobantes_zip', 'ZIP de comprobantes'),
+    ]
+    ESTADO_CHOICES = [
+        ('pendiente', 'Pendiente'),
+        ('en_proceso', 'En proceso'),
+        ('terminado', 'Terminado'),
+        ('fallido', 'Fallido'),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPO_CHOICES)
+    objeto_id = models.PositiveIntegerField(help_text="Compra o curso sobre el que se trabaja (en las cargas de usuarios y los ZIP, quien los pidió)")
+    parametros = models.JSONField(default=dict, blank=True)
+    prioridad = models.SmallIntegerField(default=0, help_text="Los de mayor prioridad se procesan primero")
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default='pendiente')
+    intentos = models.PositiveSmallIntegerField(default=0)
+    max_intentos = models.PositiveSmallIntegerField(default=3)
+    disponible_desde = models.DateTimeField(default=timezone.now, help_text="Los reintentos esperan hasta esta fecha")
+    worker = models.CharField(max_length=100, blank=True)
+    resultado = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    solicitado_por = models.ForeignKey(Usuario, on_delete=models.SET_NULL, null=True, blank=True, related_name='trabajos_pdf')
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.objeto_id} ({self.get_estado_display()})"
+
+    class Meta:
+        ordering = ['-fecha_creacion']
+        indexes = [
+            # Siguiente trabajo disponible de la cola
+            models.Index(fields=['estado', 'prioridad', 'disponible_desde'], name='trabajopdf_cola_idx'),
+            # Trabajo activo de una compra o curso, para no encolarlo dos veces
+            models.Index(fields=['tipo', 'objeto_id', 'estado'], name='trabajopdf_objeto_idx'),
+        ]
+        verbose_name = 'Trabajo PDF'
+        verbose_name_plural = 'Trabajos PDF'
+
+# ======= 12. Subidas por Trozos =======
+import uuid
+
+class SubidaArchivo(models.Model):
+    """Subida de un PDF por trozos, reanudable desde el byte `recibido`."""
+    DESTINO_CHOICES = [
+        ('curso', 'Material de curso'),
+        ('plantilla', 'Plantilla de certificado'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='subidas')
+    destino = models.CharField(max_length=20, choices=DESTINO_CHOICES)
+    nombre = models.CharField(max_length=255, help_text="Nombre original del archivo")
+    tamano = models.PositiveBigIntegerField(help_text="Tamaño total declarado al iniciar la subida")
+    recibido = models.PositiveBigIntegerField(default=0)
+    archivo = models.CharField(max_length=255, blank=True, help_text="Nombre en el almacenamiento una vez completa")
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    @property
+    def completa(self) -> bool:
+        return bool(self.archivo)
+
+    def __str__(self):
+        return f"{self.nombre} ({self.recibido}/{self.tamano})"
+
+    class Meta:
+        ordering = ['-fecha_creacion']
+        verbose_name = 'Subida de archivo'
+        verbose_name_plural = 'Subidas de archivos'
+
+# ======= 13. Archivos Almacenados =======
+class ArchivoAlmacenado(models.Model):
+    """Archivo guardado por contenido y cuántos registros lo usan (ver storage.AlmacenamientoDeduplicado)."""
+    huella = models.CharField(max_length=64, primary_key=True, help_text="SHA-256 del contenido")
+    nombre = models.CharField(max_length=255, unique=True)
+    tamano = models.PositiveBigIntegerField()
+    referencias = models.PositiveIntegerField(default=0)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.nombre} ({self.referencias} referencias)"
+
+    class Meta:
+        verbose_name = 'Archivo almacenado'
+        verbose_name_plural = 'Archivos almacenados'
+
+# ======= 14. Progreso de Importaciones =======
+class ImportacionCursos(models.Model):
+    """Registros ya confirmados de un archivo de `importar_cursos`, para reanudarlo."""
+    clave = models.CharField(max_length=255, unique=True, help_text="Ruta absoluta del archivo o la indicada con --progreso")
+    registros = models.PositiveBigIntegerField(default=0)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.clave} ({self.registros} registros)"
+
+    class Meta:
+        verbose_name = 'Importación de cursos'
+        verbose_name_plural = 'Importaciones de cursos'
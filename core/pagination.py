@@ -0,0 +1,50 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional
+
+from django.db.models import Q, QuerySet
+
+
+def encode_cursor(fecha: datetime, pk: int) -> str:
+    """Codifica la posición (fecha, id) de la última fila de una página."""
+    raw = f"{fecha.isoformat()}|{pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[tuple[datetime, int]]:
+    """Decodifica un cursor; devuelve None si está vacío o no es válido."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        fecha, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(fecha), int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def keyset_page(queryset: QuerySet, field: str, cursor: Optional[str], size: int) -> tuple[list, Optional[str]]:
+    """
+    Devuelve una página ordenada por (field, id) descendente y el cursor de la siguiente.
+
+    En lugar de OFFSET se filtra por la posición de la última fila vista, de modo que
+    las páginas profundas cuestan lo mismo que la primera si existe un índice sobre
+    (field, id).
+    """
+    queryset = queryset.order_by(f'-{field}', '-id')
+    position = decode_cursor(cursor)
+    if position is not None:
+        fecha, pk = position
+        queryset = queryset.filter(
+            Q(**{f'{field}__lt': fecha}) | Q(**{field: fecha, 'id__lt': pk})
+        )
+
+    # Se pide una fila extra sólo para saber si hay una página siguiente
+    rows = list(queryset[:size + 1])
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return rows, next_cursor
@@ -0,0 +1,184 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from itertools import islice
+from operator import or_
+from typing import Iterable, Iterator, Optional
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from . import stats
+from .models import Usuario, normalizar_busqueda
+from .workers import crear_pool
+
+ROLES = ('estudiante', 'instructor')
+DOMINIO_INSTITUCIONAL = 'conectasaber.edu'
+
+# Bases de username consultadas por cada SELECT
+BASES_POR_CONSULTA = 100
+
+
+def username_base(nombre_completo: str) -> str:
+    """Username institucional sin sufijo: "nombre.apellido" en minúsculas."""
+    nombres = nombre_completo.split()
+    if len(nombres) > 1:
+        return f"{nombres[0].lower()}.{nombres[-1].lower()}"
+    return nombres[0].lower()
+
+
+def asignar_usernames(bases: list[str]) -> list[str]:
+    """
+    Usernames libres para cada base ("base", "base1", "base2"...).
+
+    Se consulta la base de datos una vez por cada BASES_POR_CONSULTA bases
+    distintas; las repetidas dentro de la lista reciben sufijos distintos.
+    """
+    distintas = list(set(bases))
+    # Todo username candidato empieza por su base, así que basta con traer los
+    # que empiezan por alguna de ellas
+    tomados = set()
+    for inicio in range(0, len(distintas), BASES_POR_CONSULTA):
+        grupo = distintas[inicio:inicio + BASES_POR_CONSULTA]
+        filtro = reduce(or_, (Q(username__startswith=base) for base in grupo))
+        tomados.update(Usuario.objects.filter(filtro).values_list('username', flat=True))
+
+    asignados = []
+    for base in bases:
+        username, n = base, 0
+        while username in tomados:
+            n += 1
+            username = f'{base}{n}'
+        tomados.add(username)
+        asignados.append(username)
+    return asignados
+
+
+def hashear_passwords(passwords: list[Optional[str]], pool: Optional[ProcessPoolExecutor] = None) -> list[str]:
+    """
+    Calcula los hashes repartidos en el pool; PBKDF2 es el cuello de botella de la carga.
+
+    Las contraseñas vacías quedan como no utilizables: el usuario deberá usar
+    "olvidé mi contraseña" para definir una.
+    """
+    hashes = [make_password(None) if not password else None for password in passwords]
+    pendientes = [(i, password) for i, password in enumerate(passwords) if password]
+
+    if pool is None or len(pendientes) < 2:
+        calculados = map(make_password, [password for _, password in pendientes])
+    else:
+        # Cada hash tarda del orden de décimas de segundo: lotes pequeños reparten
+        # mejor el trabajo entre procesos
+        calculados = pool.map(make_password, [password for _, password in pendientes], chunksize=8)
+    for (i, _), hash_ in zip(pendientes, calculados):
+        hashes[i] = hash_
+    return hashes
+
+
+def _validar(fila: dict, rol_por_defecto: str) -> dict:
+    nombre = (fila.get('nombre_completo') or '').strip()
+    if not nombre:
+        raise ValueError('falta nombre_completo')
+    rol = (fila.get('rol') or rol_por_defecto).strip().lower()
+    if rol not in ROLES:
+        raise ValueError(f'rol inválido "{rol}"')
+    titulo = (fila.get('titulo_especialidad') or '').strip()
+    if rol == 'instructor' and not titulo:
+        raise ValueError('los instructores necesitan titulo_especialidad')
+    return {
+        'nombre_completo': nombre[:100],
+        'email': (fila.get('email') or '').strip().lower(),
+        'rol': rol,
+        'titulo_especialidad': titulo[:100] or None,
+        'password': fila.get('password') or None,
+    }
+
+
+def provisionar(filas: Iterable[dict], rol_por_defecto: str = 'estudiante', lote: int = 1000,
+                procesos: Optional[int] = None) -> Iterator[dict]:
+    """
+    Crea usuarios por lotes a partir de filas de un CSV.
+
+    Columnas: nombre_completo, email, rol (estudiante o instructor),
+    titulo_especialidad y password, todas opcionales salvo el nombre. Si falta el
+    email se usa el institucional. Después de cada lote entrega los totales
+    acumulados y los errores del lote, para que quien llama informe el avance.
+    """
+    iterador = iter(filas)
+    creados = omitidos = leidos = 0
+    inicio = time.monotonic()
+
+    # Los procesos del pool se inician con el primer lote que trae contraseñas
+    pool = crear_pool(procesos)
+    try:
+        while True:
+            bloque = list(islice(iterador, lote))
+            if not bloque:
+                break
+
+            validas, errores = [], []
+            for numero, fila in enumerate(bloque, start=leidos + 1):
+                try:
+                    validas.append(_validar(fila, rol_por_defecto))
+                except ValueError as e:
+                    errores.append(f'Fila {numero}: {e}')
+            leidos += len(bloque)
+
+            usernames = asignar_usernames([username_base(datos['nombre_completo']) for datos in validas])
+            for datos, username in zip(validas, usernames):
+                datos['username'] = username
+                datos['email'] = datos['email'] or f'{username}@{DOMINIO_INSTITUCIONAL}'
+
+            # El email se usa para iniciar sesión: no se crean duplicados, aunque el
+            # existente difiera en mayúsculas (los de las filas ya vienen en minúsculas)
+            existentes = set(Usuario.objects.annotate(email_lower=Lower('email')).filter(
+                email_lower__in=[datos['email'] for datos in validas]
+            ).values_list('email_lower', flat=True))
+            nuevos = []
+            for datos in validas:
+                if datos['email'] in existentes:
+                    errores.append(f'{datos["email"]}: ya existe un usuario con ese correo')
+                    continue
+                existentes.add(datos['email'])
+                nuevos.append(datos)
+
+            hashes = hashear_passwords([datos['password'] for datos in nuevos], pool)
+            usuarios = [
+                Usuario(
+                    username=datos['username'],
+                    email=datos['email'],
+                    nombre_completo=datos['nombre_completo'],
+                    # bulk_create no pasa por Usuario.save()
+                    nombre_busqueda=normalizar_busqueda(datos['nombre_completo'])[:100],
+                    es_estudiante=datos['rol'] == 'estudiante',
+                    es_instructor=datos['rol'] == 'instructor',
+                    titulo_especialidad=datos['titulo_especialidad'],
+                    password=hash_,
+                )
+                for datos, hash_ in zip(nuevos, hashes)
+            ]
+            with transaction.atomic():
+                Usuario.objects.bulk_create(usuarios)
+                # bulk_create no emite señales
+                stats.aplicar(
+                    total_usuarios=len(usuarios),
+                    total_estudiantes=sum(usuario.es_estudiante for usuario in usuarios),
+                    total_instructores=sum(usuario.es_instructor for usuario in usuarios),
+                )
+            creados += len(usuarios)
+            omitidos += len(errores)
+
+            transcurrido = time.monotonic() - inicio
+            yield {
+                'leidos': leidos,
+                'creados': creados,
+                'omitidos': omitidos,
+                # Sólo los errores de este lote, para no acumularlos en memoria
+                'errores': errores,
+                'por_segundo': creados / transcurrido if transcurrido else 0,
+            }
+    finally:
+        if pool is not None:
+            pool.shutdown()
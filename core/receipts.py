@@ -0,0 +1,160 @@
+import glob
+import hashlib
+import json
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from .utils import purchase_receipt_data, render_purchase_receipt
+
+# Cambiarla cuando cambie el diseño del PDF, para regenerar todos los comprobantes
+VERSION_DISENO = 1
+
+
+def directorio() -> Path:
+    return Path(settings.COMPROBANTES_ROOT)
+
+
+def huella(datos: list) -> str:
+    """Hash de los campos que se imprimen en el comprobante (y de la versión del diseño)."""
+    contenido = json.dumps([VERSION_DISENO, datos], ensure_ascii=False)
+    return hashlib.sha256(contenido.encode()).hexdigest()[:20]
+
+
+def ruta(compra_id: int, huella_: str) -> Path:
+    # Subdirectorios por los últimos dígitos para no acumular todo en una carpeta
+    return directorio() / f'{compra_id % 1000:03d}' / f'{compra_id}-{huella_}.pdf'
+
+
+def guardar(compra_id: int, huella_: str, pdf: bytes) -> Path:
+    """
+    Escribe el PDF de forma atómica y borra las versiones anteriores del
+    comprobante de esa compra.
+    """
+    destino = ruta(compra_id, huella_)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporal = destino.with_name(f'{destino.name}.{os.getpid()}.tmp')
+    temporal.write_bytes(pdf)
+    os.replace(temporal, destino)
+    for anterior in glob.glob(str(destino.parent / f'{compra_id}-*.pdf')):
+        if anterior != str(destino):
+            try:
+                os.remove(anterior)
+            except FileNotFoundError:
+                pass
+    return destino
+
+
+def buscar(compra) -> tuple[Optional[Path], str]:
+    """
+    Ruta del comprobante ya guardado para los datos actuales (None si falta) y
+    su huella, sin generar nada.
+    """
+    huella_ = huella(purchase_receipt_data(compra))
+    destino = ruta(compra.id, huella_)
+    return (destino if destino.exists() else None), huella_
+
+
+def obtener(compra) -> tuple[Path, str]:
+    """
+    Ruta del comprobante de la compra y su huella, que sirve como ETag.
+
+    El PDF sólo se genera si no existe uno para los datos actuales; si cambió
+    algún dato impreso (nombre, email, título, monto...) la huella es otra y se
+    genera de nuevo.
+    """
+    datos = purchase_receipt_data(compra)
+    huella_ = huella(datos)
+    destino = ruta(compra.id, huella_)
+    if not destino.exists():
+        destino = guardar(compra.id, huella_, render_purchase_receipt(datos))
+    return destino, huella_
+
+
+class _SalidaZip:
+    """
+    Destino de escritura para zipfile que acumula los bytes hasta que se retiran.
+
+    No tiene tell() ni seek(): zipfile lo trata como un flujo no posicionable y
+    escribe cada entrada con su descriptor de datos, sin volver atrás.
+    """
+
+    def __init__(self):
+        self.partes = []
+
+    def write(self, datos) -> int:
+        self.partes.append(bytes(datos))
+        return len(datos)
+
+    def flush(self) -> None:
+        pass
+
+    def retirar(self) -> bytes:
+        datos = b''.join(self.partes)
+        self.partes = []
+        return datos
+
+
+def comprobantes_zip(compras, pool: Optional[ProcessPoolExecutor] = None, lote: int = 50,
+                     progreso: Optional[Callable[[dict], None]] = None) -> Iterator[bytes]:
+    """
+    Genera un ZIP con los comprobantes de las compras, en trozos de bytes.
+
+    Los comprobantes ya guardados se leen del disco; los que faltan se generan por
+    lotes en el pool y se guardan. Después de cada lote se entregan los bytes
+    escritos hasta el momento, así que el archivo nunca está entero en memoria.
+    `progreso` recibe {procesados, generados, por_segundo} tras cada lote.
+    """
+    salida = _SalidaZip()
+    archivo = zipfile.ZipFile(salida, 'w')
+    iterador = compras.select_related('estudiante', 'curso').iterator(chunk_size=lote)
+    procesados = generados = 0
+    inicio = time.monotonic()
+
+    while True:
+        bloque = list(islice(iterador, lote))
+        if not bloque:
+            break
+        datos = [purchase_receipt_data(compra) for compra in bloque]
+        huellas = [huella(filas) for filas in datos]
+        rutas = [ruta(compra.id, huella_) for compra, huella_ in zip(bloque, huellas)]
+
+        faltantes = [i for i, destino in enumerate(rutas) if not destino.exists()]
+        if faltantes:
+            pendientes = [datos[i] for i in faltantes]
+            if pool is None or len(faltantes) < 2:
+                pdfs = map(render_purchase_receipt, pendientes)
+            else:
+                pdfs = pool.map(render_purchase_receipt, pendientes, chunksize=4)
+            for i, pdf in zip(faltantes, pdfs):
+                rutas[i] = guardar(bloque[i].id, huellas[i], pdf)
+            generados += len(faltantes)
+
+        for compra, destino in zip(bloque, rutas):
+            info = zipfile.ZipInfo(
+                f'comprobante_compra_{compra.id}.pdf',
+                date_time=timezone.localtime(compra.fecha_compra).timetuple()[:6]
+            )
+            # Los PDF ya vienen comprimidos
+            info.compress_type = zipfile.ZIP_STORED
+            archivo.writestr(info, destino.read_bytes())
+        procesados += len(bloque)
+
+        if progreso is not None:
+            transcurrido = time.monotonic() - inicio
+            progreso({
+                'procesados': procesados,
+                'generados': generados,
+                'por_segundo': procesados / transcurrido if transcurrido else 0,
+            })
+        yield salida.retirar()
+
+    archivo.close()
+    yield salida.retirar()
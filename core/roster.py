@@ -0,0 +1,46 @@
+from typing import Optional
+
+from django.db.models import QuerySet
+from django.db.models.functions import Lower
+
+from .directory import filtro_prefijo
+from .models import Compra, normalizar_busqueda
+from .pagination import keyset_page
+
+ROSTER_TAMANO_PAGINA = 50
+
+# Sólo las columnas que muestra la lista de estudiantes del curso
+CAMPOS_ROSTER = (
+    'id',
+    'fecha_compra',
+    'monto_pagado',
+    'estudiante__id',
+    'estudiante__nombre_completo',
+    'estudiante__email',
+)
+
+CAMPOS_BUSQUEDA = {
+    'estudiante__nombre_busqueda': normalizar_busqueda,
+    'email_lower': str.lower,
+}
+
+
+def inscripciones(curso_id: int, texto: str = '') -> QuerySet:
+    """
+    Compras validadas del curso, opcionalmente sólo las de estudiantes cuyo
+    nombre o email empieza por `texto`.
+    """
+    queryset = Compra.objects.filter(curso_id=curso_id, estado_pago='validado')
+    texto = texto.strip()
+    if texto:
+        queryset = queryset.annotate(email_lower=Lower('estudiante__email')).filter(
+            filtro_prefijo(texto, CAMPOS_BUSQUEDA)
+        )
+    return queryset
+
+
+def pagina_roster(curso_id: int, texto: str, cursor: Optional[str],
+                  tamano: int = ROSTER_TAMANO_PAGINA) -> tuple[list, Optional[str]]:
+    """Una página de inscritos, de la inscripción más reciente a la más antigua."""
+    queryset = inscripciones(curso_id, texto).select_related('estudiante').only(*CAMPOS_ROSTER)
+    return keyset_page(queryset, 'fecha_compra', cursor, tamano)
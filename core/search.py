@@ -0,0 +1,149 @@
+import re
+from typing import Iterable
+
+from django.db import connection
+from django.db.models import Q, QuerySet
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+from .models import Curso
+
+TABLA_FTS = 'core_curso_fts'
+RESULTADOS_POR_PAGINA = 20
+
+# Pesos bm25 por columna: titulo, descripcion, instructor
+PESOS_BM25 = (10.0, 1.0, 5.0)
+
+# Marcadores que no pueden aparecer en el texto del usuario; se reemplazan por
+# <mark> después de escapar el HTML
+_INICIO, _FIN = '\x02', '\x03'
+
+
+def disponible() -> bool:
+    """El índice FTS5 sólo existe cuando la base de datos es SQLite."""
+    return connection.vendor == 'sqlite'
+
+
+def construir_consulta(texto: str) -> str:
+    """
+    Convierte el texto del usuario en una consulta FTS5 segura.
+
+    Cada palabra se cita (para que operadores como AND o NEAR no se interpreten)
+    y se busca por prefijo, así "progra" encuentra "programación".
+    """
+    palabras = re.findall(r'\w+', texto)
+    return ' '.join(f'"{palabra}"*' for palabra in palabras)
+
+
+def _resaltar(fragmento: str) -> str:
+    return escape(fragmento).replace(_INICIO, '<mark>').replace(_FIN, '</mark>')
+
+
+def indexar_cursos(ids: Iterable[int]) -> None:
+    """Reemplaza en el índice las filas de los cursos indicados."""
+    ids = list(ids)
+    if not ids or not disponible():
+        return
+    with connection.cursor() as cursor:
+        # Por lotes, para no superar el límite de parámetros de SQLite
+        for inicio in range(0, len(ids), 500):
+            lote = ids[inicio:inicio + 500]
+            marcadores = ', '.join(['%s'] * len(lote))
+            cursor.execute(f"DELETE FROM {TABLA_FTS} WHERE rowid IN ({marcadores})", lote)
+            cursor.execute(
+                f"INSERT INTO {TABLA_FTS}(rowid, titulo, descripcion, instructor) "
+                f"SELECT c.id, c.titulo, c.descripcion, u.nombre_completo "
+                f"FROM core_curso c JOIN core_usuario u ON u.id = c.instructor_id "
+                f"WHERE c.id IN ({marcadores})",
+                lote
+            )
+
+
+def eliminar_curso(curso_id: int) -> None:
+    """Quita un curso del índice."""
+    if not disponible():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLA_FTS} WHERE rowid = %s", [curso_id])
+
+
+def buscar(texto: str, pagina: int = 1, tamano: int = RESULTADOS_POR_PAGINA) -> tuple[list[dict], bool]:
+    """
+    Busca cursos activos ordenados por relevancia (bm25).
+
+    Devuelve los resultados de la página pedida, con el título resaltado y un
+    fragmento de la descripción, y si existe una página siguiente.
+    """
+    consulta = construir_consulta(texto)
+    if not consulta:
+        return [], False
+    if not disponible():
+        return _buscar_sin_indice(texto, pagina, tamano)
+
+    pesos = ', '.join(str(peso) for peso in PESOS_BM25)
+    sql = (
+        f"SELECT c.id, c.precio, c.tipo, f.instructor, "
+        f"highlight({TABLA_FTS}, 0, %s, %s), "
+        f"snippet({TABLA_FTS}, 1, %s, %s, '…', 24) "
+        f"FROM {TABLA_FTS} f JOIN core_curso c ON c.id = f.rowid "
+        f"WHERE {TABLA_FTS} MATCH %s AND c.estado = 'activo' "
+        f"ORDER BY bm25({TABLA_FTS}, {pesos}) "
+        f"LIMIT %s OFFSET %s"
+    )
+    params = [_INICIO, _FIN, _INICIO, _FIN, consulta, tamano + 1, (pagina - 1) * tamano]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        filas = cursor.fetchall()
+
+    resultados = [
+        {
+            'id': curso_id,
+            'precio': precio,
+            'tipo': tipo,
+            'instructor': instructor,
+            'titulo': _resaltar(titulo),
+            'fragmento': _resaltar(fragmento),
+        }
+        for curso_id, precio, tipo, instructor, titulo, fragmento in filas[:tamano]
+    ]
+    return resultados, len(filas) > tamano
+
+
+def _buscar_sin_indice(texto: str, pagina: int, tamano: int) -> tuple[list[dict], bool]:
+    filtro = Q()
+    for palabra in re.findall(r'\w+', texto):
+        filtro &= (
+            Q(titulo__icontains=palabra)
+            | Q(descripcion__icontains=palabra)
+            | Q(instructor__nombre_completo__icontains=palabra)
+        )
+    inicio = (pagina - 1) * tamano
+    cursos = list(
+        Curso.objects.filter(filtro, estado='activo')
+        .values('id', 'precio', 'tipo', 'titulo', 'descripcion', 'instructor__nombre_completo')
+        [inicio:inicio + tamano + 1]
+    )
+    resultados = [
+        {
+            'id': curso['id'],
+            'precio': curso['precio'],
+            'tipo': curso['tipo'],
+            'instructor': curso['instructor__nombre_completo'],
+            'titulo': escape(curso['titulo']),
+            'fragmento': escape(curso['descripcion'][:200]),
+        }
+        for curso in cursos[:tamano]
+    ]
+    return resultados, len(cursos) > tamano
+
+
+def filtrar_queryset(queryset: QuerySet, texto: str) -> QuerySet:
+    """Restringe un queryset de cursos a los que coinciden con el texto."""
+    consulta = construir_consulta(texto)
+    if not consulta:
+        return queryset.none()
+    if not disponible():
+        return queryset.filter(Q(titulo__icontains=texto) | Q(descripcion__icontains=texto))
+    return queryset.filter(
+        pk__in=RawSQL(f"SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s", [consulta])
+    )
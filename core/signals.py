@@ -0,0 +1,231 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import entitlements, instructor_stats, search, stats, ventas, verification
+from .models import Certificado, Compra, Curso, Modulo, PlantillaCertificado, Usuario
+from .storage import liberar, reemplazado
+
+
+# ======= Usuario =======
+# Datos del instructor que se muestran junto a sus cursos
+CAMPOS_PUBLICOS_INSTRUCTOR = ('nombre_completo', 'titulo_especialidad')
+CAMPOS_ROL = ('es_estudiante', 'es_instructor')
+
+
+def _conteos_usuario(usuario: Usuario, signo: int = 1) -> dict:
+    return {
+        'total_usuarios': signo,
+        'total_estudiantes': signo * int(usuario.es_estudiante),
+        'total_instructores': signo * int(usuario.es_instructor),
+    }
+
+
+@receiver(pre_save, sender=Usuario)
+def usuario_antes_de_guardar(sender, instance: Usuario, update_fields=None, **kwargs):
+    """Recuerda los roles y datos públicos anteriores para detectar cambios."""
+    instance._datos_anteriores = None
+    if not instance.pk:
+        return
+    campos = CAMPOS_ROL + CAMPOS_PUBLICOS_INSTRUCTOR
+    # Por ejemplo, el inicio de sesión sólo guarda last_login
+    if update_fields is not None and not set(campos) & set(update_fields):
+        return
+    instance._datos_anteriores = Usuario.objects.filter(pk=instance.pk).values(*campos).first()
+
+
+@receiver(post_save, sender=Usuario)
+def usuario_guardado(sender, instance: Usuario, created, **kwargs):
+    """Actualiza las estadísticas y, si cambió el instructor, sus cursos."""
+    if created:
+        stats.aplicar(**_conteos_usuario(instance))
+        return
+    anteriores = getattr(instance, '_datos_anteriores', None)
+    if anteriores is None:
+        return
+    stats.aplicar(
+        total_estudiantes=int(instance.es_estudiante) - int(anteriores['es_estudiante']),
+        total_instructores=int(instance.es_instructor) - int(anteriores['es_instructor']),
+    )
+
+    cambiados = {
+        campo for campo in CAMPOS_PUBLICOS_INSTRUCTOR
+        if anteriores[campo] != getattr(instance, campo)
+    }
+    if not instance.es_instructor or not cambiados:
+        return
+    cursos = Curso.objects.filter(instructor=instance)
+    # Las páginas y tarjetas de estos cursos muestran al instructor: marcarlos como
+    # modificados invalida sus ETag y sus fragmentos cacheados
+    cursos.update(fecha_actualizacion=timezone.now())
+    if 'nombre_completo' in cambiados:
+        search.indexar_cursos(cursos.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=Usuario)
+def usuario_eliminado(sender, instance: Usuario, **kwargs):
+    stats.aplicar(**_conteos_usuario(instance, signo=-1))
+
+
+# ======= Curso =======
+@receiver(pre_save, sender=Curso)
+def curso_antes_de_guardar(sender, instance: Curso, **kwargs):
+    """
+    Recuerda el instructor anterior (si el curso cambia de manos, cambian los dos
+    paneles) y el PDF que se reemplaza, para soltar su referencia.
+    """
+    instructor_id = pdf_anterior = None
+    if instance.pk:
+        instructor_id, pdf_anterior = Curso.objects.filter(pk=instance.pk).values_list(
+            'instructor_id', 'archivo_pdf'
+        ).first() or (None, None)
+    instance._instructor_anterior = instructor_id
+    instance._archivo_reemplazado = reemplazado(instance.archivo_pdf, pdf_anterior)
+
+
+@receiver(post_save, sender=Curso)
+def curso_guardado(sender, instance: Curso, created, **kwargs):
+    """Mantiene al día el índice de búsqueda y las estadísticas."""
+    search.indexar_cursos([instance.pk])
+    if created:
+        stats.aplicar(total_cursos=1)
+    instructor_stats.invalidar([instance.instructor_id, getattr(instance, '_instructor_anterior', None)])
+    liberar(getattr(instance, '_archivo_reemplazado', None))
+
+
+@receiver(post_delete, sender=Curso)
+def curso_eliminado(sender, instance: Curso, **kwargs):
+    search.eliminar_curso(instance.pk)
+    stats.aplicar(total_cursos=-1)
+    instructor_stats.invalidar([instance.instructor_id])
+    liberar(instance.archivo_pdf.name)
+
+
+# ======= Modulo =======
+@receiver(post_save, sender=Modulo)
+@receiver(post_delete, sender=Modulo)
+def modulo_cambiado(sender, instance: Modulo, **kwargs):
+    """El detalle del curso lista sus módulos: cambiar uno modifica el curso."""
+    Curso.objects.filter(pk=instance.curso_id).update(fecha_actualizacion=timezone.now())
+
+
+# ======= Compra =======
+def _aporte_compra(estado_pago, monto_pagado, signo: int = 1) -> dict:
+    """Lo que una compra suma a las estadísticas: sólo cuentan las validadas."""
+    if estado_pago != 'validado':
+        return {}
+    return {'total_compras': signo, 'total_ingresos': signo * monto_pagado}
+
+
+@receiver(pre_save, sender=Compra)
+def compra_antes_de_guardar(sender, instance: Compra, **kwargs):
+    """Recuerda el estado, el monto, el curso y la fecha anteriores de la compra."""
+    instance._datos_anteriores = None
+    if instance.pk:
+        instance._datos_anteriores = Compra.objects.filter(pk=instance.pk).values(
+            'estado_pago', 'monto_pagado', 'curso_id', 'fecha_compra'
+        ).first()
+
+
+def _aplicar_venta(datos: dict, signo: int) -> None:
+    aporte = _aporte_compra(datos['estado_pago'], datos['monto_pagado'], signo)
+    if aporte:
+        ventas.aplicar(datos['curso_id'], ventas.dia_de(datos['fecha_compra']),
+                       aporte['total_compras'], aporte['total_ingresos'])
+
+
+def _datos_compra(compra: Compra) -> dict:
+    return {
+        'estado_pago': compra.estado_pago,
+        'monto_pagado': compra.monto_pagado,
+        'curso_id': compra.curso_id,
+        'fecha_compra': compra.fecha_compra,
+    }
+
+
+@receiver(post_save, sender=Compra)
+def compra_guardada(sender, instance: Compra, **kwargs):
+    """Aplica a las estadísticas y a las ventas diarias el cambio de aporte de la compra."""
+    anteriores = getattr(instance, '_datos_anteriores', None)
+    actuales = _datos_compra(instance)
+    if anteriores == actuales:
+        return
+    deltas = _aporte_compra(instance.estado_pago, instance.monto_pagado)
+    if anteriores:
+        for campo, valor in _aporte_compra(anteriores['estado_pago'], anteriores['monto_pagado'], -1).items():
+            deltas[campo] = deltas.get(campo, 0) + valor
+        _aplicar_venta(anteriores, -1)
+    stats.aplicar(**deltas)
+    _aplicar_venta(actuales, 1)
+    # Los paneles de instructor sólo cuentan compras validadas
+    if 'validado' in (instance.estado_pago, (anteriores or {}).get('estado_pago')):
+        instructor_stats.invalidar_por_cursos([instance.curso_id, (anteriores or {}).get('curso_id')])
+
+
+@receiver(post_delete, sender=Compra)
+def compra_eliminada(sender, instance: Compra, **kwargs):
+    stats.aplicar(**_aporte_compra(instance.estado_pago, instance.monto_pagado, -1))
+    _aplicar_venta(_datos_compra(instance), -1)
+    if instance.estado_pago == 'validado':
+        instructor_stats.invalidar_por_cursos([instance.curso_id])
+
+
+@receiver(post_save, sender=Compra)
+@receiver(post_delete, sender=Compra)
+def compra_cambiada(sender, instance: Compra, **kwargs):
+    """Invalida los accesos cacheados del estudiante de la compra."""
+    # Tras el commit, para que otra petición no vuelva a cachear el estado anterior
+    estudiante_id = instance.estudiante_id
+    transaction.on_commit(lambda: entitlements.invalidar(estudiante_id))
+
+
+# ======= Certificado =======
+@receiver(pre_save, sender=Certificado)
+def certificado_antes_de_guardar(sender, instance: Certificado, **kwargs):
+    """
+    Recuerda el código anterior (si se cambia desde el admin, el viejo deja de ser
+    válido) y el PDF que se reemplaza, para soltar su referencia.
+    """
+    codigo_anterior = archivo_anterior = None
+    if instance.pk:
+        codigo_anterior, archivo_anterior = Certificado.objects.filter(pk=instance.pk).values_list(
+            'codigo_unico_pdf', 'archivo'
+        ).first() or (None, None)
+    instance._codigo_anterior = codigo_anterior
+    instance._archivo_reemplazado = reemplazado(instance.archivo, archivo_anterior)
+
+
+@receiver(post_save, sender=Certificado)
+@receiver(post_delete, sender=Certificado)
+def certificado_cambiado(sender, instance: Certificado, **kwargs):
+    """Descarta la verificación cacheada del código (y del anterior, si cambió)."""
+    codigos = {instance.codigo_unico_pdf, getattr(instance, '_codigo_anterior', None)} - {None}
+
+    def invalidar():
+        for codigo in codigos:
+            verification.invalidar(codigo)
+    transaction.on_commit(invalidar)
+
+
+# ======= PDF de plantillas y certificados =======
+@receiver(pre_save, sender=PlantillaCertificado)
+def plantilla_antes_de_guardar(sender, instance: PlantillaCertificado, **kwargs):
+    """Recuerda el PDF que se reemplaza, para soltar su referencia."""
+    anterior = None
+    if instance.pk:
+        anterior = PlantillaCertificado.objects.filter(pk=instance.pk).values_list('archivo', flat=True).first()
+    instance._archivo_reemplazado = reemplazado(instance.archivo, anterior)
+
+
+@receiver(post_save, sender=Certificado)
+@receiver(post_save, sender=PlantillaCertificado)
+def archivo_guardado(sender, instance, **kwargs):
+    liberar(getattr(instance, '_archivo_reemplazado', None))
+
+
+@receiver(post_delete, sender=Certificado)
+@receiver(post_delete, sender=PlantillaCertificado)
+def archivo_eliminado(sender, instance, **kwargs):
+    """Suelta la referencia al PDF; se borra del disco cuando nadie más lo usa."""
+    liberar(instance.archivo.name)
@@ -0,0 +1,78 @@
+import re
+from functools import reduce
+from operator import or_
+from typing import Iterable
+
+from django.db.models import Model, Q
+from django.utils.text import slugify
+
+# Espacio reservado para el sufijo "-N" dentro del largo máximo del campo
+RESERVA_SUFIJO = 6
+
+# Bases consultadas por cada SELECT en la asignación masiva
+BASES_POR_CONSULTA = 100
+
+
+def slug_base(texto: str, max_length: int = 50) -> str:
+    """Slug sin sufijo, recortado para que siempre quepa un "-N"."""
+    base = slugify(texto)[:max_length - RESERVA_SUFIJO].strip('-')
+    return base or 'curso'
+
+
+def _slugs_tomados(model: type[Model], bases: Iterable[str], field: str) -> set[str]:
+    """
+    Slugs existentes que podrían chocar con alguna de las bases, en una sola consulta.
+
+    Sólo se traen los que tienen la forma de un candidato ("base" o "base-N"):
+    los de otros títulos que empiezan por "base-" (p. ej. "python-avanzado"
+    para la base "python") no chocan y podrían ser muchos.
+    """
+    bases = set(bases)
+    if not bases:
+        return set()
+    filtro = reduce(or_, (
+        Q(**{f'{field}__regex': rf'^{re.escape(base)}(-\d+)?$'})
+        for base in bases
+    ))
+    return set(model._default_manager.filter(filtro).values_list(field, flat=True))
+
+
+def _primer_libre(base: str, tomados: set[str]) -> str:
+    slug, n = base, 0
+    while slug in tomados:
+        n += 1
+        slug = f'{base}-{n}'
+    return slug
+
+
+def siguiente_slug(model: type[Model], texto: str, field: str = 'slug') -> str:
+    """Primer slug libre para `texto`: "base", "base-1", "base-2"..."""
+    base = slug_base(texto, model._meta.get_field(field).max_length)
+    return _primer_libre(base, _slugs_tomados(model, [base], field))
+
+
+def asignar_slugs(model: type[Model], instancias: Iterable[Model], texto_field: str = 'titulo',
+                  field: str = 'slug') -> None:
+    """
+    Asigna slugs únicos a un lote de instancias nuevas (p. ej. antes de bulk_create).
+
+    Se hace una consulta por cada BASES_POR_CONSULTA bases distintas y los
+    sufijos se reparten en memoria, así dos cursos del lote con el mismo título
+    también reciben slugs distintos.
+    """
+    max_length = model._meta.get_field(field).max_length
+    pendientes = [
+        (instancia, slug_base(getattr(instancia, texto_field), max_length))
+        for instancia in instancias
+        if not getattr(instancia, field)
+    ]
+    bases = list({base for _, base in pendientes})
+
+    tomados = set()
+    for inicio in range(0, len(bases), BASES_POR_CONSULTA):
+        tomados |= _slugs_tomados(model, bases[inicio:inicio + BASES_POR_CONSULTA], field)
+
+    for instancia, base in pendientes:
+        slug = _primer_libre(base, tomados)
+        tomados.add(slug)
+        setattr(instancia, field, slug)
@@ -0,0 +1,90 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import Compra, Curso, EstadisticasPlataforma, Usuario
+
+CAMPOS = (
+    'total_usuarios',
+    'total_estudiantes',
+    'total_instructores',
+    'total_cursos',
+    'total_compras',
+    'total_ingresos',
+)
+
+# La tabla tiene una sola fila
+PK = 1
+
+
+def calcular() -> dict:
+    """Calcula todos los totales desde cero recorriendo las tablas."""
+    usuarios = Usuario.objects.aggregate(
+        total_usuarios=Count('id'),
+        total_estudiantes=Count('id', filter=Q(es_estudiante=True)),
+        total_instructores=Count('id', filter=Q(es_instructor=True)),
+    )
+    compras = Compra.objects.filter(estado_pago='validado').aggregate(
+        total_compras=Count('id'),
+        total_ingresos=Sum('monto_pagado'),
+    )
+    return {
+        **usuarios,
+        'total_cursos': Curso.objects.count(),
+        'total_compras': compras['total_compras'],
+        'total_ingresos': compras['total_ingresos'] or Decimal('0'),
+    }
+
+
+def obtener() -> EstadisticasPlataforma:
+    """Devuelve la fila de estadísticas, creándola si todavía no existe."""
+    estadisticas = EstadisticasPlataforma.objects.filter(pk=PK).first()
+    if estadisticas is None:
+        estadisticas, _ = EstadisticasPlataforma.objects.get_or_create(pk=PK, defaults=calcular())
+    return estadisticas
+
+
+def aplicar(**deltas) -> None:
+    """
+    Suma los deltas a los totales con un UPDATE atómico.
+
+    Se llama desde las señales, dentro de la misma transacción que el cambio que
+    lo origina; si ésta se revierte, el contador también.
+    """
+    deltas = {campo: valor for campo, valor in deltas.items() if valor}
+    if not deltas:
+        return
+    actualizadas = EstadisticasPlataforma.objects.filter(pk=PK).update(
+        fecha_actualizacion=timezone.now(),
+        **{campo: F(campo) + valor for campo, valor in deltas.items()}
+    )
+    if not actualizadas:
+        # Sin fila todavía: se crea calculando desde cero (ya incluye este cambio)
+        obtener()
+
+
+def reconciliar(corregir: bool = True) -> dict:
+    """
+    Recalcula los totales y devuelve las diferencias con los guardados.
+
+    El resultado es {campo: (guardado, real)} sólo para los campos con deriva.
+
+    La fila queda bloqueada mientras se cuenta: un aplicar() concurrente espera
+    y suma su delta sobre el total corregido, en lugar de perderse al escribirlo.
+    """
+    obtener()
+    with transaction.atomic():
+        # SQLite ignora SELECT ... FOR UPDATE: el UPDATE sin cambios toma el bloqueo de escritura
+        EstadisticasPlataforma.objects.filter(pk=PK).update(fecha_actualizacion=F('fecha_actualizacion'))
+        estadisticas = EstadisticasPlataforma.objects.select_for_update().get(pk=PK)
+        reales = calcular()
+        deriva = {
+            campo: (getattr(estadisticas, campo), reales[campo])
+            for campo in CAMPOS
+            if getattr(estadisticas, campo) != reales[campo]
+        }
+        if deriva and corregir:
+            EstadisticasPlataforma.objects.filter(pk=PK).update(fecha_actualizacion=timezone.now(), **reales)
+    return deriva
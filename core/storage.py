@@ -0,0 +1,212 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.db import IntegrityError, transaction
+from django.db.models.fields.files import FieldFile
+from django.db.models import F
+from django.utils._os import safe_join
+from django.utils.functional import cached_property
+
+# Este módulo lo importa models.py: los modelos se importan dentro de los métodos.
+
+# Carpeta de MEDIA_PROTEGIDA_ROOT con los archivos guardados por contenido
+DIRECTORIO = 'contenido'
+
+
+class AlmacenamientoDeduplicado(FileSystemStorage):
+    """
+    Guarda cada archivo una sola vez, con el hash SHA-256 de su contenido como nombre.
+
+    El hash se calcula mientras el archivo se copia a disco, sin leerlo dos veces.
+    Cada save() suma una referencia en ArchivoAlmacenado y cada delete() la
+    resta; el archivo se borra del disco cuando no le quedan referencias.
+
+    Los archivos se guardan en MEDIA_PROTEGIDA_ROOT, que no se publica en
+    MEDIA_URL: sólo se entregan desde las vistas que verifican el acceso (ver
+    delivery.entregar). Los nombres anteriores a este almacenamiento (fuera de
+    DIRECTORIO) siguen en MEDIA_ROOT, donde se leen y se borran directamente.
+    """
+
+    @cached_property
+    def base_location(self):
+        return self._value_or_setting(self._location, settings.MEDIA_PROTEGIDA_ROOT)
+
+    def _clear_cached_properties(self, setting, **kwargs):
+        super()._clear_cached_properties(setting, **kwargs)
+        if setting == 'MEDIA_PROTEGIDA_ROOT':
+            self.__dict__.pop('base_location', None)
+            self.__dict__.pop('location', None)
+
+    def path(self, name):
+        if name.startswith(f'{DIRECTORIO}/'):
+            return super().path(name)
+        return safe_join(settings.MEDIA_ROOT, name)
+
+    def url(self, name):
+        if name.startswith(f'{DIRECTORIO}/'):
+            raise ValueError('Los PDF protegidos no tienen URL pública.')
+        return super().url(name)
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre definitivo lo decide _save a partir del contenido
+        return name
+
+    def _temporal(self) -> str:
+        temporales = Path(self.location) / DIRECTORIO / '.tmp'
+        temporales.mkdir(parents=True, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=temporales, suffix='.part')
+        os.close(descriptor)
+        return temporal
+
+    def _save(self, name, content):
+        temporal = self._temporal()
+        suma = hashlib.sha256()
+        tamano = 0
+        try:
+            with open(temporal, 'wb') as salida:
+                for trozo in content.chunks():
+                    suma.update(trozo)
+                    salida.write(trozo)
+                    tamano += len(trozo)
+            return self._registrar(temporal, name, suma.hexdigest(), tamano)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+
+    def guardar_calculado(self, ruta, name, huella: str) -> str:
+        """
+        Guarda un archivo que ya está en disco y cuyo SHA-256 ya se calculó (p. ej.
+        una subida por trozos), moviéndolo en lugar de copiarlo y leerlo de nuevo.
+        """
+        temporal = self._temporal()
+        try:
+            try:
+                os.replace(ruta, temporal)
+            except OSError:
+                # En otro sistema de archivos no se puede mover: se copia
+                shutil.copyfile(ruta, temporal)
+            return self._registrar(temporal, name, huella, os.path.getsize(temporal))
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+
+    def _registrar(self, temporal: str, name, huella: str, tamano: int) -> str:
+        """Suma la referencia del archivo `temporal` y lo mueve a su nombre definitivo."""
+        from .models import ArchivoAlmacenado
+
+        extension = os.path.splitext(name)[1].lower()
+        # La referencia y el archivo se resuelven en la misma transacción que
+        # delete(), para que un borrado simultáneo no elimine el archivo recién
+        # referenciado
+        with transaction.atomic():
+            existentes = ArchivoAlmacenado.objects.filter(huella=huella)
+            if not existentes.update(referencias=F('referencias') + 1):
+                try:
+                    with transaction.atomic():
+                        ArchivoAlmacenado.objects.create(
+                            huella=huella,
+                            nombre=f'{DIRECTORIO}/{huella[:2]}/{huella[2:4]}/{huella}{extension}',
+                            tamano=tamano,
+                            referencias=1,
+                        )
+                except IntegrityError:
+                    # Otro proceso lo registró entre el UPDATE y el INSERT
+                    existentes.update(referencias=F('referencias') + 1)
+            nombre = existentes.values_list('nombre', flat=True).get()
+            destino = self.path(nombre)
+            if os.path.exists(destino):
+                os.remove(temporal)
+            else:
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                os.replace(temporal, destino)
+                if self.file_permissions_mode is not None:
+                    os.chmod(destino, self.file_permissions_mode)
+        return nombre
+
+    def retener(self, name):
+        """Suma una referencia a un archivo ya guardado que pasa a usar otro registro."""
+        from .models import ArchivoAlmacenado
+
+        if name and name.startswith(f'{DIRECTORIO}/'):
+            ArchivoAlmacenado.objects.filter(nombre=name).update(referencias=F('referencias') + 1)
+
+    def delete(self, name):
+        from .models import ArchivoAlmacenado
+
+        if not name:
+            return
+        if not name.startswith(f'{DIRECTORIO}/'):
+            return super().delete(name)
+        with transaction.atomic():
+            ArchivoAlmacenado.objects.filter(nombre=name, referencias__gt=0).update(
+                referencias=F('referencias') - 1
+            )
+            sin_referencias, _ = ArchivoAlmacenado.objects.filter(nombre=name, referencias=0).delete()
+            if sin_referencias:
+                super().delete(name)
+
+
+class ArchivoPDF(FieldFile):
+    def save(self, name, content, save=True):
+        # Cada save() suma una referencia aunque el contenido (y el nombre) no cambie:
+        # el registro tiene que soltar la que ya tenía (ver reemplazado()). La marca
+        # va en el FieldFile que queda en el registro, que FieldFile.save() reemplaza
+        super().save(name, content, save=False)
+        getattr(self.instance, self.field.attname)._asignado = True
+        if save:
+            self.instance.save()
+
+
+class CampoPDF(models.FileField):
+    """FileField cuyos archivos guardan por contenido y llevan la cuenta de referencias."""
+
+    attr_class = ArchivoPDF
+
+
+@lru_cache(maxsize=None)
+def almacenamiento_pdf() -> AlmacenamientoDeduplicado:
+    """Almacenamiento de los PDF subidos y emitidos (material de cursos, plantillas y certificados)."""
+    return AlmacenamientoDeduplicado()
+
+
+def liberar(nombre: str) -> None:
+    """Suelta una referencia a un PDF al terminar la transacción en curso (si se confirma)."""
+    if nombre:
+        transaction.on_commit(lambda: almacenamiento_pdf().delete(nombre))
+
+
+def asignar(archivo, nombre: str) -> None:
+    """
+    Asocia a un campo un PDF ya guardado (p. ej. una subida por trozos terminada).
+
+    El registro suma su propia referencia en ese momento; al guardarse suelta la
+    del archivo que tenía antes, aunque sea el mismo contenido (ver reemplazado()).
+    """
+    almacenamiento_pdf().retener(nombre)
+    archivo.name = nombre
+    archivo._asignado = True
+
+
+def reemplazado(archivo, anterior: Optional[str]) -> Optional[str]:
+    """
+    Nombre del PDF que un registro deja de usar al guardarse con `archivo`, o None.
+
+    Se suelta la referencia anterior si cambió el nombre, si llega un archivo
+    nuevo sin guardar o si el archivo se guardó o se asignó desde el último
+    save() del registro: en esos casos el registro sumó otra referencia aunque
+    el contenido (y el nombre) sea igual.
+    """
+    asignado = archivo.__dict__.pop('_asignado', False)
+    if anterior and (archivo.name != anterior or (archivo and not archivo._committed) or asignado):
+        return anterior
+    return None
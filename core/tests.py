@@ -1,3 +1,282 @@
-from django.test import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import QuerySet
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+
+from . import jobs, uploads
+from .models import ArchivoAlmacenado, Compra, Curso, TrabajoPDF, Usuario
+
+PDF = b'%PDF-1.4 material del curso'
+OTRO_PDF = b'%PDF-1.4 otro material'
+
+
+class PDFTestCase(TestCase):
+    """Media en un directorio temporal y un instructor con sesión iniciada."""
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=os.path.join(self.media, 'publica'),
+                                    MEDIA_PROTEGIDA_ROOT=os.path.join(self.media, 'protegida'),
+                                    SUBIDAS_ROOT=os.path.join(self.media, 'subidas'),
+                                    # Accesos y estadísticas cacheados no pasan de una prueba a otra
+                                    CACHES={**settings.CACHES, 'default': {
+                                        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                                        'LOCATION': self.id(),
+                                    }})
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.instructor = Usuario.objects.create_user(
+            username='ana', password='x', nombre_completo='Ana Pérez', es_instructor=True
+        )
+        self.client = Client()
+        self.client.force_login(self.instructor)
+
+    def crear_curso(self, titulo, contenido=PDF):
+        with self.captureOnCommitCallbacks(execute=True):
+            curso = Curso.objects.create(instructor=self.instructor, titulo=titulo, descripcion='d',
+                                         precio=10, tipo='grabado')
+            curso.archivo_pdf.save('material.pdf', ContentFile(contenido))
+        return curso
+
+
+class ReferenciasPDFTests(PDFTestCase):
+    """Cada registro que usa un PDF del almacenamiento por contenido suma una referencia."""
+
+    def referencias(self, nombre):
+        return ArchivoAlmacenado.objects.filter(nombre=nombre).values_list('referencias', flat=True).first()
+
+    def subir(self, contenido):
+        respuesta = self.client.post('/subidas/', {'destino': 'curso', 'nombre': 'm.pdf', 'tamano': len(contenido)},
+                                     content_type='application/json')
+        subida = respuesta.json()
+        respuesta = self.client.generic('PATCH', subida['url'], contenido,
+                                        content_type='application/offset+octet-stream', HTTP_UPLOAD_OFFSET='0')
+        self.assertTrue(respuesta.json()['completa'])
+        return subida['id']
+
+    def editar(self, curso, **datos):
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post(f'/instructor/curso/{curso.pk}/editar/', {
+                'titulo': curso.titulo, 'descripcion': 'd', 'precio': '10', 'tipo': 'grabado',
+                'instructor': self.instructor.pk, **datos,
+            })
+        self.assertEqual(respuesta.status_code, 302)
+        curso.refresh_from_db()
+
+    def test_crear_comparte_el_archivo(self):
+        a = self.crear_curso('A')
+        b = self.crear_curso('B')
+        self.assertEqual(a.archivo_pdf.name, b.archivo_pdf.name)
+        self.assertEqual(self.referencias(a.archivo_pdf.name), 2)
+
+    def test_reemplazar_suelta_la_referencia_anterior(self):
+        a = self.crear_curso('A')
+        self.crear_curso('B')
+        anterior = a.archivo_pdf.name
+        with self.captureOnCommitCallbacks(execute=True):
+            a.archivo_pdf.save('nuevo.pdf', ContentFile(OTRO_PDF))
+        self.assertEqual(self.referencias(anterior), 1)
+        self.assertEqual(self.referencias(a.archivo_pdf.name), 1)
+
+    def test_reemplazar_con_el_mismo_contenido_no_suma(self):
+        a = self.crear_curso('A')
+        with self.captureOnCommitCallbacks(execute=True):
+            a.archivo_pdf.save('otra-vez.pdf', ContentFile(PDF))
+        self.assertEqual(self.referencias(a.archivo_pdf.name), 1)
+
+    def test_subida_por_trozos_del_mismo_contenido(self):
+        a = self.crear_curso('A')
+        b = self.crear_curso('B')
+        nombre = a.archivo_pdf.name
+        with self.captureOnCommitCallbacks(execute=True):
+            subida = self.subir(PDF)
+        self.assertEqual(self.referencias(nombre), 3)
+
+        self.editar(a, subida_pdf=subida)
+        self.assertEqual(a.archivo_pdf.name, nombre)
+        self.assertEqual(self.referencias(nombre), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            a.delete()
+            b.delete()
+        self.assertIsNone(self.referencias(nombre))
+        self.assertFalse(os.path.exists(os.path.join(self.media, 'protegida', nombre)))
+
+    def test_subida_por_trozos_de_otro_contenido(self):
+        a = self.crear_curso('A')
+        anterior = a.archivo_pdf.name
+        with self.captureOnCommitCallbacks(execute=True):
+            subida = self.subir(OTRO_PDF)
+        self.editar(a, subida_pdf=subida)
+        self.assertNotEqual(a.archivo_pdf.name, anterior)
+        self.assertIsNone(self.referencias(anterior))
+        self.assertEqual(self.referencias(a.archivo_pdf.name), 1)
+
+    def test_editar_sin_cambiar_el_archivo(self):
+        a = self.crear_curso('A')
+        self.editar(a, titulo='A2')
+        self.assertEqual(self.referencias(a.archivo_pdf.name), 1)
+
+    def test_eliminar_borra_el_archivo_sin_referencias(self):
+        a = self.crear_curso('A')
+        b = self.crear_curso('B')
+        nombre = a.archivo_pdf.name
+        with self.captureOnCommitCallbacks(execute=True):
+            a.delete()
+        self.assertEqual(self.referencias(nombre), 1)
+        self.assertTrue(os.path.exists(os.path.join(self.media, 'protegida', nombre)))
+        with self.captureOnCommitCallbacks(execute=True):
+            b.delete()
+        self.assertIsNone(self.referencias(nombre))
+        self.assertFalse(os.path.exists(os.path.join(self.media, 'protegida', nombre)))
+
+
+
+
+class SubidaPorTrozosTests(PDFTestCase):
+    """El SHA-256 se calcula mientras llegan los trozos, aunque lleguen a otro proceso."""
+
+    def enviar(self, subida, desplazamiento, trozo):
+        respuesta = self.client.generic('PATCH', subida['url'], trozo, content_type='application/offset+octet-stream',
+                                        HTTP_UPLOAD_OFFSET=str(desplazamiento))
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json()
+
+    def test_huella_por_trozos(self):
+        contenido = PDF + os.urandom(3 * uploads.BLOQUE_LECTURA + 17)
+        subida = self.client.post('/subidas/', {'destino': 'curso', 'nombre': 'm.pdf', 'tamano': len(contenido)},
+                                  content_type='application/json').json()
+        cortes = [0, 5, uploads.BLOQUE_LECTURA, 2 * uploads.BLOQUE_LECTURA + 3, len(contenido)]
+        for numero, (inicio, fin) in enumerate(zip(cortes, cortes[1:])):
+            if numero == 2:
+                # El trozo siguiente llega a otro proceso, sin el hash parcial en memoria
+                uploads._sumas.clear()
+            estado = self.enviar(subida, inicio, contenido[inicio:fin])
+        self.assertTrue(estado['completa'])
+
+        archivo = uploads.SubidaArchivo.objects.get(pk=subida['id']).archivo
+        self.assertIn(hashlib.sha256(contenido).hexdigest(), archivo)
+        with open(os.path.join(self.media, 'protegida', archivo), 'rb') as f:
+            self.assertEqual(f.read(), contenido)
+        self.assertFalse(os.listdir(os.path.join(self.media, 'subidas')))
+
+
+class EntregaMaterialTests(PDFTestCase):
+    """El material de los cursos sólo sale por la vista que verifica el acceso."""
+
+    def test_material_fuera_de_media_root(self):
+        curso = self.crear_curso('A')
+        self.assertTrue(curso.archivo_pdf.path.startswith(os.path.join(self.media, 'protegida') + os.sep))
+        self.assertFalse(os.path.exists(os.path.join(self.media, 'publica', curso.archivo_pdf.name)))
+        with self.assertRaises(ValueError):
+            curso.archivo_pdf.url
+
+    def test_entrega_con_acceso(self):
+        curso = self.crear_curso('A')
+        estudiante = Usuario.objects.create_user(username='eva', password='x', nombre_completo='Eva', es_estudiante=True)
+        cliente = Client()
+        cliente.force_login(estudiante)
+        url = f'/cursos/{curso.pk}/material/'
+        self.assertEqual(cliente.get(url).status_code, 302)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Compra.objects.create(estudiante=estudiante, curso=curso, monto_pagado=10, estado_pago='validado')
+        respuesta = cliente.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(b''.join(respuesta.streaming_content), PDF)
+
+        with self.settings(MEDIA_PROTEGIDA_ENTREGA='x-accel-redirect'):
+            respuesta = cliente.get(url)
+        self.assertEqual(respuesta['X-Accel-Redirect'], f'/media-protegida/{curso.archivo_pdf.name}')
+
+
+class ColaTrabajosTests(TestCase):
+    """Reserva, reintentos y recuperación de los trabajos de la cola."""
+
+    def encolar(self, objeto_id=1):
+        return jobs.encolar('comprobante', objeto_id)
+
+    def test_un_trabajo_se_reserva_una_sola_vez(self):
+        primero, segundo = self.encolar(1), self.encolar(2)
+        update = QuerySet.update
+        adelantado = {}
+
+        def otro_worker_primero(queryset, **campos):
+            # Entre la lectura de candidatos de "a" y su UPDATE, "b" reserva el primero
+            if not adelantado:
+                adelantado['b'] = None
+                adelantado['b'] = jobs.tomar('b')
+            return update(queryset, **campos)
+
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=otro_worker_primero):
+            tomado = jobs.tomar('a')
+        self.assertEqual(adelantado['b'].pk, primero.pk)
+        self.assertEqual(tomado.pk, segundo.pk)
+        primero.refresh_from_db()
+        self.assertEqual((primero.worker, primero.intentos), ('b', 1))
+        self.assertIsNone(jobs.tomar('c'))
+
+    def test_reintenta_y_luego_falla(self):
+        trabajo = self.encolar()
+
+        def falla(trabajo, procesos):
+            raise RuntimeError('sin disco')
+
+        with mock.patch.dict(jobs.MANEJADORES, {'comprobante': falla}), self.assertLogs('core.jobs', 'ERROR'):
+            for intento in range(1, trabajo.max_intentos + 1):
+                tomado = jobs.tomar('a')
+                self.assertEqual((tomado.pk, tomado.intentos), (trabajo.pk, intento))
+                jobs.procesar(tomado)
+                trabajo.refresh_from_db()
+                if intento < trabajo.max_intentos:
+                    self.assertEqual(trabajo.estado, 'pendiente')
+                    self.assertGreater(trabajo.disponible_desde, timezone.now())
+                    # Antes de la espera no se vuelve a tomar
+                    self.assertIsNone(jobs.tomar('a'))
+                    TrabajoPDF.objects.filter(pk=trabajo.pk).update(disponible_desde=timezone.now())
+        self.assertEqual(trabajo.estado, 'fallido')
+        self.assertIn('sin disco', trabajo.error)
+        self.assertIsNone(jobs.tomar('a'))
+
+    def test_recupera_trabajo_abandonado(self):
+        trabajo = self.encolar()
+        tomado = jobs.tomar('a')
+        self.assertEqual(jobs.recuperar_abandonados(), 0)
+
+        # Un trabajo largo que sigue dando latidos no se da por abandonado
+        TrabajoPDF.objects.filter(pk=trabajo.pk).update(fecha_inicio=timezone.now() - jobs.TIEMPO_MAXIMO * 2)
+        jobs.latido(tomado)
+        self.assertEqual(jobs.recuperar_abandonados(), 0)
+
+        TrabajoPDF.objects.filter(pk=trabajo.pk).update(fecha_inicio=timezone.now() - jobs.TIEMPO_MAXIMO * 2)
+        self.assertEqual(jobs.recuperar_abandonados(), 1)
+        tomado = jobs.tomar('b')
+        self.assertEqual((tomado.pk, tomado.worker, tomado.intentos), (trabajo.pk, 'b', 2))
+
+    def test_abandonado_sin_intentos_falla(self):
+        trabajo = self.encolar()
+        TrabajoPDF.objects.filter(pk=trabajo.pk).update(max_intentos=1)
+        jobs.tomar('a')
+        TrabajoPDF.objects.filter(pk=trabajo.pk).update(fecha_inicio=timezone.now() - timedelta(days=1))
+        self.assertEqual(jobs.recuperar_abandonados(), 1)
+        trabajo.refresh_from_db()
+        self.assertEqual(trabajo.estado, 'fallido')
+
+    def test_atender_recupera_aunque_haya_cola(self):
+        abandonado = self.encolar(1)
+        jobs.tomar('muerto')
+        TrabajoPDF.objects.filter(pk=abandonado.pk).update(fecha_inicio=timezone.now() - timedelta(days=1))
+        self.encolar(2)
+
+        with mock.patch.dict(jobs.MANEJADORES, {'comprobante': lambda trabajo, procesos: 'listo'}):
+            self.assertEqual(jobs.atender('a', hasta_vaciar=True), 2)
+        self.assertFalse(TrabajoPDF.objects.exclude(estado='terminado').exists())
@@ -0,0 +1,351 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+from pathlib import Path
+from typing import BinaryIO
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.files.uploadedfile import UploadedFile
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_http_methods, require_POST
+
+from .models import Curso, PlantillaCertificado, SubidaArchivo
+from .storage import liberar
+
+MB = 1024 * 1024
+
+# Tamaño máximo del archivo según su destino
+LIMITES = {
+    'curso': 100 * MB,
+    'plantilla': 5 * MB,
+}
+
+# Campo al que se asocia el archivo terminado; define el almacenamiento donde se guarda
+CAMPOS = {
+    'curso': Curso._meta.get_field('archivo_pdf'),
+    'plantilla': PlantillaCertificado._meta.get_field('archivo'),
+}
+
+# El navegador envía trozos de TAMANO_TROZO; el servidor acepta hasta TAMANO_TROZO_MAX
+TAMANO_TROZO = 1 * MB
+TAMANO_TROZO_MAX = 8 * MB
+
+# Bytes leídos del cuerpo de la petición por vez
+BLOQUE_LECTURA = 64 * 1024
+
+MAGIA_PDF = b'%PDF-'
+
+# Las subidas sin actividad durante este tiempo se descartan (ver limpiar_huerfanos)
+VIGENCIA = timedelta(days=1)
+
+# Subidas en curso cuyo SHA-256 parcial se recuerda en cada proceso
+SUMAS_EN_MEMORIA = 64
+
+# subida.pk -> (bytes incluidos, hash de esos bytes). Si el trozo siguiente llega a
+# otro proceso, ése retoma el hash leyendo lo ya recibido del archivo parcial
+_sumas: OrderedDict = OrderedDict()
+_sumas_lock = threading.Lock()
+
+
+class SubidaInvalida(ValueError):
+    """La subida o el trozo no cumplen las condiciones; el mensaje es para el usuario."""
+    status = 400
+
+
+class SubidaDemasiadoGrande(SubidaInvalida):
+    status = 413
+
+
+class DesplazamientoInvalido(Exception):
+    """El trozo no empieza donde termina lo recibido: el cliente debe reanudar desde `recibido`."""
+
+    def __init__(self, recibido: int):
+        super().__init__(f'Se esperaba el byte {recibido}.')
+        self.recibido = recibido
+
+
+def ruta_parcial(subida: SubidaArchivo) -> Path:
+    return Path(settings.SUBIDAS_ROOT) / f'{subida.pk}.part'
+
+
+def puede_subir(usuario, destino: str) -> bool:
+    if destino == 'plantilla':
+        return usuario.is_superuser
+    return usuario.is_superuser or usuario.es_instructor
+
+
+def _limite(destino: str) -> str:
+    return f'{LIMITES[destino] // MB}MB'
+
+
+def validar_archivo(archivo, destino: str) -> None:
+    """Valida tamaño y firma %PDF de un archivo recibido de una sola vez en el formulario."""
+    if not isinstance(archivo, UploadedFile):
+        # Archivo ya guardado (edición sin cambiarlo)
+        return
+    if archivo.size > LIMITES[destino]:
+        raise SubidaDemasiadoGrande(f'El archivo es demasiado grande. El tamaño máximo permitido es {_limite(destino)}.')
+    inicio = archivo.read(len(MAGIA_PDF))
+    archivo.seek(0)
+    if inicio != MAGIA_PDF:
+        raise SubidaInvalida('El archivo debe ser un PDF válido.')
+
+
+def _suma(subida: SubidaArchivo, desplazamiento: int):
+    """Copia del SHA-256 de los primeros `desplazamiento` bytes del archivo parcial."""
+    with _sumas_lock:
+        incluidos, suma = _sumas.get(subida.pk, (None, None))
+    if incluidos == desplazamiento:
+        return suma.copy()
+    suma = hashlib.sha256()
+    if desplazamiento:
+        with open(ruta_parcial(subida), 'rb') as parcial:
+            faltan = desplazamiento
+            while faltan:
+                bloque = parcial.read(min(BLOQUE_LECTURA, faltan))
+                if not bloque:
+                    break
+                suma.update(bloque)
+                faltan -= len(bloque)
+    return suma
+
+
+def _recordar_suma(subida: SubidaArchivo, incluidos: int, suma) -> None:
+    with _sumas_lock:
+        _sumas[subida.pk] = (incluidos, suma)
+        _sumas.move_to_end(subida.pk)
+        while len(_sumas) > SUMAS_EN_MEMORIA:
+            _sumas.popitem(last=False)
+
+
+def _olvidar_suma(subida: SubidaArchivo) -> None:
+    with _sumas_lock:
+        _sumas.pop(subida.pk, None)
+
+
+def descartar(subida: SubidaArchivo) -> None:
+    """Borra la subida con su archivo parcial o, si ya terminó, con el archivo ensamblado."""
+    _olvidar_suma(subida)
+    ruta_parcial(subida).unlink(missing_ok=True)
+    if subida.archivo:
+        CAMPOS[subida.destino].storage.delete(subida.archivo)
+    subida.delete()
+
+
+def vencidas():
+    """Subidas sin actividad durante más de VIGENCIA."""
+    return SubidaArchivo.objects.filter(fecha_actualizacion__lt=timezone.now() - VIGENCIA)
+
+
+def limpiar() -> int:
+    """Descarta las subidas vencidas de todos los usuarios y devuelve cuántas eran."""
+    descartadas = 0
+    for subida in vencidas().iterator():
+        descartar(subida)
+        descartadas += 1
+    return descartadas
+
+
+def iniciar(usuario, destino: str, nombre: str, tamano) -> SubidaArchivo:
+    """Registra una subida nueva; el tamaño declarado se valida antes de recibir datos."""
+    if destino not in LIMITES:
+        raise SubidaInvalida('Destino de subida desconocido.')
+    nombre = os.path.basename(str(nombre or '')).strip()
+    if not nombre.lower().endswith('.pdf'):
+        raise SubidaInvalida('El archivo debe ser un PDF válido.')
+    try:
+        tamano = int(tamano)
+    except (TypeError, ValueError):
+        raise SubidaInvalida('Falta el tamaño del archivo.')
+    if tamano < len(MAGIA_PDF):
+        raise SubidaInvalida('El archivo debe ser un PDF válido.')
+    if tamano > LIMITES[destino]:
+        raise SubidaDemasiadoGrande(f'El archivo es demasiado grande. El tamaño máximo permitido es {_limite(destino)}.')
+
+    return SubidaArchivo.objects.create(usuario=usuario, destino=destino, nombre=nombre[:255], tamano=tamano)
+
+
+def _leer(cuerpo: BinaryIO, cantidad: int) -> bytes:
+    # read() puede devolver menos de lo pedido aunque el cuerpo no haya terminado
+    partes, faltan = [], cantidad
+    while faltan:
+        parte = cuerpo.read(faltan)
+        if not parte:
+            break
+        partes.append(parte)
+        faltan -= len(parte)
+    return b''.join(partes)
+
+
+def recibir(subida: SubidaArchivo, desplazamiento: int, cuerpo: BinaryIO, longitud: int) -> SubidaArchivo:
+    """
+    Escribe un trozo en el archivo parcial a partir de `desplazamiento`.
+
+    El cuerpo se lee de a BLOQUE_LECTURA bytes, sin tenerlo entero en memoria. El
+    trozo se escribe en su posición descartando lo que hubiera detrás, así que
+    reenviar un trozo cuya respuesta se perdió no corrompe el archivo. El SHA-256
+    se va calculando trozo a trozo: con el último, el archivo se mueve al
+    almacenamiento sin volver a leerlo.
+    """
+    if desplazamiento != subida.recibido or subida.completa:
+        raise DesplazamientoInvalido(subida.recibido)
+    if longitud <= 0:
+        raise SubidaInvalida('El trozo está vacío.')
+    if longitud > TAMANO_TROZO_MAX:
+        raise SubidaDemasiadoGrande(f'Cada trozo puede tener hasta {TAMANO_TROZO_MAX // MB}MB.')
+    if desplazamiento + longitud > subida.tamano:
+        raise SubidaDemasiadoGrande('El trozo excede el tamaño declarado del archivo.')
+
+    cabecera = b''
+    if desplazamiento == 0:
+        # El primer trozo decide si vale la pena seguir recibiendo
+        cabecera = _leer(cuerpo, len(MAGIA_PDF))
+        if cabecera != MAGIA_PDF:
+            descartar(subida)
+            raise SubidaInvalida('El archivo debe ser un PDF válido.')
+
+    parcial = ruta_parcial(subida)
+    parcial.parent.mkdir(parents=True, exist_ok=True)
+    suma = _suma(subida, desplazamiento)
+    with open(parcial, 'r+b' if parcial.exists() else 'wb') as destino:
+        destino.seek(desplazamiento)
+        destino.truncate()
+        destino.write(cabecera)
+        suma.update(cabecera)
+        escritos = len(cabecera)
+        while escritos < longitud:
+            bloque = cuerpo.read(min(BLOQUE_LECTURA, longitud - escritos))
+            if not bloque:
+                break
+            destino.write(bloque)
+            suma.update(bloque)
+            escritos += len(bloque)
+    if escritos < longitud:
+        raise SubidaInvalida('El trozo llegó incompleto; reanude la subida.')
+
+    actualizadas = SubidaArchivo.objects.filter(pk=subida.pk, recibido=desplazamiento).update(
+        recibido=desplazamiento + longitud, fecha_actualizacion=timezone.now()
+    )
+    if not actualizadas:
+        # Otro envío del mismo trozo llegó antes
+        subida.refresh_from_db()
+        raise DesplazamientoInvalido(subida.recibido)
+    subida.recibido = desplazamiento + longitud
+    if subida.recibido == subida.tamano:
+        _olvidar_suma(subida)
+        _ensamblar(subida, suma.hexdigest())
+    else:
+        _recordar_suma(subida, subida.recibido, suma)
+    return subida
+
+
+def _ensamblar(subida: SubidaArchivo, huella: str) -> None:
+    parcial = ruta_parcial(subida)
+    campo = CAMPOS[subida.destino]
+    nombre = campo.generate_filename(None, subida.nombre)
+    subida.archivo = campo.storage.guardar_calculado(parcial, nombre, huella)
+    parcial.unlink(missing_ok=True)
+    SubidaArchivo.objects.filter(pk=subida.pk).update(archivo=subida.archivo)
+
+
+def completa(subida_id, usuario, destino: str) -> SubidaArchivo:
+    """Subida terminada del usuario para ese destino, lista para asociarse a un registro."""
+    try:
+        subida_id = uuid.UUID(str(subida_id))
+    except ValueError:
+        raise SubidaInvalida('La subida del archivo no existe.')
+    subida = SubidaArchivo.objects.filter(
+        pk=subida_id, usuario=usuario, destino=destino
+    ).exclude(archivo='').first()
+    if subida is None:
+        raise SubidaInvalida('La subida del archivo no existe o no terminó.')
+    return subida
+
+
+def consumir(subida: SubidaArchivo) -> str:
+    """
+    Quita el registro de la subida y suelta su referencia al archivo; devuelve el
+    nombre para asociarlo con storage.asignar(), que suma la del nuevo dueño.
+    """
+    subida.delete()
+    liberar(subida.archivo)
+    return subida.archivo
+
+
+# ======= API =======
+def _respuesta(subida: SubidaArchivo, status: int = 200) -> JsonResponse:
+    response = JsonResponse({
+        'id': str(subida.pk),
+        'offset': subida.recibido,
+        'tamano': subida.tamano,
+        'completa': subida.completa,
+        'trozo': TAMANO_TROZO,
+        'url': reverse('subida_archivo', args=[subida.pk]),
+    }, status=status)
+    response['Upload-Offset'] = str(subida.recibido)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _error(mensaje: str, status: int) -> JsonResponse:
+    return JsonResponse({'error': mensaje}, status=status)
+
+
+@login_required
+@require_POST
+def iniciar_subida(request: HttpRequest) -> JsonResponse:
+    """Inicia una subida por trozos a partir de {destino, nombre, tamano} en JSON."""
+    try:
+        datos = json.loads(request.body or b'{}')
+    except ValueError:
+        return _error('El cuerpo debe ser JSON.', 400)
+    destino = datos.get('destino')
+    if destino in LIMITES and not puede_subir(request.user, destino):
+        return _error('No tienes permisos para subir este archivo.', 403)
+    try:
+        subida = iniciar(request.user, destino, datos.get('nombre'), datos.get('tamano'))
+    except SubidaInvalida as e:
+        return _error(str(e), e.status)
+    response = _respuesta(subida, status=201)
+    response['Location'] = reverse('subida_archivo', args=[subida.pk])
+    return response
+
+
+@login_required
+@require_http_methods(['GET', 'HEAD', 'PATCH', 'DELETE'])
+def subida_archivo(request: HttpRequest, pk) -> HttpResponse:
+    """
+    Estado de una subida (GET), envío de un trozo (PATCH) o cancelación (DELETE).
+
+    Cada trozo va en el cuerpo tal cual, con el encabezado Upload-Offset indicando
+    el byte en el que empieza. Si no coincide con lo recibido se responde 409 con
+    el desplazamiento desde el que hay que reanudar.
+    """
+    subida = get_object_or_404(SubidaArchivo, pk=pk, usuario=request.user)
+    if request.method == 'DELETE':
+        descartar(subida)
+        return HttpResponse(status=204)
+    if request.method == 'PATCH':
+        try:
+            desplazamiento = int(request.headers['Upload-Offset'])
+            longitud = int(request.META.get('CONTENT_LENGTH') or 0)
+        except (KeyError, ValueError):
+            return _error('Faltan los encabezados Upload-Offset y Content-Length.', 400)
+        try:
+            subida = recibir(subida, desplazamiento, request, longitud)
+        except DesplazamientoInvalido as e:
+            response = _error(str(e), 409)
+            response['Upload-Offset'] = str(e.recibido)
+            return response
+        except SubidaInvalida as e:
+            return _error(str(e), e.status)
+    return _respuesta(subida)
@@ -2,6 +2,9 @@ from django.urls import path
 from django.contrib.auth import views as auth_views
 from . import views
 from . import certificates
+from . import delivery
+from . import exports
+from . import uploads
 
 urlpatterns = [
     path('registro/', views.register, name='register'),
@@ -11,26 +14,46 @@ urlpatterns = [
     path('instructor/curso/crear/', views.crear_curso_view, name='crear_curso'),
     path('instructor/curso/<int:pk>/editar/', views.editar_curso_view, name='editar_curso_view'),
     path('instructor/curso/<int:pk>/', views.ver_curso_view, name='ver_curso_view'),
+    path('instructor/curso/<int:pk>/estudiantes/exportar/', exports.export_roster, name='export_roster'),
     path('instructor/curso/<int:pk>/eliminar/', views.eliminar_curso_instructor, name='eliminar_curso_instructor'),
     path('instructor/estadisticas/', views.ver_estadisticas_view, name='ver_estadisticas'),
     path('instructor/dashboard/', views.instructor_dashboard, name='instructor_dashboard'),
     path('administracion/dashboard/', views.admin_dashboard, name='admin_dashboard'),
     path('administracion/usuarios/', views.admin_users, name='admin_users'),
     path('administracion/usuarios/crear/', views.create_user, name='create_user'),
+    path('administracion/usuarios/importar/', views.import_users, name='import_users'),
+    path('administracion/usuarios/exportar/', exports.export_users, name='export_users'),
     path('administracion/usuarios/<int:pk>/editar/', views.edit_user, name='edit_user'),
     path('administracion/cursos/', views.admin_courses, name='admin_courses'),
     path('administracion/cursos/crear/', views.create_course, name='create_course'),
     path('administracion/cursos/<int:pk>/editar/', views.edit_course, name='edit_course'),
     path('administracion/cursos/<int:pk>/eliminar/', views.delete_course, name='delete_course'),
     path('administracion/compras/', views.admin_purchases, name='admin_purchases'),
+    path('administracion/compras/cursos/', views.sugerir_cursos, name='sugerir_cursos'),
+    path('administracion/compras/exportar/', exports.export_purchases, name='export_purchases'),
     path('administracion/compras/<int:compra_id>/recibo/', views.download_receipt, name='download_receipt'),
+    path('administracion/compras/comprobantes/', views.download_receipts_zip, name='download_receipts_zip'),
+    path('administracion/compras/comprobantes/<int:pk>/', views.descargar_zip_comprobantes, name='descargar_zip_comprobantes'),
+    path('subidas/', uploads.iniciar_subida, name='iniciar_subida'),
+    path('subidas/<uuid:pk>/', uploads.subida_archivo, name='subida_archivo'),
+    path('trabajos/<int:pk>/', views.ver_trabajo, name='ver_trabajo'),
+    path('trabajos/<int:pk>/estado/', views.estado_trabajo, name='estado_trabajo'),
+    path('certificados/verificar/', certificates.verificar_certificado, name='verificar_certificado'),
+    path('certificados/verificar/<str:codigo>/', certificates.verificar_certificado, name='verificar_certificado_codigo'),
+    path('certificados/verificar/<str:codigo>/pdf/', certificates.descargar_certificado_verificado, name='descargar_certificado_verificado'),
+    path('api/certificados/<str:codigo>/', certificates.verificar_certificado_json, name='verificar_certificado_json'),
     path('administracion/certificados/', views.admin_certificates, name='admin_certificates'),
+    path('administracion/certificados/exportar/', exports.export_certificates, name='export_certificates'),
     path('administracion/certificados/plantilla/crear/', certificates.create_certificate_template, name='create_certificate_template'),
+    path('administracion/certificados/plantilla/<int:pk>/pdf/', certificates.ver_plantilla, name='ver_plantilla'),
     path('administracion/certificados/plantilla/<int:pk>/eliminar/', certificates.delete_certificate_template, name='delete_certificate_template'),
+    path('administracion/certificados/plantilla/<int:pk>/emitir/', certificates.emitir_con_plantilla, name='emitir_con_plantilla'),
     path('', views.home, name='home'),
     path('cursos/', views.course_list, name='course_list'),
+    path('cursos/buscar/', views.buscar_cursos, name='buscar_cursos'),
     path('cursos/<int:pk>/', views.course_detail, name='course_detail'),
     path('cursos/<int:pk>/pagar/', views.pagar_curso, name='pagar_curso'),
     path('cursos/<int:pk>/contenido/', views.ver_contenido, name='ver_contenido'),
+    path('cursos/<int:pk>/material/', delivery.material_curso, name='material_curso'),
     path('dashboard/', views.dashboard, name='dashboard'),
 ]
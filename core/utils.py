@@ -2,6 +2,7 @@ from django.template.loader import render_to_string
 from django.http import HttpResponse
 import os
 from datetime import datetime
+from functools import lru_cache
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
@@ -9,9 +10,41 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from io import BytesIO
 
-def generate_purchase_receipt(compra):
+
+@lru_cache(maxsize=None)
+def receipt_styles():
+    """Hoja de estilos de los comprobantes; se arma una sola vez por proceso."""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='Center',
+        parent=styles['Heading1'],
+        alignment=1,  # 0=Left, 1=Center, 2=Right
+    ))
+    return styles
+
+
+def purchase_receipt_data(compra):
     """
-    Genera un PDF con el detalle de la compra en formato de boleta.
+    Filas de la tabla del comprobante: todo lo que cambia entre un comprobante y otro.
+    """
+    # Información de la compra
+    fecha = compra.fecha_compra.strftime("%d/%m/%Y %H:%M:%S")
+    return [
+        ['Nº de Compra:', str(compra.id)],
+        ['Fecha:', fecha],
+        ['Estudiante:', compra.estudiante.nombre_completo],
+        ['Email:', compra.estudiante.email],
+        ['Curso:', compra.curso.titulo],
+        ['Precio:', f"${compra.monto_pagado:,.2f}"],
+    ]
+
+
+def render_purchase_receipt(data):
+    """
+    Genera el PDF de un comprobante a partir de sus filas.
+
+    Sólo recibe datos simples, así que también puede ejecutarse en un proceso
+    aparte sin acceso a los modelos.
     """
     # Crear un buffer para el PDF
     buffer = BytesIO()
@@ -30,31 +63,13 @@ def generate_purchase_receipt(compra):
     elements = []
     
     # Estilos
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(
-        name='Center',
-        parent=styles['Heading1'],
-        alignment=1,  # 0=Left, 1=Center, 2=Right
-    ))
+    styles = receipt_styles()
     
     # Título
     elements.append(Paragraph("Conecta Saber", styles['Center']))
     elements.append(Paragraph("Comprobante de Compra", styles['Center']))
     elements.append(Spacer(1, 20))
     
-    # Información de la compra
-    fecha = compra.fecha_compra.strftime("%d/%m/%Y %H:%M:%S")
-    
-    # Datos para la tabla
-    data = [
-        ['Nº de Compra:', str(compra.id)],
-        ['Fecha:', fecha],
-        ['Estudiante:', compra.estudiante.nombre_completo],
-        ['Email:', compra.estudiante.email],
-        ['Curso:', compra.curso.titulo],
-        ['Precio:', f"${compra.monto_pagado:,.2f}"],
-    ]
-    
     # Crear tabla
     table = Table(data, colWidths=[120, 300])
     table.setStyle(TableStyle([
@@ -83,4 +98,11 @@ def generate_purchase_receipt(compra):
     pdf = buffer.getvalue()
     buffer.close()
     
-    return pdf
\ No newline at end of file
+    return pdf
+
+
+def generate_purchase_receipt(compra):
+    """
+    Genera un PDF con el detalle de la compra en formato de boleta.
+    """
+    return render_purchase_receipt(purchase_receipt_data(compra))
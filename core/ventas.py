@@ -0,0 +1,147 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Optional
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Min, QuerySet, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import Compra, VentaDiaria
+
+
+def dia_de(fecha_compra: datetime) -> date:
+    """Día (en la zona horaria del sitio) al que se asigna una compra."""
+    return timezone.localdate(fecha_compra)
+
+
+def aplicar(curso_id: int, fecha: date, compras: int, ingresos) -> None:
+    """
+    Suma los deltas al acumulado del curso en ese día con un UPDATE atómico.
+
+    Si la fila no existe se crea; si otra transacción la crea a la vez, se
+    vuelve a intentar el UPDATE.
+    """
+    if not compras and not ingresos:
+        return
+    filtro = VentaDiaria.objects.filter(curso_id=curso_id, fecha=fecha)
+    cambios = {'compras': F('compras') + compras, 'ingresos': F('ingresos') + ingresos}
+    if filtro.update(**cambios) or compras <= 0:
+        # Una resta sin fila sólo ocurre si el curso ya se borró (y con él sus ventas)
+        return
+    try:
+        with transaction.atomic():
+            VentaDiaria.objects.create(curso_id=curso_id, fecha=fecha, compras=compras, ingresos=ingresos)
+    except IntegrityError:
+        filtro.update(**cambios)
+
+
+def reconstruir(cursos: Optional[list[int]] = None, lote: int = 1000) -> int:
+    """
+    Recalcula desde las compras validadas los acumulados de los cursos indicados
+    (o de todos) y devuelve la cantidad de filas creadas.
+    """
+    compras = Compra.objects.filter(estado_pago='validado')
+    ventas = VentaDiaria.objects.all()
+    if cursos is not None:
+        compras = compras.filter(curso_id__in=cursos)
+        ventas = ventas.filter(curso_id__in=cursos)
+    # TruncDate usa la zona horaria del sitio, igual que dia_de()
+    filas = (
+        compras.annotate(fecha=TruncDate('fecha_compra'))
+        .values('curso_id', 'fecha')
+        .annotate(total=Count('id'), suma=Sum('monto_pagado'))
+        .order_by()
+    )
+    with transaction.atomic():
+        ventas.delete()
+        creadas = VentaDiaria.objects.bulk_create(
+            (
+                VentaDiaria(curso_id=fila['curso_id'], fecha=fila['fecha'],
+                            compras=fila['total'], ingresos=fila['suma'])
+                for fila in filas.iterator()
+            ),
+            batch_size=lote
+        )
+    return len(creadas)
+
+
+def _sumar_meses(mes: date, n: int) -> date:
+    indice = mes.year * 12 + mes.month - 1 + n
+    return date(indice // 12, indice % 12 + 1, 1)
+
+
+def serie_diaria(ventas: QuerySet, dias: int = 30) -> list[dict]:
+    """Compras e ingresos de cada uno de los últimos `dias` días (con ceros)."""
+    hoy = timezone.localdate()
+    desde = hoy - timedelta(days=dias - 1)
+    totales = {
+        fila['fecha']: fila
+        for fila in ventas.filter(fecha__gte=desde).values('fecha')
+        .annotate(compras_dia=Sum('compras'), ingresos_dia=Sum('ingresos')).order_by()
+    }
+    serie = []
+    for n in range(dias):
+        fecha = desde + timedelta(days=n)
+        fila = totales.get(fecha, {})
+        serie.append({
+            'fecha': fecha,
+            'compras': fila.get('compras_dia', 0),
+            'ingresos': fila.get('ingresos_dia', Decimal('0')),
+        })
+    return serie
+
+
+def serie_mensual(ventas: QuerySet, meses: int = 12) -> list[dict]:
+    """
+    Compras e ingresos de los últimos `meses` meses (con ceros), con la
+    variación porcentual de ingresos respecto del mes anterior.
+    """
+    actual = timezone.localdate().replace(day=1)
+    desde = _sumar_meses(actual, -meses)
+    totales = {
+        # TruncMonth de un DateField devuelve date
+        fila['mes']: fila
+        for fila in ventas.filter(fecha__gte=desde).annotate(mes=TruncMonth('fecha'))
+        .values('mes').annotate(compras_mes=Sum('compras'), ingresos_mes=Sum('ingresos')).order_by()
+    }
+    # El mes anterior al primero sólo se usa para calcular su variación
+    anterior = totales.get(desde, {}).get('ingresos_mes', Decimal('0'))
+    serie = []
+    for n in range(1, meses + 1):
+        mes = _sumar_meses(desde, n)
+        fila = totales.get(mes, {})
+        ingresos = fila.get('ingresos_mes', Decimal('0'))
+        serie.append({
+            'mes': mes,
+            'compras': fila.get('compras_mes', 0),
+            'ingresos': ingresos,
+            'variacion': (ingresos - anterior) / anterior * 100 if anterior else None,
+        })
+        anterior = ingresos
+    return serie
+
+
+def promedio_mensual(ventas: QuerySet) -> dict:
+    """
+    Compras e ingresos promedio por mes, desde el mes de la primera venta hasta
+    el actual (los meses sin ventas también cuentan).
+    """
+    totales = ventas.aggregate(compras=Sum('compras'), ingresos=Sum('ingresos'), primera=Min('fecha'))
+    if totales['primera'] is None:
+        return {'compras': 0, 'ingresos': Decimal('0')}
+    hoy = timezone.localdate()
+    meses = max(1, (hoy.year - totales['primera'].year) * 12 + hoy.month - totales['primera'].month + 1)
+    return {
+        'compras': totales['compras'] / meses,
+        'ingresos': totales['ingresos'] / meses,
+    }
+
+
+def ingresos_por_curso(ventas: QuerySet) -> QuerySet:
+    """Compras e ingresos acumulados de cada curso, de mayor a menor ingreso."""
+    return (
+        ventas.values('curso_id', 'curso__titulo')
+        .annotate(compras_total=Sum('compras'), total=Sum('ingresos'))
+        .order_by('-total')
+    )
@@ -0,0 +1,89 @@
+import hashlib
+from typing import Optional
+
+from django.core.cache import cache, caches
+
+from .models import Certificado
+
+# Tiempo en caché de un código existente y de uno que no existe (segundos)
+TTL = 60 * 60
+TTL_INEXISTENTE = 5 * 60
+
+# Valor guardado para los códigos que no existen (None significa "no está en caché")
+_INEXISTENTE = 'inexistente'
+
+LONGITUD_MAXIMA = Certificado._meta.get_field('codigo_unico_pdf').max_length
+
+
+def normalizar(codigo: str) -> str:
+    return codigo.strip()
+
+
+def _clave(codigo: str) -> str:
+    # Los códigos cargados a mano pueden tener cualquier carácter: la clave usa su hash
+    return f'certificado:{hashlib.md5(codigo.encode()).hexdigest()}'
+
+
+def _candidatos(codigo: str) -> list[str]:
+    # Los códigos emitidos están en mayúsculas, pero los cargados desde el admin
+    # pueden no estarlo: primero vale el código tal cual y después en mayúsculas
+    return list(dict.fromkeys((codigo, codigo.upper())))
+
+
+def _buscar(codigo: str) -> Optional[dict]:
+    # Cada candidato se busca por el índice único
+    for candidato in _candidatos(codigo):
+        fila = Certificado.objects.filter(codigo_unico_pdf=candidato).values(
+            'codigo_unico_pdf', 'fecha_emision', 'estudiante__nombre_completo', 'curso_id', 'curso__titulo',
+        ).first()
+        if fila is not None:
+            return {
+                'codigo': fila['codigo_unico_pdf'],
+                'estudiante': fila['estudiante__nombre_completo'],
+                'curso_id': fila['curso_id'],
+                'curso': fila['curso__titulo'],
+                'fecha_emision': fila['fecha_emision'],
+            }
+    return None
+
+
+def verificar(codigo: str) -> Optional[dict]:
+    """
+    Datos públicos del certificado con ese código, o None si no existe.
+
+    La consulta usa el índice único de codigo_unico_pdf y sólo lee columnas (no
+    el PDF). Los certificados encontrados se guardan en la caché compartida, de
+    donde invalidar() los quita para todos los procesos; los códigos
+    inexistentes, en la caché acotada "verificaciones" de cada proceso.
+    """
+    codigo = normalizar(codigo)
+    if not codigo or len(codigo) > LONGITUD_MAXIMA:
+        return None
+    # El positivo está guardado bajo el código canónico: se prueban en una sola
+    # lectura las mismas formas que buscaría _buscar()
+    claves = [_clave(candidato) for candidato in _candidatos(codigo)]
+    encontrados = cache.get_many(claves)
+    for clave in claves:
+        if clave in encontrados:
+            return encontrados[clave]
+    clave = claves[0]
+    inexistentes = caches['verificaciones']
+    if inexistentes.get(clave) is not None:
+        return None
+    datos = _buscar(codigo)
+    if datos is None:
+        inexistentes.set(clave, _INEXISTENTE, TTL_INEXISTENTE)
+    else:
+        # Bajo el código guardado, que es el que recibe invalidar()
+        cache.set(_clave(datos['codigo']), datos, TTL)
+    return datos
+
+
+def invalidar(codigo: str) -> None:
+    """
+    Descarta el resultado cacheado del código: el positivo en todos los procesos
+    y el negativo en éste (en los demás vence a los TTL_INEXISTENTE segundos).
+    """
+    clave = _clave(normalizar(codigo))
+    cache.delete(clave)
+    caches['verificaciones'].delete(clave)
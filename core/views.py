@@ -1,20 +1,29 @@
 from typing import Optional, cast
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import HttpRequest, HttpResponse
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.tokens import default_token_generator
 from django import forms
 from django.contrib import messages
 from django.core.mail import send_mail, BadHeaderError
-from django.db.models import Sum
+from django.db.models import Count, Max
 from django.template.loader import render_to_string
-from django.utils.http import urlsafe_base64_encode
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag, urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 
-from .models import Curso, Compra, Usuario, Certificado
+from .models import Curso, Compra, Usuario, Certificado, TrabajoPDF, VentaDiaria
 from .forms import EstudianteRegistrationForm, InstructorCreationForm, CourseForm, AdminUserCreationForm
 from .utils import generate_purchase_receipt
+from .catalog import contar_facetas, cursos_visibles, leer_filtros, pagina_catalogo, query_filtros
+from .conditional import etag, firma_usuario, revalidar
+from .directory import ROLES_DIRECTORIO, contar_roles, pagina_usuarios
+from .entitlements import cursos_del_usuario, tiene_acceso
+from . import instructor_stats, jobs, ledger, receipts, roster, search, stats, ventas
+from .provisioning import ROLES
 
 def home(request: HttpRequest) -> HttpResponse:
 	"""Página de inicio simple.
@@ -23,25 +32,47 @@ def home(request: HttpRequest) -> HttpResponse:
 	"""
 	return render(request, "core/index.html", {"title": "Conecta Saber"})
 
+def _resumen_catalogo(request: HttpRequest) -> dict:
+    # Se calcula una sola vez por petición aunque lo usen ETag y Last-Modified
+    if not hasattr(request, '_resumen_catalogo'):
+        request._resumen_catalogo = cursos_visibles().aggregate(
+            ultima=Max('fecha_actualizacion'),
+            total=Count('id')
+        )
+    return request._resumen_catalogo
+
+def _catalogo_etag(request: HttpRequest) -> str:
+    resumen = _resumen_catalogo(request)
+    return etag(resumen['ultima'], resumen['total'], request.GET.urlencode(), firma_usuario(request))
+
+def _catalogo_last_modified(request: HttpRequest):
+    # Last-Modified no refleja cambios en los accesos del usuario; sólo se usa
+    # para visitantes anónimos
+    if request.user.is_authenticated:
+        return None
+    return _resumen_catalogo(request)['ultima']
+
+@revalidar(_catalogo_etag, _catalogo_last_modified)
 def course_list(request: HttpRequest) -> HttpResponse:
-    """Muestra una lista de todos los cursos disponibles."""
-    # Obtener todos los cursos activos
-    courses = Curso.objects.all()
+    """Muestra el catálogo de cursos activos, paginado por cursor."""
+    filtros = leer_filtros(request.GET)
+    # Una sola consulta con el instructor unido y sólo las columnas de la tarjeta
+    courses, next_cursor = pagina_catalogo(request.GET.get('cursor'), filtros)
     user_courses = []
     
     if request.user.is_authenticated:
         usuario = cast(Usuario, request.user)
         if usuario.es_estudiante:
-            # Obtener los cursos que el estudiante ya ha comprado
-            compras = Compra.objects.filter(
-                estudiante=usuario,
-                estado_pago='validado'
-            ).values_list('curso_id', flat=True)
-            user_courses = Curso.objects.filter(id__in=compras)
+            # IDs de los cursos que el estudiante ya ha comprado
+            user_courses = cursos_del_usuario(usuario.pk)
     
     context = {
         "courses": courses,
         "user_courses": user_courses,
+        "next_cursor": next_cursor,
+        "is_first_page": not request.GET.get('cursor'),
+        "facetas": contar_facetas(filtros),
+        "filtros_query": query_filtros(filtros),
     }
     
     return render(request, "core/course_list.html", context)
@@ -53,7 +84,7 @@ def pagar_curso(request: HttpRequest, pk: int) -> HttpResponse:
     usuario = cast(Usuario, request.user)
     
     # Verificar si el usuario ya compró el curso
-    if Compra.objects.filter(estudiante=usuario, curso=curso, estado_pago='validado').exists():
+    if tiene_acceso(usuario.pk, curso.pk):
         messages.info(request, 'Ya tienes acceso a este curso.')
         return redirect('ver_contenido', pk=curso.pk)
     
@@ -82,12 +113,50 @@ def ver_contenido(request: HttpRequest, pk: int) -> HttpResponse:
     usuario = cast(Usuario, request.user)
     
     # Verificar si el usuario tiene acceso al curso
-    if not Compra.objects.filter(estudiante=usuario, curso=curso, estado_pago='validado').exists():
+    if not tiene_acceso(usuario.pk, curso.pk):
         messages.error(request, 'No tienes acceso a este curso. Por favor, realiza la compra primero.')
         return redirect('course_list')
     
     return render(request, 'core/contenido_curso.html', {'curso': curso})
 
+def buscar_cursos(request: HttpRequest) -> HttpResponse:
+    """Busca cursos por título, descripción o instructor."""
+    texto = request.GET.get('q', '').strip()
+    try:
+        pagina = max(int(request.GET.get('pagina', 1)), 1)
+    except ValueError:
+        pagina = 1
+
+    resultados, hay_siguiente = search.buscar(texto, pagina) if texto else ([], False)
+
+    context = {
+        'q': texto,
+        'resultados': resultados,
+        'pagina': pagina,
+        'pagina_anterior': pagina - 1 if pagina > 1 else None,
+        'pagina_siguiente': pagina + 1 if hay_siguiente else None,
+    }
+    return render(request, 'core/search_results.html', context)
+
+def _curso_actualizado(request: HttpRequest, pk: int):
+    if not hasattr(request, '_curso_actualizado'):
+        request._curso_actualizado = Curso.objects.filter(pk=pk).values_list(
+            'fecha_actualizacion', flat=True
+        ).first()
+    return request._curso_actualizado
+
+def _curso_etag(request: HttpRequest, pk: int) -> Optional[str]:
+    fecha = _curso_actualizado(request, pk)
+    if fecha is None:
+        return None
+    return etag(fecha.isoformat(), firma_usuario(request))
+
+def _curso_last_modified(request: HttpRequest, pk: int):
+    if request.user.is_authenticated:
+        return None
+    return _curso_actualizado(request, pk)
+
+@revalidar(_curso_etag, _curso_last_modified)
 def course_detail(request: HttpRequest, pk: int) -> HttpResponse:
     """Muestra los detalles de un curso específico y sus módulos."""
     course = get_object_or_404(Curso, pk=pk)
@@ -243,19 +312,18 @@ def instructor_dashboard(request: HttpRequest) -> HttpResponse:
         return redirect('dashboard')
         
     # Obtener los cursos del instructor
-    cursos = Curso.objects.filter(instructor=usuario).order_by('-fecha_creacion')
+    cursos = list(Curso.objects.filter(instructor=usuario).order_by('-fecha_creacion'))
     
-    # Calcular estadísticas
-    cursos_count = cursos.count()
-    estudiantes_count = Compra.objects.filter(
-        curso__instructor=usuario,
-        estado_pago='validado'
-    ).values('estudiante').distinct().count()
+    # Estadísticas cacheadas por instructor
+    resumen = instructor_stats.resumen(usuario.pk)
+    for curso in cursos:
+        curso.estudiantes_count = resumen['inscripciones'].get(curso.pk, 0)
     
     context = {
         'cursos': cursos,
-        'cursos_count': cursos_count,
-        'estudiantes_count': estudiantes_count
+        'cursos_count': resumen['cursos'],
+        'estudiantes_count': resumen['estudiantes'],
+        'total_ingresos': resumen['ingresos'],
     }
     
     return render(request, "core/instructor_dashboard.html", context)
@@ -287,25 +355,16 @@ def admin_dashboard(request: HttpRequest) -> HttpResponse:
         messages.error(request, 'No tienes permisos para acceder al panel de administración.')
         return redirect('home')
         
-    # Obtener estadísticas generales
-    total_usuarios = Usuario.objects.count()
-    total_instructores = Usuario.objects.filter(es_instructor=True).count()
-    total_estudiantes = Usuario.objects.filter(es_estudiante=True).count()
-    total_cursos = Curso.objects.count()
-    total_compras = Compra.objects.filter(estado_pago='validado').count()
-    
-    # Calcular ingresos totales
-    total_ingresos = Compra.objects.filter(
-        estado_pago='validado'
-    ).aggregate(total=Sum('monto_pagado'))['total'] or 0
+    # Totales mantenidos por señales: una sola fila en lugar de recorrer las tablas
+    estadisticas = stats.obtener()
 
     context = {
-        'total_usuarios': total_usuarios,
-        'total_instructores': total_instructores,
-        'total_estudiantes': total_estudiantes,
-        'total_cursos': total_cursos,
-        'total_compras': total_compras,
-        'total_ingresos': f"${total_ingresos:,.2f}",
+        'total_usuarios': estadisticas.total_usuarios,
+        'total_instructores': estadisticas.total_instructores,
+        'total_estudiantes': estadisticas.total_estudiantes,
+        'total_cursos': estadisticas.total_cursos,
+        'total_compras': estadisticas.total_compras,
+        'total_ingresos': f"${estadisticas.total_ingresos:,.2f}",
     }
     
     return render(request, 'core/admin/dashboard.html', context)
@@ -320,20 +379,27 @@ def admin_users(request: HttpRequest) -> HttpResponse:
     # Limpiar mensajes pendientes de otras secciones
     list(messages.get_messages(request))
     
-    usuarios = Usuario.objects.all().order_by('date_joined')
-    estudiantes = usuarios.filter(es_estudiante=True)
-    instructores = usuarios.filter(es_instructor=True)
-    administradores = usuarios.filter(is_superuser=True)
-    
+    claves = [clave for clave, *_ in ROLES_DIRECTORIO]
+    rol = request.GET.get('rol') if request.GET.get('rol') in claves else 'todos'
+    busqueda = request.GET.get('q', '').strip()
+    cursor = request.GET.get('cursor')
+    usuarios, next_cursor = pagina_usuarios(rol, busqueda, cursor)
+    totales = contar_roles()
+
     context = {
         'usuarios': usuarios,
-        'total_usuarios': usuarios.count(),
-        'total_estudiantes': estudiantes.count(),
-        'total_instructores': instructores.count(),
-        'total_administradores': administradores.count(),
-        'estudiantes': estudiantes,
-        'instructores': instructores,
-        'administradores': administradores,
+        'total_usuarios': totales['todos'],
+        'total_estudiantes': totales['estudiantes'],
+        'total_instructores': totales['instructores'],
+        'total_administradores': totales['administradores'],
+        'pestanas': [
+            {'clave': clave, 'etiqueta': etiqueta, 'total': totales[clave], 'activa': clave == rol}
+            for clave, etiqueta, _filtro in ROLES_DIRECTORIO
+        ],
+        'rol': rol,
+        'busqueda': busqueda,
+        'next_cursor': next_cursor,
+        'is_first_page': not cursor,
     }
     
     return render(request, 'core/admin/users.html', context)
@@ -449,6 +515,38 @@ def create_user(request: HttpRequest) -> HttpResponse:
     
     return render(request, 'core/admin/create_user.html', {'form': form})
 
+@login_required
+def import_users(request: HttpRequest) -> HttpResponse:
+    """Vista para crear estudiantes o instructores en lote desde un CSV."""
+    if not request.user.is_superuser:
+        messages.error(request, 'No tienes permisos para crear usuarios.')
+        return redirect('admin_users')
+
+    context = {}
+    if request.method == 'POST':
+        archivo = request.FILES.get('archivo')
+        rol = request.POST.get('rol', 'estudiante')
+        if not archivo or not archivo.name.lower().endswith('.csv'):
+            context['error'] = 'Debe seleccionar un archivo CSV.'
+        elif rol not in ROLES:
+            context['error'] = 'Rol no válido.'
+        else:
+            # Hashear miles de contraseñas no cabe en una petición: lo hace la cola
+            trabajo = jobs.encolar_carga_usuarios(archivo, rol, request.user)
+            return redirect('ver_trabajo', pk=trabajo.pk)
+    elif request.GET.get('trabajo'):
+        # Resultado de una carga terminada
+        trabajo = TrabajoPDF.objects.filter(
+            pk=request.GET['trabajo'], tipo='usuarios', estado='terminado'
+        ).first() if request.GET['trabajo'].isdigit() else None
+        if trabajo is not None:
+            context.update({
+                'resumen': trabajo.parametros.get('resumen'),
+                'errores': trabajo.parametros.get('errores', []),
+            })
+
+    return render(request, 'core/admin/import_users.html', context)
+
 @login_required
 def admin_courses(request: HttpRequest) -> HttpResponse:
     """Vista para la gestión de cursos."""
@@ -479,7 +577,7 @@ def edit_course(request: HttpRequest, pk: int) -> HttpResponse:
     curso = get_object_or_404(Curso, pk=pk)
     
     if request.method == 'POST':
-        form = CourseForm(request.POST, instance=curso)
+        form = CourseForm(request.POST, request.FILES, instance=curso, usuario=request.user)
         if form.is_valid():
             form.save()
             messages.success(request, 'Curso actualizado exitosamente.')
@@ -520,21 +618,44 @@ def admin_purchases(request: HttpRequest) -> HttpResponse:
         messages.error(request, 'No tienes permisos para acceder a esta sección.')
         return redirect('home')
     
-    compras = Compra.objects.all().order_by('-fecha_compra')
-    # Calcular sólo las compras validadas (ventas reales)
-    total_ingresos = Compra.objects.filter(estado_pago='validado').aggregate(
-        total=Sum('monto_pagado')
-    )['total'] or 0
+    filtros = ledger.leer_filtros(request.GET)
+    cursor = request.GET.get('cursor')
+    compras, next_cursor = ledger.pagina_compras(filtros, cursor)
+    # Sólo las compras validadas (ventas reales), desde los totales acumulados
+    estadisticas = stats.obtener()
 
     context = {
         'compras': compras,
-        'total_compras': compras.count(),
+        'next_cursor': next_cursor,
+        'is_first_page': not cursor,
+        'filtros': filtros,
+        'filtros_query': ledger.query_filtros(filtros),
+        'estados': ledger.ESTADOS_PAGO,
+        # Sólo el título del curso filtrado; los demás se buscan con sugerir_cursos
+        'curso_filtrado': Curso.objects.filter(pk=filtros['curso']).values_list('titulo', flat=True).first()
+        if 'curso' in filtros else None,
+        'total_compras': estadisticas.total_compras,
         # Pasamos el número bruto y dejamos el formato para la plantilla
-        'total_ingresos': total_ingresos,
+        'total_ingresos': estadisticas.total_ingresos,
+        'promedio_compras_mes': ventas.promedio_mensual(VentaDiaria.objects.all())['compras'],
     }
 
     return render(request, 'core/admin/purchases.html', context)
 
+@login_required
+def sugerir_cursos(request: HttpRequest) -> JsonResponse:
+    """Cursos (activos o no) que coinciden con lo escrito en el filtro del libro de compras."""
+    if not request.user.is_superuser:
+        return JsonResponse({'cursos': []}, status=403)
+    texto = request.GET.get('q', '').strip()
+    cursos = []
+    if texto:
+        cursos = list(
+            search.filtrar_queryset(Curso.objects.all(), texto)
+            .order_by('titulo').values('id', 'titulo')[:10]
+        )
+    return JsonResponse({'cursos': cursos})
+
 @login_required
 def download_receipt(request: HttpRequest, compra_id: int) -> HttpResponse:
     """Vista para descargar el comprobante de compra."""
@@ -542,15 +663,125 @@ def download_receipt(request: HttpRequest, compra_id: int) -> HttpResponse:
         messages.error(request, 'No tienes permisos para descargar comprobantes.')
         return redirect('home')
     
-    compra = get_object_or_404(Compra, pk=compra_id)
-    pdf = generate_purchase_receipt(compra)
-    
-    # Crear la respuesta HTTP con el PDF
-    response = HttpResponse(pdf, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="comprobante_compra_{compra_id}.pdf"'
+    compra = get_object_or_404(Compra.objects.select_related('estudiante', 'curso'), pk=compra_id)
+    # El PDF se genera una vez por versión de los datos y se guarda en disco
+    ruta, huella = receipts.buscar(compra)
+    etag_comprobante = quote_etag(huella)
+    no_modificado = get_conditional_response(request, etag=etag_comprobante)
+    if no_modificado is not None:
+        return no_modificado
+    if ruta is None:
+        # Se genera fuera del servidor web; la página de espera vuelve aquí al terminar
+        trabajo = jobs.encolar('comprobante', compra.id, usuario=request.user)
+        return redirect('ver_trabajo', pk=trabajo.pk)
+    
+    response = FileResponse(
+        open(ruta, 'rb'),
+        as_attachment=True,
+        filename=f'comprobante_compra_{compra_id}.pdf',
+        content_type='application/pdf'
+    )
+    response['ETag'] = etag_comprobante
+    patch_cache_control(response, private=True, no_cache=True)
     return response
     
 
+def _trabajo_visible(request: HttpRequest, pk: int) -> TrabajoPDF:
+    trabajo = get_object_or_404(TrabajoPDF, pk=pk)
+    if not request.user.is_superuser and trabajo.solicitado_por_id != request.user.id:
+        raise Http404
+    return trabajo
+
+
+@login_required
+def ver_trabajo(request: HttpRequest, pk: int) -> HttpResponse:
+    """Página de espera de un trabajo PDF; al terminar redirige al archivo."""
+    trabajo = _trabajo_visible(request, pk)
+    if trabajo.estado == 'terminado':
+        if trabajo.tipo in ('emision', 'usuarios'):
+            messages.success(request, trabajo.resultado)
+        return redirect(jobs.destino(trabajo))
+    if trabajo.estado == 'fallido':
+        if trabajo.tipo == 'usuarios':
+            messages.error(request, f'No se pudo completar la carga: {trabajo.error}')
+            return redirect('import_users')
+        messages.error(request, f'No se pudo generar el PDF: {trabajo.error}')
+        return redirect('admin_purchases' if trabajo.tipo in ('comprobante', 'comprobantes_zip') else 'admin_certificates')
+    return render(request, 'core/trabajo.html', {'trabajo': trabajo})
+
+
+@login_required
+def estado_trabajo(request: HttpRequest, pk: int) -> JsonResponse:
+    """Estado de un trabajo PDF, consultado periódicamente por la página de espera."""
+    trabajo = _trabajo_visible(request, pk)
+    response = JsonResponse({
+        'id': trabajo.pk,
+        'tipo': trabajo.tipo,
+        'estado': trabajo.estado,
+        'intentos': trabajo.intentos,
+        'error': trabajo.error,
+        # Avance informado por los trabajos largos
+        'progreso': trabajo.resultado if trabajo.estado == 'en_proceso' else '',
+        # Terminado o fallido, la página de espera muestra el resultado
+        'url': reverse('ver_trabajo', args=[trabajo.pk]) if trabajo.estado not in jobs.ACTIVOS else None,
+    })
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required
+def download_receipts_zip(request: HttpRequest) -> HttpResponse:
+    """
+    Descarga en un ZIP los comprobantes de las compras filtradas en el libro de
+    compras (por defecto, las validadas) dentro de un rango de fechas.
+
+    Los ZIP chicos se generan mientras se envían, en este proceso; los demás se
+    encolan y los genera un worker de procesar_trabajos.
+    """
+    if not request.user.is_superuser:
+        messages.error(request, 'No tienes permisos para descargar comprobantes.')
+        return redirect('home')
+
+    filtros = ledger.leer_filtros(request.GET)
+    libro = f"{reverse('admin_purchases')}?{ledger.query_filtros(filtros)}"
+    if 'desde' not in filtros or 'hasta' not in filtros:
+        messages.error(request, 'Elige un rango de fechas (desde y hasta) para descargar los comprobantes.')
+        return redirect(libro)
+    if (filtros['hasta'] - filtros['desde']).days >= ledger.MAXIMO_DIAS_ZIP:
+        messages.error(request, f'El rango de fechas no puede superar los {ledger.MAXIMO_DIAS_ZIP} días.')
+        return redirect(libro)
+    filtros.setdefault('estado', 'validado')
+    compras = ledger.aplicar_filtros(Compra.objects.order_by('fecha_compra', 'id'), filtros)
+
+    if compras.count() > ledger.MAXIMO_ZIP_DIRECTO:
+        trabajo = jobs.encolar_zip_comprobantes(filtros, request.user)
+        return redirect('ver_trabajo', pk=trabajo.pk)
+
+    response = StreamingHttpResponse(receipts.comprobantes_zip(compras), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="comprobantes_{timezone.localdate().isoformat()}.zip"'
+    return response
+
+
+@login_required
+def descargar_zip_comprobantes(request: HttpRequest, pk: int) -> HttpResponse:
+    """ZIP de comprobantes generado por la cola de trabajos."""
+    if not request.user.is_superuser:
+        messages.error(request, 'No tienes permisos para descargar comprobantes.')
+        return redirect('home')
+    trabajo = get_object_or_404(TrabajoPDF, pk=pk, tipo='comprobantes_zip', estado='terminado')
+    ruta = jobs.ruta_zip(trabajo)
+    if not ruta.exists():
+        messages.error(request, 'El ZIP ya no está disponible; vuelve a descargarlo desde el libro de compras.')
+        return redirect('admin_purchases')
+    response = FileResponse(
+        open(ruta, 'rb'),
+        as_attachment=True,
+        filename=f'comprobantes_{timezone.localdate(trabajo.fecha_fin).isoformat()}.zip',
+        content_type='application/zip'
+    )
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
 @login_required
 def admin_certificates(request: HttpRequest) -> HttpResponse:
     """Vista para la gestión de certificados."""
@@ -565,6 +796,7 @@ def admin_certificates(request: HttpRequest) -> HttpResponse:
     # Obtener certificados y plantillas
     certificados = Certificado.objects.all().order_by('-fecha_emision')
     plantillas = PlantillaCertificado.objects.all().order_by('-fecha_creacion')
+    cursos = Curso.objects.order_by('titulo').only('id', 'titulo')
     
     # Calcular certificados de este mes
     hoy = timezone.now()
@@ -576,6 +808,7 @@ def admin_certificates(request: HttpRequest) -> HttpResponse:
     context = {
         'certificados': certificados,
         'plantillas': plantillas,
+        'cursos': cursos,
         'total_certificados': certificados.count(),
         'total_plantillas': plantillas.count(),
         'certificados_mes': certificados_mes,
@@ -592,7 +825,7 @@ def crear_curso_view(request: HttpRequest) -> HttpResponse:
         return redirect('home')
     
     if request.method == 'POST':
-        form = CourseForm(request.POST, request.FILES)
+        form = CourseForm(request.POST, request.FILES, usuario=request.user)
         if form.is_valid():
             curso = form.save(commit=False)
             curso.instructor = request.user
@@ -619,7 +852,7 @@ def editar_curso_view(request: HttpRequest, pk: int) -> HttpResponse:
     curso = get_object_or_404(Curso, pk=pk, instructor=request.user)
     
     if request.method == 'POST':
-        form = CourseForm(request.POST, request.FILES, instance=curso)
+        form = CourseForm(request.POST, request.FILES, instance=curso, usuario=request.user)
         if form.is_valid():
             form.save()
             messages.success(request, 'Curso actualizado exitosamente.')
@@ -644,12 +877,18 @@ def ver_curso_view(request: HttpRequest, pk: int) -> HttpResponse:
         return redirect('home')
         
     curso = get_object_or_404(Curso, pk=pk, instructor=request.user)
-    estudiantes = Compra.objects.filter(curso=curso, estado_pago='validado')
+    busqueda = request.GET.get('q', '').strip()
+    cursor = request.GET.get('cursor')
+    estudiantes, next_cursor = roster.pagina_roster(curso.pk, busqueda, cursor)
     
     context = {
         'curso': curso,
         'estudiantes': estudiantes,
-        'total_estudiantes': estudiantes.count(),
+        # Contador cacheado junto con el resto del panel del instructor
+        'total_estudiantes': instructor_stats.resumen(usuario.pk)['inscripciones'].get(curso.pk, 0),
+        'busqueda': busqueda,
+        'next_cursor': next_cursor,
+        'is_first_page': not cursor,
     }
     
     return render(request, 'core/instructor/ver_curso.html', context)
@@ -664,22 +903,23 @@ def ver_estadisticas_view(request: HttpRequest) -> HttpResponse:
     
     # Obtener estadísticas detalladas
     cursos = Curso.objects.filter(instructor=request.user)
-    total_estudiantes = Compra.objects.filter(
-        curso__instructor=request.user,
-        estado_pago='validado'
-    ).values('estudiante').distinct().count()
-    
-    ingresos_por_curso = Compra.objects.filter(
-        curso__instructor=request.user,
-        estado_pago='validado'
-    ).values('curso__titulo').annotate(
-        total=Sum('monto_pagado')
-    )
-    
+    resumen = instructor_stats.resumen(usuario.pk)
+
+    # Series e ingresos desde las ventas diarias, sin recorrer las compras
+    ventas_instructor = VentaDiaria.objects.filter(curso__instructor=request.user)
+    ingresos_por_curso = ventas.ingresos_por_curso(ventas_instructor)
+    serie_diaria = ventas.serie_diaria(ventas_instructor)
+
     context = {
         'cursos': cursos,
-        'total_estudiantes': total_estudiantes,
+        'total_estudiantes': resumen['estudiantes'],
         'ingresos_por_curso': ingresos_por_curso,
+        'total_ingresos': resumen['ingresos'],
+        'promedio_mensual': ventas.promedio_mensual(ventas_instructor),
+        'serie_mensual': ventas.serie_mensual(ventas_instructor),
+        'serie_diaria': serie_diaria,
+        # Escala del gráfico de barras
+        'maximo_diario': max((dia['ingresos'] for dia in serie_diaria), default=0),
     }
     
     return render(request, 'core/instructor/estadisticas.html', context)
@@ -708,7 +948,7 @@ def create_course(request: HttpRequest) -> HttpResponse:
         return redirect('admin_courses')
         
     if request.method == 'POST':
-        form = CourseForm(request.POST, request.FILES)
+        form = CourseForm(request.POST, request.FILES, usuario=request.user)
         if form.is_valid():
             curso = form.save()
             messages.success(request, f'Curso "{curso.titulo}" creado exitosamente.')
@@ -0,0 +1,64 @@
+import multiprocessing
+import os
+import socket
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# Este módulo no importa modelos: los procesos hijos lo cargan antes de que
+# Django esté configurado.
+
+
+def _inicializar_worker():
+    # Con el método "spawn" el proceso hijo parte sin Django configurado
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'conecta_saber.settings')
+    django.setup()
+
+
+def crear_pool(procesos: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
+    """
+    Pool de procesos con Django listo para usar; None si sólo hay un procesador.
+
+    Se usa "spawn" en lugar de "fork" para no heredar conexiones a la base de
+    datos ni hilos del servidor web.
+    """
+    procesos = procesos or os.cpu_count() or 1
+    if procesos == 1:
+        return None
+    return ProcessPoolExecutor(
+        max_workers=procesos,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_inicializar_worker,
+    )
+
+
+def _atender_cola(nombre: str, espera: float, hasta_vaciar: bool, procesos_por_trabajo: Optional[int]) -> None:
+    import signal
+    import threading
+
+    _inicializar_worker()
+    from . import jobs
+
+    detener = threading.Event()
+    # Ctrl+C lo recibe el proceso principal, que pide a cada worker que termine
+    # su trabajo en curso con SIGTERM
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: detener.set())
+    jobs.atender(nombre, espera, hasta_vaciar, detener, procesos_por_trabajo)
+
+
+def iniciar_workers_cola(procesos: int, espera: float = 1.0, hasta_vaciar: bool = False,
+                         procesos_por_trabajo: Optional[int] = None) -> list:
+    """
+    Inicia `procesos` workers de la cola de trabajos PDF, cada uno en su proceso.
+    Cada trabajo puede repartirse a su vez en un pool de `procesos_por_trabajo`.
+    """
+    contexto = multiprocessing.get_context('spawn')
+    workers = []
+    for numero in range(1, procesos + 1):
+        nombre = f'{socket.gethostname()}:{os.getpid()}:{numero}'
+        proceso = contexto.Process(target=_atender_cola, args=(nombre, espera, hasta_vaciar, procesos_por_trabajo),
+                                   name=nombre)
+        proceso.start()
+        workers.append(proceso)
+    return workers